@@ -0,0 +1,84 @@
+"""
+Import-time budget check for the pipeline modules.
+
+Each module is imported in a fresh interpreter and timed. A module fails the check if
+its import takes longer than IMPORT_TIME_BUDGET_SECONDS or if it pulls in one of the
+HEAVY_MODULES (model weights and frameworks must only load on first use, see
+model_registry.py).
+
+Usage:
+    python import_budget.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+IMPORT_TIME_BUDGET_SECONDS = 0.5
+MODULES = ["main", "mistral_api", "summarization", "model_registry"]
+HEAVY_MODULES = ["torch", "transformers"]
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(module):
+    """
+    Imports `module` in a fresh interpreter.
+    :return: dict with the import time in seconds and the heavy modules it loaded
+    :raises ImportError: if the module cannot be imported
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=here, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error"
+        raise ImportError(f"Failed to import '{module}': {error}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def check_import_budget(modules=MODULES, budget=IMPORT_TIME_BUDGET_SECONDS):
+    """
+    Measures every module against the budget.
+    :return: list of dicts with module, seconds, heavy modules and an `ok` flag
+    """
+    report = []
+    for module in modules:
+        try:
+            measured = measure_import(module)
+        except ImportError as e:
+            report.append({"module": module, "seconds": None, "heavy": [], "ok": False, "error": str(e)})
+            continue
+        report.append({
+            "module": module,
+            "seconds": round(measured["seconds"], 4),
+            "heavy": measured["heavy"],
+            "ok": measured["seconds"] <= budget and not measured["heavy"],
+        })
+    return report
+
+
+def main():
+    report = check_import_budget()
+    for entry in report:
+        if entry.get("error"):
+            print(f"❌ {entry['error']}")
+            continue
+        status = "✅" if entry["ok"] else "❌"
+        heavy = f" (loaded {', '.join(entry['heavy'])})" if entry["heavy"] else ""
+        print(f"{status} import {entry['module']}: {entry['seconds']:.3f}s{heavy}")
+    if not all(entry["ok"] for entry in report):
+        print(f"❌ Import-time budget check failed (budget: {IMPORT_TIME_BUDGET_SECONDS}s per module).")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Schema and incremental parsing for the financial-insights JSON returned by the LLM.
+
+`JsonObjectScanner` consumes streamed text chunks and reports the first complete
+top-level JSON object as soon as its closing brace arrives, ignoring any chatter
+before it. This lets the caller stop the generation early instead of waiting for
+(and paying for) the tokens the model produces after the object.
+"""
+
+import json
+
+# JSON schema sent to LM Studio as `response_format`
+INSIGHTS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "narrative": {"type": "string", "enum": ["DECISIVE", "NON-DECISIVE"]},
+        "direction": {"type": "string", "enum": ["LONG", "SHORT"]},
+        "Support": {"type": "array", "items": {"type": "number"}},
+        "Resistance": {"type": "array", "items": {"type": "number"}},
+        "Buy_Area": {
+            "type": "array",
+            "items": {"type": "array", "items": {"type": "number"}, "minItems": 2, "maxItems": 2},
+        },
+        "Sell_Area": {
+            "type": "array",
+            "items": {"type": "array", "items": {"type": "number"}, "minItems": 2, "maxItems": 2},
+        },
+    },
+    "required": ["narrative", "direction", "Support", "Resistance", "Buy_Area", "Sell_Area"],
+    "additionalProperties": False,
+}
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_insights(insights):
+    """
+    Checks a parsed response against INSIGHTS_SCHEMA.
+    :raises ValueError: describing the first violation found
+    """
+    if not isinstance(insights, dict):
+        raise ValueError("Insights must be a JSON object.")
+
+    properties = INSIGHTS_SCHEMA["properties"]
+    for field in INSIGHTS_SCHEMA["required"]:
+        if field not in insights:
+            raise ValueError(f"Missing field '{field}'.")
+    extra = set(insights) - set(properties)
+    if extra:
+        raise ValueError(f"Unexpected fields: {sorted(extra)}.")
+
+    for field in ("narrative", "direction"):
+        if insights[field] not in properties[field]["enum"]:
+            raise ValueError(f"'{field}' must be one of {properties[field]['enum']}, got {insights[field]!r}.")
+    for field in ("Support", "Resistance"):
+        if not isinstance(insights[field], list) or not all(_is_number(v) for v in insights[field]):
+            raise ValueError(f"'{field}' must be a list of numbers.")
+    for field in ("Buy_Area", "Sell_Area"):
+        areas = insights[field]
+        if not isinstance(areas, list) or not all(
+            isinstance(area, list) and len(area) == 2 and all(_is_number(v) for v in area) for area in areas
+        ):
+            raise ValueError(f"'{field}' must be a list of [low, high] number pairs.")
+    return insights
+
+
+class JsonObjectScanner:
+    """Finds the first complete top-level JSON object in streamed text."""
+
+    def __init__(self):
+        self._parts = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.complete = False
+
+    def feed(self, chunk):
+        """
+        Consumes the next chunk of text.
+        :return: str, the complete JSON object text once its closing brace was seen, otherwise None
+        """
+        if self.complete:
+            return None
+
+        start = 0
+        for index, char in enumerate(chunk):
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    start = index
+                continue  # Text outside the object is chatter
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(chunk[start:index + 1])
+                    self.complete = True
+                    return "".join(self._parts)
+
+        if self._depth > 0:
+            self._parts.append(chunk[start:])
+        return None
+
+
+def parse_streamed_object(chunks):
+    """
+    Consumes text chunks until the first top-level JSON object is complete.
+    Stops iterating right away, so a generator backed by a streaming response is closed early.
+    :return: parsed object
+    :raises ValueError: if the stream ends before an object is complete
+    """
+    scanner = JsonObjectScanner()
+    for chunk in chunks:
+        text = scanner.feed(chunk)
+        if text is not None:
+            return json.loads(text)
+    raise ValueError("Stream ended before a complete JSON object was received.")
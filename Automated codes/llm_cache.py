@@ -0,0 +1,100 @@
+"""
+Persistent, content-addressed cache for LM Studio chat completions.
+
+Completions are stored in SQLite under the SHA-256 of the prompt text, model name,
+temperature, prompt-template version, response format and `max_tokens`, so a plain and a
+structured request never share an entry, and re-running the pipeline (after a crash,
+a wider date range or a rebuilt Mongo collection) doesn't send identical prompts to
+the LLM again. Entries expire after `max_age_seconds`, and the least recently used
+entries are evicted once the cache holds more than `max_entries`.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+LLM_CACHE_FILE = "llm_cache.sqlite3"
+DEFAULT_MAX_ENTRIES = 50000
+DEFAULT_MAX_AGE_SECONDS = 90 * 24 * 3600  # 90 days
+
+
+def completion_key(prompt, model, temperature, prompt_version, response_format=None, max_tokens=None):
+    """Returns the cache key of a chat completion; `response_format` and `max_tokens` as sent (None if not)."""
+    material = json.dumps([prompt, model, float(temperature), prompt_version, response_format, max_tokens],
+                          sort_keys=True)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """SQLite-backed completion cache with size/age eviction, safe to share between threads."""
+
+    def __init__(self, path=LLM_CACHE_FILE, max_entries=DEFAULT_MAX_ENTRIES, max_age_seconds=DEFAULT_MAX_AGE_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, content TEXT NOT NULL, "
+            "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS completions_last_access ON completions (last_access)")
+        self._conn.commit()
+        self.evict()
+
+    def get(self, key):
+        """Returns the cached completion content for `key`, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT content, created_at FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.max_age_seconds:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE completions SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, model, content):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, model, content, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, content, now, now)
+            )
+            self._conn.commit()
+        self.evict()
+
+    def evict(self):
+        """Removes expired entries and trims the cache to `max_entries` (least recently used first)."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM completions WHERE created_at < ?", (time.time() - self.max_age_seconds,)
+            )
+            evicted = cursor.rowcount
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()
+            if count > self.max_entries:
+                cursor = self._conn.execute(
+                    "DELETE FROM completions WHERE key IN "
+                    "(SELECT key FROM completions ORDER BY last_access ASC LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+                evicted += cursor.rowcount
+            self._conn.commit()
+            self.evictions += evicted
+
+    def stats(self):
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()
+        return {"entries": entries, "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,175 @@
+"""
+Pooled LM Studio (OpenAI-compatible) chat-completion client.
+
+- Keeps connections alive through a pooled `requests.Session`.
+- Retries timeouts, connection errors, 429 and 5xx responses with jittered exponential backoff.
+- Limits the number of requests in flight, for both the sync and the asyncio API.
+- Reads the endpoint from the `LM_STUDIO_API_URL` environment variable.
+- Streams completions over server-sent events (`stream_chat`), so callers can stop early.
+
+Use `stub_lm_server.py` to run the client against a local stub instead of LM Studio.
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import random
+import threading
+import time
+import weakref
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_API_URL = "http://192.168.0.106:1234/v1/chat/completions"
+LM_STUDIO_API_URL = os.environ.get("LM_STUDIO_API_URL", DEFAULT_API_URL)
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class LMStudioClient:
+    """Thread-safe chat-completion client with retries and a max-in-flight limit."""
+
+    def __init__(self, api_url=None, timeout=120.0, max_retries=3, backoff_base=1.0, backoff_max=30.0,
+                 max_in_flight=4, pool_size=None):
+        self.api_url = api_url or LM_STUDIO_API_URL
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_in_flight = max_in_flight
+        self.retries = 0  # Total retried attempts, for diagnostics
+
+        pool_size = pool_size or max_in_flight
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        # asyncio semaphores are bound to one event loop, so every running loop gets its own
+        self._async_in_flight = weakref.WeakKeyDictionary()
+        self._async_lock = threading.Lock()
+
+    def _backoff(self, attempt):
+        """Full-jitter exponential backoff delay for a retry attempt (0-based)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _post(self, payload, stream=False):
+        """
+        Sends one request, retrying transient failures. Every attempt holds an in-flight slot,
+        but backoff sleeps don't. Returns the successful response with its slot still held;
+        use `_response` to release it.
+        """
+        attempt = 0
+        while True:
+            self._in_flight.acquire()
+            response = None
+            try:
+                response = self.session.post(self.api_url, json=payload, timeout=self.timeout, stream=stream)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    return response
+                error = requests.exceptions.HTTPError(
+                    f"{response.status_code} Server Error for url: {self.api_url}", response=response
+                )
+                response.close()
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                error = e
+            except BaseException:
+                # Non-retryable errors (e.g. a 4xx) must not keep a pooled connection checked out
+                if response is not None:
+                    response.close()
+                self._in_flight.release()
+                raise
+            self._in_flight.release()
+
+            if attempt >= self.max_retries:
+                raise error
+            delay = self._backoff(attempt)
+            print(f"⚠️ LM Studio request failed ({error}). Retrying in {delay:.1f}s...")
+            self.retries += 1
+            attempt += 1
+            time.sleep(delay)
+
+    @contextlib.contextmanager
+    def _response(self, payload, stream=False):
+        """Yields the successful response of a request, holding its in-flight slot until the block exits."""
+        response = self._post(payload, stream)
+        try:
+            yield response
+        finally:
+            response.close()
+            self._in_flight.release()
+
+    def chat(self, payload):
+        """
+        Sends a chat-completion request.
+        :param payload: dict, OpenAI-compatible request body
+        :return: dict, parsed JSON response
+        """
+        with self._response(payload) as response:
+            return response.json()
+
+    def stream_chat(self, payload):
+        """
+        Sends a streaming chat-completion request and yields the content deltas as they arrive.
+        Closing the generator closes the connection, which makes LM Studio stop generating.
+        :param payload: dict, OpenAI-compatible request body (`stream` is set automatically)
+        """
+        with self._response(dict(payload, stream=True), stream=True) as response:
+            response.encoding = "utf-8"
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or []
+                delta = choices[0].get("delta", {}).get("content") if choices else None
+                if delta:
+                    yield delta
+
+    async def achat(self, payload):
+        """Asyncio version of `chat`; at most `max_in_flight` requests run at the same time."""
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            semaphore = self._async_in_flight.get(loop)
+            if semaphore is None:
+                semaphore = self._async_in_flight[loop] = asyncio.Semaphore(self.max_in_flight)
+        async with semaphore:
+            return await loop.run_in_executor(None, self.chat, payload)
+
+    async def achat_many(self, payloads):
+        """
+        Sends many chat-completion requests concurrently.
+        :return: list of responses (or exceptions) in the order of `payloads`
+        """
+        return await asyncio.gather(*(self.achat(payload) for payload in payloads), return_exceptions=True)
+
+    def close(self):
+        self.session.close()
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_client():
+    """Returns the shared client used by mistral_api.py."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = LMStudioClient()
+        return _default_client
+
+
+def configure_client(**kwargs):
+    """Replaces the shared client with one built from `kwargs` (see LMStudioClient)."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is not None:
+            _default_client.close()
+        _default_client = LMStudioClient(**kwargs)
+        return _default_client
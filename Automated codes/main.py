@@ -2,48 +2,87 @@
 YouTube Financial Video Analyzer
 
 This script extracts videos from a specified YouTube channel, filters them by date and keyword,
-downloads their transcripts, summarizes the content using a T5 model, analyzes the summarized 
-content using a Mistral API to extract structured financial insights, and stores the results in MongoDB.
+downloads their transcripts, summarizes the content once with a selectable summarizer (none, T5 or
+LongT5), analyzes the summarized content using a Mistral API to extract structured financial insights,
+and stores the results in MongoDB.
 
 Dependencies:
 - yt_dlp: For YouTube metadata and video list extraction
 - youtube_transcript_api: For fetching transcripts
-- transformers: For using the T5 summarization model
+- transformers: For using the T5/LongT5 summarization models
 - pymongo: For MongoDB operations
 - mistral_api: Custom API for financial insight extraction from text
+- staged_pipeline: Concurrent producer/consumer mode (`--mode staged`)
+- sync_state: Per-channel processed ids and high-water mark for incremental syncs
+- summarization / summary_cache: Batched summarization stage and its content-hash cache
+- model_registry: Lazy, shared model loading
+- video_store: MongoDB index bootstrapping, processed-id prefetch and batched idempotent upserts
+- transcript_store: Local compressed transcripts and metadata (`--offline` runs purely from it)
+- retrieval_index: BM25 index over the stored transcripts, updated with the videos of every run
+- pipeline_metrics: Per-stage timings, volumes and outcomes (`--metrics-port`, `--metrics-file`)
+
+Heavy dependencies (yt-dlp, the transcript API and the summarization models) are only imported
+or loaded when they are first needed, so a run that finds no new videos starts and exits quickly.
 """
 
 from mistral_api import process_transcript_with_mistral
+from lm_client import configure_client
+from staged_pipeline import Stage, run_pipeline
+from sync_state import ChannelSyncState, SYNC_STATE_FILE
+from summarization import summarize_texts, SUMMARIZERS, DEFAULT_SUMMARIZER
+from summary_cache import SummaryCache, SUMMARY_CACHE_FILE
+from llm_cache import LLMCache, LLM_CACHE_FILE
+from video_store import (BulkVideoWriter, ensure_indexes, extract_video_id, load_processed_ids,
+                         DEFAULT_FLUSH_SIZE, DEFAULT_FLUSH_INTERVAL)
+from transcript_store import TranscriptStore, TRANSCRIPT_STORE_DIR, fetch_segments
+from retrieval_index import RetrievalIndex, RETRIEVAL_INDEX_DIR
+from pipeline_metrics import PipelineMetrics, SnapshotWriter, start_metrics_server, DEFAULT_SNAPSHOT_INTERVAL
 from pymongo import MongoClient
-import yt_dlp
+import argparse
+import contextlib
 import datetime
 import json
-from youtube_transcript_api import YouTubeTranscriptApi
-from transformers import T5Tokenizer, T5ForConditionalGeneration
+import threading
+
+MONGO_URI = "mongodb://localhost:27017/"
+_collection = None
+_collection_lock = threading.Lock()
 
-# Connect to MongoDB
-client = MongoClient("mongodb://localhost:27017/")
-db = client["youtube_data"]
-collection = db["videos"]
+def get_collection():
+    """Connects to MongoDB on first use and returns the `videos` collection, with its indexes in place."""
+    global _collection
+    with _collection_lock:
+        if _collection is None:
+            client = MongoClient(MONGO_URI)
+            _collection = client["youtube_data"]["videos"]
+            ensure_indexes(_collection)
+    return _collection
 
 # Define the date range for filtering videos
 START_DATE = datetime.datetime(2024, 6, 1)
 END_DATE = datetime.datetime(2025, 3, 12)
 
-# Load T5 model and tokenizer for summarization
-model_name = "t5-small"  # Can be changed to "t5-base" or "t5-large" for better results
-tokenizer = T5Tokenizer.from_pretrained(model_name)
-model = T5ForConditionalGeneration.from_pretrained(model_name)
+# Stock the processed videos are about (see check_title)
+STOCK_NAME = "TSLA"
 
-def summarize_transcript(transcript):
-    """Summarizes a given transcript using the T5 model."""
-    max_input_length = 512  # T5 model input limit
-    tokenized_text = tokenizer.encode(transcript, return_tensors="pt", truncation=True, max_length=max_input_length)
-    summary_ids = model.generate(tokenized_text, max_length=150, min_length=50, length_penalty=2.0, num_beams=4)
-    return tokenizer.decode(summary_ids[0], skip_special_tokens=True)
+def summarize_batch(transcripts, summarizer=DEFAULT_SUMMARIZER, cache=None, batch_size=None, max_batch_tokens=None,
+                    chunked=False):
+    """
+    Summarization stage: runs the selected summarizer over many transcripts in length-bucketed
+    batches, preserving input order. Summaries already in `cache` are not regenerated. With
+    `chunked`, long transcripts are map-reduced over overlapping windows instead of truncated.
+    """
+    return summarize_texts(transcripts, summarizer, cache=cache,
+                           batch_size=batch_size, max_batch_tokens=max_batch_tokens, chunked=chunked)
+
+def summarize_transcript(transcript, summarizer=DEFAULT_SUMMARIZER, cache=None, chunked=False):
+    """Summarizes a given transcript with the selected summarizer."""
+    return summarize_batch([transcript], summarizer, cache, chunked=chunked)[0]
 
 def get_video_metadata(video_url):
     """Extracts metadata of a YouTube video."""
+    import yt_dlp
+
     ydl_opts = {"quiet": True, "format": "best"}
     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
         return ydl.extract_info(video_url, download=False)
@@ -55,19 +94,29 @@ def format_date(yyyymmdd):
     except ValueError:
         return None
 
-def get_transcript(video_id):
-    """Fetches the transcript of a YouTube video."""
+def get_transcript(video_id, store=None, offline=False, sample=None):
+    """
+    Fetches the transcript of a YouTube video, reading it from the local store when available.
+    :param sample: pipeline_metrics.StageSample or None, marked skipped/failed when there is no transcript
+    """
     try:
-        transcript = YouTubeTranscriptApi.get_transcript(video_id)
-        return " ".join([entry["text"] for entry in transcript])
+        segments = fetch_segments(video_id, store, offline=offline)
+        if segments is None:
+            print(f"⚠️ Transcript of {video_id} is not in the local store.")
+            if sample is not None:
+                sample.skip()
+            return None
+        return " ".join(segment["text"] for segment in segments)
     except Exception as e:
         print(f"⚠️ Transcript not available for {video_id}: {e}")
+        if sample is not None:
+            sample.error()
         return None
 
-def analyze_transcript(transcript):
+def analyze_transcript(transcript, llm_cache=None, refresh=False, structured=False):
     """Processes the transcript using Mistral API for financial insights."""
     try:
-        response = process_transcript_with_mistral(transcript)
+        response = process_transcript_with_mistral(transcript, cache=llm_cache, refresh=refresh, structured=structured)
         if not response:
             return None
 
@@ -84,62 +133,445 @@ def analyze_transcript(transcript):
         print(f"❌ Error processing transcript with Mistral: {e}")
         return None
 
-def process_channel_videos(channel_url):
-    """Processes all videos from a given YouTube channel."""
+def get_channel_entries(channel_url):
+    """Lists the flat playlist entries (id, url, title) of a channel, newest first."""
+    import yt_dlp
+
     ydl_opts = {"quiet": True, "extract_flat": True, "force_generic_extractor": True}
     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
         info = ydl.extract_info(channel_url, download=False)
-    
-    video_urls = [entry["url"] for entry in info.get("entries", []) if "url" in entry]
 
-    for video_url in video_urls:
-        metadata = get_video_metadata(video_url)
-        video_id = metadata.get("id", "N/A")
-        upload_date = format_date(metadata.get("upload_date", "N/A"))
-        
-        # Skip videos outside the date range
-        if not upload_date or not (START_DATE <= upload_date <= END_DATE):
-            print(f"⏭️ Skipping '{metadata.get('title', 'N/A')}' (Out of Date Range)")
-            continue
-        
-        # Skip already processed videos
-        if collection.find_one({"Video URL": metadata.get("webpage_url", "N/A")}):
-            print(f"⚠️ Already processed: '{metadata.get('title', 'N/A')}'. Skipping...")
-            continue
-        
-        # Skip Nvidia-related videos, process only Tesla-related videos
-        video_title = metadata.get("title", "").lower()
-        if "nvidia" in video_title or "nvda" in video_title:
-            print(f"⏭️ Skipping Nvidia-related video: '{metadata.get('title', 'N/A')}'")
+    return [entry for entry in info.get("entries", []) if entry and "url" in entry]
+
+def check_title(title):
+    """
+    Applies the topic filter to a video title.
+    :return: str reason for skipping the video, or None if it is Tesla-related
+    """
+    video_title = (title or "").lower()
+    if "nvidia" in video_title or "nvda" in video_title:
+        return "Nvidia-related video"
+    if "tsla" not in video_title and "tesla" not in video_title:
+        return "unrelated video"
+    return None
+
+def prefilter_entries(entries, sync_state, processed_ids, full_sync=False):
+    """
+    Filters flat playlist entries before any per-video metadata is fetched.
+
+    Entries are dropped when they are already processed, when an earlier run rejected them
+    (unless `full_sync` is set, which checks them again), when their title is off-topic,
+    or when the flat data carries an upload date outside START_DATE/END_DATE. Unless
+    `full_sync` is set, only new uploads are read: the listing is ordered newest first, so
+    past the channel's high-water mark only the videos still pending from earlier runs are
+    kept, and reading stops once all of them were found. Every kept entry is recorded as
+    pending in `sync_state` until it is stored or permanently skipped; entries without a
+    video id (neither in the flat data nor in their URL) are dropped.
+    :param processed_ids: set of ids of the videos already stored
+    :return: list of video URLs that still need a full metadata fetch
+    """
+    retry_ids = set() if full_sync else sync_state.pending_ids - processed_ids
+    past_high_water = False
+    video_urls = []
+    for entry in entries:
+        video_id = entry.get("id") or extract_video_id(entry.get("url"))
+        if not video_id:
+            print(f"⚠️ Skipping listing entry without a video id: {entry.get('url', entry.get('title', 'N/A'))}")
             continue
-        if "tsla" not in video_title and "tesla" not in video_title:
-            print(f"⏭️ Skipping unrelated video: '{metadata.get('title', 'N/A')}'")
+        upload_date = entry.get("upload_date")
+
+        if not full_sync and not past_high_water and sync_state.is_below_high_water(video_id, upload_date):
+            past_high_water = True
+            print(f"⏹️ Reached last synced video '{entry.get('title', video_id)}'. Older uploads are skipped"
+                  + (f", except {len(retry_ids)} unfinished videos." if retry_ids else "."))
+        if past_high_water:
+            if not retry_ids:
+                break
+            if video_id not in retry_ids:
+                continue
+            retry_ids.discard(video_id)
+        if video_id in processed_ids:
             continue
-        
-        # Get video transcript
-        transcript = get_transcript(video_id)
-        if not transcript:
+        if not full_sync and video_id in sync_state.skipped_ids:
             continue
-        
-        # Summarize the transcript
-        summarized_text = summarize_transcript(transcript)
-        
-        # Analyze the transcript for financial insights
-        structured_insights = analyze_transcript(summarized_text)
-        if structured_insights is None:
+        if entry.get("title") and check_title(entry["title"]):
+            sync_state.mark_skipped(video_id)
             continue
-        
-        # Store video details and insights in MongoDB
-        video_data = {
-            "Video Title": metadata.get("title", "N/A"),
-            "Upload Date": upload_date.strftime("%d/%m/%Y"),
-            "Video URL": metadata.get("webpage_url", "N/A"),
-            "Financial Insights": structured_insights
-        }
-        collection.insert_one(video_data)
-        print(f"✅ Stored: '{metadata.get('title', 'N/A')}'")
+        if upload_date:
+            date = format_date(upload_date)
+            if not date or not (START_DATE <= date <= END_DATE):
+                sync_state.mark_skipped(video_id)
+                continue
+
+        sync_state.mark_pending(video_id)
+        video_urls.append(entry["url"])
+    return video_urls
+
+def check_video(metadata, processed_ids):
+    """
+    Applies the date range, duplicate and topic filters to a video.
+    :param processed_ids: set of ids of the videos already stored
+    :return: datetime upload date if the video should be processed, otherwise None
+    """
+    upload_date = format_date(metadata.get("upload_date", "N/A"))
+
+    # Skip videos outside the date range
+    if not upload_date or not (START_DATE <= upload_date <= END_DATE):
+        print(f"⏭️ Skipping '{metadata.get('title', 'N/A')}' (Out of Date Range)")
+        return None
+
+    # Skip already processed videos
+    if metadata.get("id") in processed_ids:
+        print(f"⚠️ Already processed: '{metadata.get('title', 'N/A')}'. Skipping...")
+        return None
+
+    # Skip Nvidia-related videos, process only Tesla-related videos
+    skip_reason = check_title(metadata.get("title", ""))
+    if skip_reason:
+        print(f"⏭️ Skipping {skip_reason}: '{metadata.get('title', 'N/A')}'")
+        return None
+
+    return upload_date
+
+def build_video_record(metadata, upload_date, structured_insights, summarizer):
+    """Builds the MongoDB document for a processed video."""
+    return {
+        "Video ID": metadata.get("id"),
+        "Video Title": metadata.get("title", "N/A"),
+        "Upload Date": upload_date,  # Stored as a datetime so MongoDB can range-filter it
+        "Video URL": metadata.get("webpage_url", "N/A"),
+        "Stock Name": STOCK_NAME,
+        "Summarizer": summarizer,  # Which summarizer produced the LLM prompt input
+        "Financial Insights": structured_insights
+    }
+
+def store_video(video_data, metadata, context):
+    """Queues video details and insights for the next batched MongoDB write."""
+    context.store(video_data, metadata)
+    print(f"✅ Stored: '{video_data['Video Title']}'")
+
+def get_new_video_urls(channel_url, context, full_sync=False):
+    """Lists the channel and keeps only the entries that are worth a metadata fetch."""
+    with context.metrics.stage("list") as sample:
+        entries = context.list_entries(channel_url)
+        sample.items = len(entries)
+    video_urls = prefilter_entries(entries, context.sync_state, context.processed_ids, full_sync=full_sync)
+    print(f"📦 {len(video_urls)} of {len(entries)} videos left after pre-filtering.")
+    return video_urls
+
+class PipelineContext:
+    """Settings and shared resources (sync state, caches) of one channel run."""
+
+    def __init__(self, channel_url, state_file=SYNC_STATE_FILE, summarizer=DEFAULT_SUMMARIZER, chunked=False,
+                 summary_cache_file=SUMMARY_CACHE_FILE, llm_cache_file=LLM_CACHE_FILE, refresh_analysis=False,
+                 structured_output=False, flush_size=DEFAULT_FLUSH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 transcript_dir=TRANSCRIPT_STORE_DIR, offline=False, index_dir=RETRIEVAL_INDEX_DIR,
+                 metrics_port=None, metrics_file=None, metrics_interval=DEFAULT_SNAPSHOT_INTERVAL):
+        self.summarizer = summarizer
+        self.chunked = chunked
+        self.refresh_analysis = refresh_analysis  # Ignore cached LLM completions
+        self.structured_output = structured_output  # Schema-constrained, streamed LLM answers
+        self.offline = offline  # Read videos and transcripts from the local store only
+        self.transcript_store = TranscriptStore(transcript_dir)
+        self.sync_state = ChannelSyncState(channel_url, state_file)
+        self.summary_cache = SummaryCache(summary_cache_file)
+        self.llm_cache = LLMCache(llm_cache_file) if llm_cache_file else None
+        self.retrieval_index = RetrievalIndex(index_dir) if index_dir else None
+        self._synced_ids = []  # Indexed for retrieval once the run is done
+
+        # Per-stage timings and volumes, optionally scraped or snapshotted while the run is going
+        self.metrics = PipelineMetrics()
+        self.metrics_server = start_metrics_server(self.metrics, metrics_port) if metrics_port is not None else None
+        self.snapshots = SnapshotWriter(self.metrics, metrics_file, metrics_interval) if metrics_file else None
+        if self.metrics_server is not None:
+            host, port = self.metrics_server.server_address[:2]
+            print(f"📈 Serving pipeline metrics on http://{host}:{port}/metrics")
+
+        # One query for every stored video id instead of a lookup per video
+        collection = get_collection()
+        self.processed_ids = load_processed_ids(collection) | self.sync_state.processed_ids
+        self.writer = BulkVideoWriter(collection, flush_size, flush_interval, on_flush=self._mark_synced,
+                                      metrics=self.metrics)
+        self._upload_dates = {}  # Video id -> "YYYYMMDD", for the sync state once the write is done
+        self._upload_dates_lock = threading.Lock()
+
+    def list_entries(self, channel_url):
+        """Lists the channel's videos, from YouTube or (offline) from the transcript store."""
+        if self.offline:
+            return self.transcript_store.list_entries()
+        return get_channel_entries(channel_url)
+
+    def get_metadata(self, video_url):
+        """Returns the metadata of a video and keeps a copy in the store for offline runs."""
+        if self.offline:
+            return self.transcript_store.load_metadata(extract_video_id(video_url) or video_url) or {}
+        metadata = get_video_metadata(video_url)
+        self.transcript_store.save_metadata(metadata)
+        return metadata
+
+    def fetch_metadata(self, video_url):
+        """
+        Fetches the metadata of a video and applies the date, duplicate and topic filters.
+        :return: (metadata, datetime upload date or None if the video is skipped)
+        """
+        with self.metrics.stage("metadata") as sample:
+            metadata = self.get_metadata(video_url)
+            upload_date = check_video(metadata, self.processed_ids)
+            if upload_date is None:
+                sample.skip()
+                self.sync_state.mark_skipped(metadata.get("id"))
+        return metadata, upload_date
+
+    def get_transcript(self, video_id):
+        with self.metrics.stage("transcript") as sample:
+            transcript = get_transcript(video_id, self.transcript_store, self.offline, sample)
+            if not transcript and sample.outcome == "ok":
+                sample.skip()
+            sample.add_output(transcript)
+        return transcript
+
+    def summarize(self, transcripts, batch_size=None, max_batch_tokens=None):
+        """Summarizes a batch of transcripts with the run's summarizer and cache."""
+        with self.metrics.stage("summarize", items=len(transcripts)) as sample:
+            summaries = summarize_batch(transcripts, self.summarizer, self.summary_cache, batch_size=batch_size,
+                                        max_batch_tokens=max_batch_tokens, chunked=self.chunked)
+            for transcript, summary in zip(transcripts, summaries):
+                sample.add_input(transcript)
+                sample.add_output(summary)
+        return summaries
+
+    def analyze(self, summary):
+        """Extracts the financial insights of a summary with the LLM; None if that failed."""
+        with self.metrics.stage("llm") as sample:
+            sample.add_input(summary)
+            insights = analyze_transcript(summary, self.llm_cache, self.refresh_analysis, self.structured_output)
+            if insights is None:
+                sample.error()
+            else:
+                sample.add_output(json.dumps(insights))
+        return insights
+
+    def store(self, video_data, metadata):
+        """Buffers a video document for the bulk writer."""
+        with self._upload_dates_lock:
+            self._upload_dates[video_data["Video ID"]] = metadata.get("upload_date")
+        self.writer.add(video_data)
+
+    def _mark_synced(self, documents):
+        """Advances the sync state only for videos that reached MongoDB."""
+        with self._upload_dates_lock:
+            for document in documents:
+                video_id = document["Video ID"]
+                self.sync_state.mark_processed(video_id, self._upload_dates.pop(video_id, None))
+                self._synced_ids.append(video_id)
+
+    def _update_retrieval_index(self):
+        # One new index part per run, covering the videos that reached MongoDB
+        with self.metrics.stage("index", items=len(self._synced_ids)):
+            self.retrieval_index.add_videos(self.transcript_store, self._synced_ids)
+
+    def _close_llm_cache(self):
+        stats = self.llm_cache.stats()
+        print(f"🗃️ LLM cache: {stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['evictions']} evicted, {stats['entries']} entries")
+        self.llm_cache.close()
+
+    def close(self):
+        """Flushes the writer and releases every resource, even if an earlier teardown step fails."""
+        # Callbacks run last-in first-out, so they are registered in reverse teardown order
+        with contextlib.ExitStack() as stack:
+            stack.callback(lambda: print(self.metrics.format_summary()))
+            if self.metrics_server is not None:
+                stack.callback(self.metrics_server.shutdown)
+            if self.snapshots is not None:
+                stack.callback(self.snapshots.close)
+            if self.llm_cache is not None:
+                stack.callback(self._close_llm_cache)
+            stack.callback(self.summary_cache.close)
+            if self.retrieval_index is not None:
+                stack.callback(self._update_retrieval_index)
+            stack.callback(self.sync_state.save)
+            self.writer.close()
+
+def process_channel_videos(channel_url, full_sync=False, **options):
+    """
+    Processes all new videos from a given YouTube channel.
+    :param options: PipelineContext settings (summarizer, caches, sync state file...)
+    """
+    context = PipelineContext(channel_url, **options)
+    try:
+        for video_url in get_new_video_urls(channel_url, context, full_sync):
+            process_video(video_url, context)
+    finally:
+        context.close()
+
+def process_video(video_url, context):
+    """Runs the full fetch, summarize, analyze and store sequence for one video."""
+    metadata, upload_date = context.fetch_metadata(video_url)
+    if upload_date is None:
+        return
+
+    # Get video transcript
+    transcript = context.get_transcript(metadata.get("id", "N/A"))
+    if not transcript:
+        return
+
+    # Summarize the transcript (the only summarization pass before the LLM prompt)
+    summarized_text = context.summarize([transcript])[0]
+
+    # Analyze the transcript for financial insights
+    structured_insights = context.analyze(summarized_text)
+    if structured_insights is None:
+        return
+
+    # Store video details and insights in MongoDB
+    store_video(build_video_record(metadata, upload_date, structured_insights, context.summarizer),
+                metadata, context)
+
+def process_channel_videos_staged(channel_url, full_sync=False, metadata_workers=4, transcript_workers=4,
+                                  summarize_workers=1, llm_workers=2, queue_size=8,
+                                  summary_batch_size=8, summary_batch_tokens=None, **options):
+    """
+    Processes all videos from a channel as a concurrent staged pipeline.
+
+    Network-bound stages (yt-dlp metadata, transcripts, LM Studio) run in their own thread
+    pools, model inference runs in a separate stage on micro-batches of transcripts, and
+    bounded queues between the stages keep a slow stage from being flooded by the faster ones.
+    :param options: PipelineContext settings (summarizer, caches, sync state file...)
+    """
+    context = PipelineContext(channel_url, **options)
+    try:
+        video_urls = get_new_video_urls(channel_url, context, full_sync)
+        if not video_urls:
+            print("✅ No new videos to process.")
+            return
+        pipeline_stats = run_staged(video_urls, context, metadata_workers, transcript_workers, summarize_workers,
+                                    llm_workers, queue_size, summary_batch_size, summary_batch_tokens)
+    finally:
+        context.close()
+
+    for stats in pipeline_stats:
+        print(f"📊 {stats['stage']}: {stats['processed']} ok, {stats['dropped']} skipped, "
+              f"{stats['errors']} failed ({stats['busy_seconds']}s busy, {stats['workers']} workers)")
+
+def run_staged(video_urls, context, metadata_workers, transcript_workers, summarize_workers, llm_workers,
+               queue_size, summary_batch_size, summary_batch_tokens):
+    """Builds the stages of the concurrent pipeline and feeds `video_urls` through them."""
+    configure_client(max_in_flight=llm_workers)
+
+    def fetch_metadata(video_url):
+        metadata, upload_date = context.fetch_metadata(video_url)
+        if upload_date is None:
+            return None
+        return {"metadata": metadata, "upload_date": upload_date}
+
+    def fetch_transcript(job):
+        job["transcript"] = context.get_transcript(job["metadata"].get("id", "N/A"))
+        return job if job["transcript"] else None
+
+    def summarize(jobs):
+        summaries = context.summarize([job["transcript"] for job in jobs], batch_size=summary_batch_size,
+                                      max_batch_tokens=summary_batch_tokens)
+        for job, summary in zip(jobs, summaries):
+            job["summary"] = summary
+        return jobs
+
+    def analyze(job):
+        job["insights"] = context.analyze(job["summary"])
+        return job if job["insights"] is not None else None
+
+    def store(job):
+        store_video(build_video_record(job["metadata"], job["upload_date"], job["insights"], context.summarizer),
+                    job["metadata"], context)
+        return job
+
+    stages = [
+        Stage("metadata", fetch_metadata, workers=metadata_workers, queue_size=queue_size),
+        Stage("transcript", fetch_transcript, workers=transcript_workers, queue_size=queue_size),
+        Stage("summarize", summarize, workers=summarize_workers, queue_size=queue_size,
+              batch_size=summary_batch_size),
+        Stage("llm", analyze, workers=llm_workers, queue_size=queue_size),
+        Stage("store", store, workers=1, queue_size=queue_size),
+    ]
+    return run_pipeline(video_urls, stages)
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract financial insights from a YouTube channel's videos.")
+    parser.add_argument("--channel", default="https://www.youtube.com/@theteslaguy3247", help="YouTube channel URL")
+    parser.add_argument("--mode", choices=["sequential", "staged"], default="sequential",
+                        help="Process videos one at a time or as a concurrent staged pipeline")
+    parser.add_argument("--metadata-workers", type=int, default=4, help="yt-dlp metadata threads (staged mode)")
+    parser.add_argument("--transcript-workers", type=int, default=4, help="Transcript fetch threads (staged mode)")
+    parser.add_argument("--summarize-workers", type=int, default=1, help="Summarization model threads (staged mode)")
+    parser.add_argument("--summary-batch-size", type=int, default=8,
+                        help="Transcripts per summarization generate call (staged mode)")
+    parser.add_argument("--summary-batch-tokens", type=int, default=None,
+                        help="Padded input tokens per summarization generate call (staged mode)")
+    parser.add_argument("--llm-workers", type=int, default=2, help="LM Studio request threads (staged mode)")
+    parser.add_argument("--queue-size", type=int, default=8, help="Bounded queue size between stages (staged mode)")
+    parser.add_argument("--summarizer", choices=SUMMARIZERS, default=DEFAULT_SUMMARIZER,
+                        help="Summarizer that produces the LLM prompt input ('none' sends the raw transcript)")
+    parser.add_argument("--chunked", action="store_true",
+                        help="Map-reduce long transcripts over overlapping token windows instead of truncating them")
+    parser.add_argument("--summary-cache", default=SUMMARY_CACHE_FILE, help="SQLite summary cache file")
+    parser.add_argument("--llm-cache", default=LLM_CACHE_FILE, help="SQLite LLM completion cache file")
+    parser.add_argument("--no-llm-cache", action="store_true", help="Disable the LLM completion cache")
+    parser.add_argument("--refresh-analysis", action="store_true",
+                        help="Ignore cached LLM completions and force fresh analyses")
+    parser.add_argument("--structured-output", action="store_true",
+                        help="Request schema-constrained JSON from LM Studio and stop streaming once it is complete")
+    parser.add_argument("--flush-size", type=int, default=DEFAULT_FLUSH_SIZE,
+                        help="Videos buffered before a bulk MongoDB write")
+    parser.add_argument("--flush-interval", type=float, default=DEFAULT_FLUSH_INTERVAL,
+                        help="Seconds a buffered video may wait before it is written to MongoDB")
+    parser.add_argument("--transcript-dir", default=TRANSCRIPT_STORE_DIR,
+                        help="Local transcript store directory")
+    parser.add_argument("--offline", action="store_true",
+                        help="Run purely from the local transcript store, without yt-dlp or the transcript API")
+    parser.add_argument("--index-dir", default=RETRIEVAL_INDEX_DIR, help="Transcript retrieval index directory")
+    parser.add_argument("--no-index", action="store_true", help="Don't add processed videos to the retrieval index")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Serve Prometheus metrics of the run on this port (/metrics, /metrics.json)")
+    parser.add_argument("--metrics-file", default=None, help="JSON file rewritten with the run's metrics")
+    parser.add_argument("--metrics-interval", type=float, default=DEFAULT_SNAPSHOT_INTERVAL,
+                        help="Seconds between metrics snapshots written to --metrics-file")
+    parser.add_argument("--state-file", default=SYNC_STATE_FILE, help="Per-channel sync state (high-water mark) file")
+    parser.add_argument("--full-sync", action="store_true", help="Ignore the high-water mark and scan the whole channel")
+    args = parser.parse_args()
+
+    options = {
+        "state_file": args.state_file,
+        "summarizer": args.summarizer,
+        "chunked": args.chunked,
+        "summary_cache_file": args.summary_cache,
+        "llm_cache_file": None if args.no_llm_cache else args.llm_cache,
+        "refresh_analysis": args.refresh_analysis,
+        "structured_output": args.structured_output,
+        "flush_size": args.flush_size,
+        "flush_interval": args.flush_interval,
+        "transcript_dir": args.transcript_dir,
+        "offline": args.offline,
+        "index_dir": None if args.no_index else args.index_dir,
+        "metrics_port": args.metrics_port,
+        "metrics_file": args.metrics_file,
+        "metrics_interval": args.metrics_interval,
+    }
+    if args.mode == "staged":
+        process_channel_videos_staged(
+            args.channel,
+            full_sync=args.full_sync,
+            metadata_workers=args.metadata_workers,
+            transcript_workers=args.transcript_workers,
+            summarize_workers=args.summarize_workers,
+            llm_workers=args.llm_workers,
+            queue_size=args.queue_size,
+            summary_batch_size=args.summary_batch_size,
+            summary_batch_tokens=args.summary_batch_tokens,
+            **options
+        )
+    else:
+        process_channel_videos(args.channel, full_sync=args.full_sync, **options)
 
 if __name__ == "__main__":
     # Process all videos from the specified YouTube channel
-    channel_url = "https://www.youtube.com/@theteslaguy3247"
-    process_channel_videos(channel_url)
+    main()
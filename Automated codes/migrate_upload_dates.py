@@ -0,0 +1,34 @@
+"""
+One-off migration: converts the string "Upload Date" values written by older versions of
+main.py ("%d/%m/%Y") into datetimes, sets the "Stock Name" those versions didn't store, and
+creates the query indexes.
+
+Usage:
+    python migrate_upload_dates.py [--mongo-uri mongodb://localhost:27017/] [--stock-name TSLA]
+"""
+
+import argparse
+
+from pymongo import MongoClient
+
+from video_store import backfill_stock_name, ensure_indexes, migrate_upload_dates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert string 'Upload Date' values to datetimes and backfill 'Stock Name'.")
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017/", help="MongoDB connection URI")
+    parser.add_argument("--stock-name", default="TSLA",
+                        help="Stock Name of documents stored without one (STOCK_NAME of the main.py that wrote them)")
+    args = parser.parse_args()
+
+    collection = MongoClient(args.mongo_uri)["youtube_data"]["videos"]
+    migrated, failed = migrate_upload_dates(collection)
+    backfilled = backfill_stock_name(collection, args.stock_name)
+    ensure_indexes(collection)
+    print(f"✅ Migrated {migrated} documents, set the Stock Name of {backfilled}.")
+    if failed:
+        print(f"⚠️ {failed} documents have an unparseable 'Upload Date' and were left unchanged.")
+
+
+if __name__ == "__main__":
+    main()
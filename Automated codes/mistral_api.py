@@ -1,51 +1,45 @@
 """
 This module provides functions for:
 1. Summarizing long financial transcripts using Google's LongT5 model.
-2. Sending the summarized transcript to a local LM Studio API endpoint (e.g., running Mistral or other chat models)
-   for structured financial analysis.
+2. Sending a transcript (summarized by the pipeline's summarization stage) to a local LM Studio
+   API endpoint (e.g., running Mistral or other chat models) for structured financial analysis.
 
 Main Functionalities:
 - `summarize_transcript(transcript)`: Uses a transformer model to reduce lengthy financial transcripts.
+- `summarize_batch(transcripts)`: Same as above for many transcripts, in length-bucketed batches.
 - `process_transcript_with_mistral(transcript, model, temperature)`: Extracts structured financial insights
   such as support/resistance levels, trade directions, and price zones using an LLM via API.
+
+Requests go through the pooled, retrying client in lm_client.py; set the `LM_STUDIO_API_URL`
+environment variable to point it at another LM Studio instance. Completions can be cached on
+disk (see llm_cache.py) so identical prompts are never sent twice.
+
+In structured mode the request carries a JSON schema as `response_format` and a `max_tokens`
+cap, and the answer is streamed into an incremental parser (see json_stream.py) that stops the
+generation as soon as the JSON object is complete and validates it against the schema.
 """
 
 import requests
 import json
 import re  # For extracting valid JSON if needed
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+from summarization import summarize_texts
+from lm_client import get_client
+from llm_cache import completion_key
+from json_stream import INSIGHTS_SCHEMA, parse_streamed_object, validate_insights
 
-# Load LongT5 model and tokenizer for summarization
-TOKENIZER = AutoTokenizer.from_pretrained("google/long-t5-tglobal-base")
-MODEL = AutoModelForSeq2SeqLM.from_pretrained("google/long-t5-tglobal-base")
+# Bump whenever PROMPT_TEMPLATE changes, so cached completions of the old prompt are not reused
+PROMPT_TEMPLATE_VERSION = 1
 
-# LM Studio API URL (Ensure LM Studio is running on the specified IP and port)
-LM_STUDIO_API_URL = "http://192.168.0.106:1234/v1/chat/completions"
+# Upper bound on generated tokens in structured mode; the insights object is far shorter
+STRUCTURED_MAX_TOKENS = 512
 
-def summarize_transcript(transcript):
-    """
-    Summarizes long transcripts using the LongT5 model.
-    :param transcript: str, raw financial transcript
-    :return: str, summarized transcript
-    """
-    inputs = TOKENIZER("summarize: " + transcript, return_tensors="pt", max_length=4096, truncation=True)
-    summary_ids = MODEL.generate(**inputs, max_length=1024, min_length=100, length_penalty=2.0)
-    return TOKENIZER.decode(summary_ids[0], skip_special_tokens=True)
+STRUCTURED_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "financial_insights", "strict": True, "schema": INSIGHTS_SCHEMA},
+}
 
-def process_transcript_with_mistral(transcript, model="mistral", temperature=0.2):
-    """
-    Sends a financial transcript to Mistral (LM Studio API) for structured insights.
-    :param transcript: str, raw financial transcript
-    :param model: str, model name (default: "mistral")
-    :param temperature: float, model response randomness (default: 0.2)
-    :return: dict or None, structured financial insights
-    """
-    
-    # Summarize transcript before sending to Mistral
-    transcript = summarize_transcript(transcript)
-    
-    # Structured prompt for financial insights extraction
-    prompt = f"""
+# Structured prompt for financial insights extraction
+PROMPT_TEMPLATE = """
     Analyze the following transcript and extract financial insights in JSON format:
     {transcript}
 
@@ -59,7 +53,84 @@ def process_transcript_with_mistral(transcript, model="mistral", temperature=0.2
         "Sell_Area": [<List of tuples (float, float), sorted ascending>]
     }}
     """
-    
+
+def summarize_batch(transcripts, batch_size=None, max_batch_tokens=None, cache=None):
+    """
+    Summarizes many transcripts using the LongT5 model in length-bucketed batches.
+    :param transcripts: list of str, raw financial transcripts
+    :param batch_size: int, maximum transcripts per generate call
+    :param max_batch_tokens: int, maximum padded input tokens per generate call
+    :param cache: SummaryCache or None
+    :return: list of str, summaries in input order
+    """
+    return summarize_texts(transcripts, "longt5", cache=cache,
+                           batch_size=batch_size, max_batch_tokens=max_batch_tokens)
+
+def summarize_transcript(transcript):
+    """
+    Summarizes long transcripts using the LongT5 model.
+    :param transcript: str, raw financial transcript
+    :return: str, summarized transcript
+    """
+    return summarize_batch([transcript])[0]
+
+def parse_insights_json(raw_output):
+    """
+    Parses the model output as JSON, falling back to the outermost {...} block.
+    :raises ValueError: if no valid JSON object can be extracted
+    """
+    try:
+        return json.loads(raw_output)
+    except json.JSONDecodeError:
+        match = re.search(r"\{.*\}", raw_output, re.DOTALL)  # Extract JSON block
+        if match:
+            return json.loads(match.group(0))
+        raise ValueError("Failed to extract valid JSON from response.")
+
+def request_structured_insights(client, payload, max_tokens=STRUCTURED_MAX_TOKENS):
+    """
+    Requests schema-constrained JSON and streams the answer until the top-level object closes.
+    :return: (str raw JSON object text, dict validated insights)
+    :raises ValueError: if the streamed answer is incomplete or violates the schema
+    """
+    payload = dict(payload, max_tokens=max_tokens, response_format=STRUCTURED_RESPONSE_FORMAT)
+    stream = client.stream_chat(payload)
+    try:
+        structured_output = parse_streamed_object(stream)
+    finally:
+        stream.close()  # Stops the generation once the object is complete
+    return json.dumps(structured_output), validate_insights(structured_output)
+
+def process_transcript_with_mistral(transcript, model="mistral", temperature=0.2, client=None,
+                                    cache=None, refresh=False, structured=False, max_tokens=STRUCTURED_MAX_TOKENS):
+    """
+    Sends a financial transcript to Mistral (LM Studio API) for structured insights.
+    The transcript is used as-is; summarize it beforehand (see summarization.py) if needed.
+    :param transcript: str, financial transcript or its summary
+    :param model: str, model name (default: "mistral")
+    :param temperature: float, model response randomness (default: 0.2)
+    :param client: LMStudioClient or None to use the shared client
+    :param cache: LLMCache or None, completions cache keyed by prompt, model, temperature, prompt version
+        and (in structured mode) response format and max_tokens
+    :param refresh: bool, ignore cached completions and force a fresh analysis (the result is still cached)
+    :param structured: bool, request schema-constrained JSON and stream it with early stopping
+    :param max_tokens: int, generation cap in structured mode
+    :return: dict or None, structured financial insights
+    """
+    prompt = PROMPT_TEMPLATE.format(transcript=transcript)
+
+    # Reuse a cached completion of the exact same request, unless a fresh analysis is forced
+    cache_key = completion_key(prompt, model, temperature, PROMPT_TEMPLATE_VERSION,
+                               STRUCTURED_RESPONSE_FORMAT if structured else None, max_tokens if structured else None)
+    if cache is not None and not refresh:
+        cached_output = cache.get(cache_key)
+        if cached_output is not None:
+            try:
+                cached_insights = parse_insights_json(cached_output)
+                return validate_insights(cached_insights) if structured else cached_insights
+            except (json.JSONDecodeError, ValueError):
+                pass  # Unusable entry, ask the model again
+
     # Prepare API request payload
     payload = {
         "model": model,  # Allow flexibility in model selection
@@ -67,12 +138,16 @@ def process_transcript_with_mistral(transcript, model="mistral", temperature=0.2
         "temperature": temperature
     }
     
+    response_data = None
     try:
-        # Send request to LM Studio API
-        response = requests.post(LM_STUDIO_API_URL, json=payload)
-        response.raise_for_status()  # Raise error for HTTP issues
-        
-        response_data = response.json()  # Parse response JSON
+        if structured:
+            raw_output, structured_output = request_structured_insights(client or get_client(), payload, max_tokens)
+            if cache is not None:
+                cache.put(cache_key, model, raw_output)
+            return structured_output
+
+        # Send request to LM Studio API (pooled connection, retried on timeouts and 5xx)
+        response_data = (client or get_client()).chat(payload)
 
         # Validate response structure
         if "choices" not in response_data or not response_data["choices"]:
@@ -81,14 +156,11 @@ def process_transcript_with_mistral(transcript, model="mistral", temperature=0.2
         raw_output = response_data["choices"][0]["message"]["content"]
         
         # Attempt JSON parsing, fallback to regex extraction if needed
-        try:
-            structured_output = json.loads(raw_output)
-        except json.JSONDecodeError:
-            match = re.search(r"\{.*\}", raw_output, re.DOTALL)  # Extract JSON block
-            if match:
-                structured_output = json.loads(match.group(0))
-            else:
-                raise ValueError("Failed to extract valid JSON from response.")
+        structured_output = parse_insights_json(raw_output)
+
+        # Only cache completions that parsed, so a bad answer is retried on the next run
+        if cache is not None:
+            cache.put(cache_key, model, raw_output)
         
         return structured_output  # Return structured data
     
@@ -0,0 +1,60 @@
+"""
+Lazy, process-wide registry of Hugging Face seq2seq models.
+
+Models are loaded on first use and shared by every module that asks for the same
+model name, so importing the pipeline modules never pays for `transformers` or model
+weights. Loaded models can be unloaded again to give their memory back.
+"""
+
+import gc
+import sys
+import threading
+
+_models = {}
+_lock = threading.Lock()
+
+
+def get_model(model_name):
+    """
+    Returns the (tokenizer, model) pair for `model_name`, loading it on first use.
+    :param model_name: str, Hugging Face model id (e.g. "t5-small")
+    """
+    with _lock:
+        if model_name not in _models:
+            # Imported here so that importing the pipeline doesn't load transformers/torch
+            from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+            print(f"⏳ Loading model '{model_name}'...")
+            _models[model_name] = (
+                AutoTokenizer.from_pretrained(model_name),
+                AutoModelForSeq2SeqLM.from_pretrained(model_name),
+            )
+        return _models[model_name]
+
+
+def is_loaded(model_name):
+    return model_name in _models
+
+
+def loaded_models():
+    """Returns the names of the models currently held in memory."""
+    with _lock:
+        return list(_models)
+
+
+def unload_model(model_name=None):
+    """
+    Drops a model (or every model when `model_name` is None) from the registry and frees its memory.
+    :return: list of str, names of the unloaded models
+    """
+    with _lock:
+        names = list(_models) if model_name is None else [name for name in [model_name] if name in _models]
+        for name in names:
+            del _models[name]
+
+    if names:
+        gc.collect()
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    return names
@@ -0,0 +1,280 @@
+"""
+Per-stage instrumentation of the video pipeline in main.py.
+
+Every stage call (channel listing, yt-dlp metadata, transcript, summarization, LM Studio,
+MongoDB write, retrieval indexing) records its wall time, outcome (ok, skip or error),
+items handled and the bytes/tokens that went in and out. Tokens are counted as
+whitespace-separated words, which is cheap and close enough to compare runs.
+
+Recording costs one lock acquisition and a few additions per call. Latency percentiles
+come from a bounded reservoir sample per stage, so memory stays flat on long runs.
+
+The metrics can be exposed while the pipeline runs:
+- `start_metrics_server(metrics, port)`: Prometheus text format on `/metrics`, JSON on `/metrics.json`
+- `SnapshotWriter(metrics, path, interval)`: rewrites a JSON snapshot file every `interval` seconds
+`format_summary()` gives the end-of-run table with p50/p95/p99 latencies.
+"""
+
+import contextlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+OUTCOMES = ("ok", "skip", "error")
+MAX_SAMPLES = 1024  # Latency samples kept per stage
+QUANTILES = (0.5, 0.95, 0.99)
+DEFAULT_SNAPSHOT_INTERVAL = 30.0  # Seconds
+
+
+def text_size(text):
+    """Returns (UTF-8 bytes, whitespace tokens) of a string."""
+    if not text:
+        return 0, 0
+    return len(text.encode("utf-8")), len(text.split())
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list, or None if it is empty."""
+    if not sorted_values:
+        return None
+    rank = min(max(math.ceil(fraction * len(sorted_values)), 1), len(sorted_values))
+    return sorted_values[rank - 1]
+
+
+class StageSample:
+    """One stage call in progress; the code being measured fills in its outcome and sizes."""
+
+    __slots__ = ("outcome", "items", "bytes_in", "bytes_out", "tokens_in", "tokens_out")
+
+    def __init__(self, items=1):
+        self.outcome = "ok"
+        self.items = items
+        self.bytes_in = self.bytes_out = self.tokens_in = self.tokens_out = 0
+
+    def skip(self):
+        self.outcome = "skip"
+
+    def error(self):
+        self.outcome = "error"
+
+    def add_input(self, text):
+        size, tokens = text_size(text)
+        self.bytes_in += size
+        self.tokens_in += tokens
+
+    def add_output(self, text):
+        size, tokens = text_size(text)
+        self.bytes_out += size
+        self.tokens_out += tokens
+
+
+class _StageStats:
+    def __init__(self):
+        self.items = dict.fromkeys(OUTCOMES, 0)
+        self.calls = 0
+        self.seconds = 0.0
+        self.bytes_in = self.bytes_out = self.tokens_in = self.tokens_out = 0
+        self.samples = []
+
+
+class PipelineMetrics:
+    """Thread-safe per-stage counters and latency samples of one pipeline run."""
+
+    def __init__(self, max_samples=MAX_SAMPLES):
+        self.max_samples = max_samples
+        self.started = time.time()
+        self._stages = {}
+        self._lock = threading.Lock()
+        self._random = random.Random()
+
+    def record(self, stage, seconds, outcome="ok", items=1, bytes_in=0, bytes_out=0, tokens_in=0, tokens_out=0):
+        """Records one call of `stage` that took `seconds` and handled `items` items."""
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = _StageStats()
+            stats.items[outcome] += items
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.bytes_in += bytes_in
+            stats.bytes_out += bytes_out
+            stats.tokens_in += tokens_in
+            stats.tokens_out += tokens_out
+            # Reservoir sampling: every call has the same chance of being among the kept samples
+            if len(stats.samples) < self.max_samples:
+                stats.samples.append(seconds)
+            else:
+                slot = self._random.randrange(stats.calls)
+                if slot < self.max_samples:
+                    stats.samples[slot] = seconds
+
+    @contextlib.contextmanager
+    def stage(self, name, items=1):
+        """
+        Times the enclosed block as one call of stage `name`. An exception is recorded as
+        an error and re-raised.
+        :return: StageSample to mark the call skipped/failed and to add the bytes in and out
+        """
+        sample = StageSample(items)
+        started = time.perf_counter()
+        try:
+            yield sample
+        except BaseException:
+            sample.outcome = "error"
+            raise
+        finally:
+            self.record(name, time.perf_counter() - started, sample.outcome, sample.items,
+                        sample.bytes_in, sample.bytes_out, sample.tokens_in, sample.tokens_out)
+
+    def snapshot(self):
+        """Returns the current metrics as a JSON-serializable dict."""
+        with self._lock:
+            stages = {name: (dict(stats.items), stats.calls, stats.seconds, stats.bytes_in, stats.bytes_out,
+                             stats.tokens_in, stats.tokens_out, sorted(stats.samples))
+                      for name, stats in self._stages.items()}
+
+        snapshot = {"started": self.started, "uptime_seconds": round(time.time() - self.started, 3), "stages": {}}
+        for name, (items, calls, seconds, bytes_in, bytes_out, tokens_in, tokens_out, samples) in stages.items():
+            snapshot["stages"][name] = {
+                "items": items,
+                "calls": calls,
+                "seconds": round(seconds, 6),
+                "bytes_in": bytes_in,
+                "bytes_out": bytes_out,
+                "tokens_in": tokens_in,
+                "tokens_out": tokens_out,
+                "latency_seconds": {f"p{int(q * 100)}": percentile(samples, q) for q in QUANTILES},
+            }
+        return snapshot
+
+    def prometheus(self):
+        """Returns the metrics in the Prometheus text exposition format."""
+        stages = self.snapshot()["stages"]
+        lines = [
+            "# HELP pipeline_stage_items_total Items handled by a pipeline stage, by outcome.",
+            "# TYPE pipeline_stage_items_total counter",
+        ]
+        for name, stats in stages.items():
+            lines.extend(f'pipeline_stage_items_total{{stage="{name}",outcome="{outcome}"}} {count}'
+                         for outcome, count in stats["items"].items())
+
+        lines += [
+            "# HELP pipeline_stage_seconds Wall time of a pipeline stage call.",
+            "# TYPE pipeline_stage_seconds summary",
+        ]
+        for name, stats in stages.items():
+            for q in QUANTILES:
+                value = stats["latency_seconds"][f"p{int(q * 100)}"]
+                lines.append(f'pipeline_stage_seconds{{stage="{name}",quantile="{q}"}} '
+                             f'{value if value is not None else "NaN"}')
+            lines.append(f'pipeline_stage_seconds_sum{{stage="{name}"}} {stats["seconds"]}')
+            lines.append(f'pipeline_stage_seconds_count{{stage="{name}"}} {stats["calls"]}')
+
+        for unit in ("bytes", "tokens"):
+            lines += [
+                f"# HELP pipeline_stage_{unit}_total {unit.capitalize()} read (in) and produced (out) by a stage.",
+                f"# TYPE pipeline_stage_{unit}_total counter",
+            ]
+            for name, stats in stages.items():
+                for direction in ("in", "out"):
+                    lines.append(f'pipeline_stage_{unit}_total{{stage="{name}",direction="{direction}"}} '
+                                 f'{stats[f"{unit}_{direction}"]}')
+
+        lines += [
+            "# HELP pipeline_run_start_time_seconds Unix time the pipeline run started.",
+            "# TYPE pipeline_run_start_time_seconds gauge",
+            f"pipeline_run_start_time_seconds {self.started}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def format_summary(self):
+        """Returns the end-of-run table: counts, p50/p95/p99 latency and volume per stage."""
+        stages = self.snapshot()["stages"]
+        if not stages:
+            return "📈 No pipeline stages ran."
+
+        def ms(value):
+            return f"{value * 1000:.1f}" if value is not None else "-"
+
+        lines = [f"📈 {'stage':<11}{'ok':>7}{'skip':>7}{'error':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+                 f"{'total s':>10}{'in MB':>9}{'out MB':>9}{'tokens in':>11}{'tokens out':>11}"]
+        for name, stats in stages.items():
+            latency = stats["latency_seconds"]
+            lines.append(
+                f"   {name:<11}{stats['items']['ok']:>7}{stats['items']['skip']:>7}{stats['items']['error']:>7}"
+                f"{ms(latency['p50']):>9}{ms(latency['p95']):>9}{ms(latency['p99']):>9}{stats['seconds']:>10.1f}"
+                f"{stats['bytes_in'] / 1e6:>9.2f}{stats['bytes_out'] / 1e6:>9.2f}"
+                f"{stats['tokens_in']:>11}{stats['tokens_out']:>11}"
+            )
+        return "\n".join(lines)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Serves `server.metrics` on /metrics (Prometheus) and /metrics.json."""
+
+    def log_message(self, format, *args):
+        pass  # Scrapes would flood the pipeline output
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path == "/metrics":
+            body, content_type = self.server.metrics.prometheus(), "text/plain; version=0.0.4; charset=utf-8"
+        elif path == "/metrics.json":
+            body, content_type = json.dumps(self.server.metrics.snapshot()), "application/json"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_metrics_server(metrics, port, host="127.0.0.1"):
+    """
+    Serves `metrics` from a background thread.
+    :param port: int, 0 picks a free port
+    :return: server; call `server.shutdown()` to stop it
+    """
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    server.metrics = metrics
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+class SnapshotWriter:
+    """Rewrites a JSON snapshot of the metrics every `interval` seconds, and once more on close."""
+
+    def __init__(self, metrics, path, interval=DEFAULT_SNAPSHOT_INTERVAL):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._write_periodically, name="metrics-snapshots", daemon=True)
+        self._thread.start()
+
+    def write(self):
+        # Written aside and renamed, so readers never see a partial file
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.metrics.snapshot(), f, indent=2)
+        os.replace(temp_path, self.path)
+
+    def _write_periodically(self):
+        while not self._closed.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                print(f"⚠️ Could not write metrics snapshot: {e}")
+
+    def close(self):
+        self._closed.set()
+        self._thread.join()
+        self.write()
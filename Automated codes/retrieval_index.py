@@ -0,0 +1,387 @@
+"""
+BM25 retrieval index over the transcripts in the local transcript store.
+
+Transcript segments are grouped into chunks of roughly CHUNK_SECONDS, and every chunk
+is a searchable document that remembers its video id and start time. The index is
+made of immutable on-disk parts, each holding:
+- `vocab.json`: term -> [offset, count] into the postings arrays
+- `postings_docs.npy` / `postings_tf.npy`: chunk ids and term frequencies, per term
+- `doc_lengths.npy`: token count of every chunk
+- `chunk_videos.npy` / `chunk_starts.npy`: video id and start time of every chunk
+- `chunk_text.bin` / `chunk_offsets.npy`: UTF-8 text of all chunks and where each starts
+
+Everything but the vocabulary is memory-mapped, and nothing is read before the first
+add, sync or search, so opening the index costs next to nothing whatever its size.
+`sync()` indexes the stored videos that aren't indexed yet as a new part, and
+`compact()` merges all parts back into one; readers in other processes pick up new
+parts with `reload()`. Parts replaced by a compaction are kept for
+RETIRED_PART_GRACE_SECONDS, so readers that haven't reloaded yet can still use them.
+
+The index lives in `retrieval_index/` at the repository root, next to the transcript
+store, unless the `RETRIEVAL_INDEX_DIR` environment variable points somewhere else.
+
+Usage:
+    python retrieval_index.py --sync
+    python retrieval_index.py "tesla support level" -k 5
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+import numpy as np
+
+from transcript_store import TranscriptStore, DEFAULT_LANGUAGE
+
+# Under the repository root, so main.py and the RAG app share the index whatever their working directory
+RETRIEVAL_INDEX_DIR = os.environ.get(
+    "RETRIEVAL_INDEX_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "retrieval_index"))
+CHUNK_SECONDS = 30.0
+MAX_PARTS = 16  # Parts are merged once there are more than this
+INDEX_FORMAT = 2  # Bumped whenever the part layout changes
+RETIRED_PART_GRACE_SECONDS = 3600.0  # How long parts replaced by a compaction are kept for open readers
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "if", "in", "into", "is", "it",
+    "of", "on", "or", "so", "that", "the", "this", "to", "was", "we", "with", "you", "i", "uh", "um",
+}
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+
+
+def tokenize(text):
+    """Lowercases and splits text into terms, keeping prices such as 245.50 in one piece."""
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def chunk_segments(segments, chunk_seconds=CHUNK_SECONDS):
+    """
+    Groups consecutive transcript segments into chunks of about `chunk_seconds`.
+    :return: list of (start seconds, text)
+    """
+    chunks = []
+    texts, chunk_start = [], None
+    for segment in segments:
+        if chunk_start is None:
+            chunk_start = segment["start"]
+        texts.append(segment["text"])
+        if segment["start"] + segment["duration"] - chunk_start >= chunk_seconds:
+            chunks.append((chunk_start, " ".join(texts)))
+            texts, chunk_start = [], None
+    if texts:
+        chunks.append((chunk_start, " ".join(texts)))
+    return chunks
+
+
+class _IndexPart:
+    """One immutable part of the index; everything but the vocabulary stays memory-mapped."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "vocab.json"), "r", encoding="utf-8") as f:
+            self.vocab = json.load(f)
+        self.docs = np.load(os.path.join(path, "postings_docs.npy"), mmap_mode="r")
+        self.tfs = np.load(os.path.join(path, "postings_tf.npy"), mmap_mode="r")
+        self.doc_lengths = np.load(os.path.join(path, "doc_lengths.npy"), mmap_mode="r")
+        self.video_ids = np.load(os.path.join(path, "chunk_videos.npy"), mmap_mode="r")
+        self.starts = np.load(os.path.join(path, "chunk_starts.npy"), mmap_mode="r")
+        self.text_offsets = np.load(os.path.join(path, "chunk_offsets.npy"), mmap_mode="r")
+        text_path = os.path.join(path, "chunk_text.bin")
+        # An empty file can't be mapped
+        self.text = np.memmap(text_path, dtype=np.uint8, mode="r") if os.path.getsize(text_path) else np.zeros(0, np.uint8)
+
+    @property
+    def chunk_count(self):
+        return len(self.doc_lengths)
+
+    def chunk(self, doc):
+        """Returns one chunk as {"video_id", "start", "text"}, read from the mapped files."""
+        start, end = int(self.text_offsets[doc]), int(self.text_offsets[doc + 1])
+        return {
+            "video_id": self.video_ids[doc].decode("utf-8"),
+            "start": float(self.starts[doc]),
+            "text": self.text[start:end].tobytes().decode("utf-8"),
+        }
+
+    def iter_chunks(self):
+        for doc in range(self.chunk_count):
+            yield self.chunk(doc)
+
+    def postings(self, term):
+        entry = self.vocab.get(term)
+        if entry is None:
+            return None, None
+        offset, count = entry
+        return self.docs[offset:offset + count], self.tfs[offset:offset + count]
+
+    @staticmethod
+    def write(path, chunks):
+        """
+        Builds a part from a non-empty list of chunk dicts ({"video_id", "start", "text"}).
+        """
+        postings = {}
+        doc_lengths = np.zeros(len(chunks), dtype=np.int32)
+        for doc_id, chunk in enumerate(chunks):
+            counts = {}
+            tokens = tokenize(chunk["text"])
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            doc_lengths[doc_id] = len(tokens)
+            for token, count in counts.items():
+                postings.setdefault(token, []).append((doc_id, count))
+
+        vocab, docs, tfs = {}, [], []
+        for term in sorted(postings):
+            vocab[term] = [len(docs), len(postings[term])]
+            for doc_id, count in postings[term]:
+                docs.append(doc_id)
+                tfs.append(count)
+
+        texts = [chunk["text"].encode("utf-8") for chunk in chunks]
+        text_offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in texts], out=text_offsets[1:])
+
+        tmp_path = path + ".tmp"
+        os.makedirs(tmp_path, exist_ok=True)
+        np.save(os.path.join(tmp_path, "postings_docs.npy"), np.asarray(docs, dtype=np.int32))
+        np.save(os.path.join(tmp_path, "postings_tf.npy"), np.asarray(tfs, dtype=np.float32))
+        np.save(os.path.join(tmp_path, "doc_lengths.npy"), doc_lengths)
+        np.save(os.path.join(tmp_path, "chunk_videos.npy"), np.array([chunk["video_id"].encode("utf-8") for chunk in chunks]))
+        np.save(os.path.join(tmp_path, "chunk_starts.npy"), np.asarray([chunk["start"] for chunk in chunks], dtype=np.float64))
+        np.save(os.path.join(tmp_path, "chunk_offsets.npy"), text_offsets)
+        with open(os.path.join(tmp_path, "chunk_text.bin"), "wb") as f:
+            f.write(b"".join(texts))
+        with open(os.path.join(tmp_path, "vocab.json"), "w", encoding="utf-8") as f:
+            json.dump(vocab, f)
+        os.replace(tmp_path, path)
+
+
+class RetrievalIndex:
+    """BM25 index over transcript chunks, made of memory-mapped parts and loaded on first use."""
+
+    def __init__(self, root=RETRIEVAL_INDEX_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._loaded_mtime = None
+        self.manifest = None  # Read by the first add, sync or search
+
+    def _manifest_path(self):
+        return os.path.join(self.root, "manifest.json")
+
+    def _manifest_mtime(self):
+        try:
+            return os.stat(self._manifest_path()).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self):
+        os.makedirs(self.root, exist_ok=True)
+        self._loaded_mtime = self._manifest_mtime()
+        manifest = {"format": INDEX_FORMAT, "parts": [], "indexed_videos": [], "next_part": 1, "retired": []}
+        if os.path.exists(self._manifest_path()):
+            with open(self._manifest_path(), "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored.get("format") == INDEX_FORMAT:
+                manifest = stored
+            else:
+                # Older part layout: start over, the old parts are purged like compacted ones
+                print(f"⚠️ Index in {self.root} has an old layout, run `retrieval_index.py --sync` to rebuild it.")
+                manifest["next_part"] = stored.get("next_part", 1)
+                manifest["retired"] = [[name, time.time()] for name in stored.get("parts", [])]
+        self.manifest = manifest
+        self.indexed_videos = set(manifest["indexed_videos"])
+        self.parts = [_IndexPart(os.path.join(self.root, name)) for name in manifest["parts"]]
+
+    def _ensure_loaded(self):
+        if self.manifest is None:
+            with self._lock:
+                if self.manifest is None:
+                    self._load()
+
+    def reload(self):
+        """Reloads the index if another process changed it since it was loaded."""
+        if self.manifest is None:
+            self._ensure_loaded()
+        elif self._manifest_mtime() != self._loaded_mtime:
+            with self._lock:
+                self._load()
+
+    def _save_manifest(self):
+        self.manifest["indexed_videos"] = sorted(self.indexed_videos)
+        tmp_path = self._manifest_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self._manifest_path())
+        self._loaded_mtime = self._manifest_mtime()
+
+    @property
+    def chunk_count(self):
+        self._ensure_loaded()
+        return sum(part.chunk_count for part in self.parts)
+
+    def _new_part(self, chunks):
+        name = f"part-{self.manifest['next_part']:05d}"
+        self.manifest["next_part"] += 1
+        _IndexPart.write(os.path.join(self.root, name), chunks)
+        return name
+
+    def add_videos(self, store, video_ids, language=DEFAULT_LANGUAGE):
+        """
+        Indexes the given stored videos as a new part.
+        :return: int, number of chunks added
+        """
+        if not video_ids:
+            return 0
+        self._ensure_loaded()
+        chunks = []
+        added = []
+        for video_id in video_ids:
+            if video_id in self.indexed_videos:
+                continue
+            for start, text in chunk_segments(store.iter_segments(video_id, language)):
+                chunks.append({"video_id": video_id, "start": start, "text": text})
+            added.append(video_id)
+        if not added:
+            return 0
+
+        with self._lock:
+            if chunks:
+                name = self._new_part(chunks)
+                self.manifest["parts"].append(name)
+                self.parts.append(_IndexPart(os.path.join(self.root, name)))
+            self.indexed_videos.update(added)
+            self._purge_retired()
+            self._save_manifest()
+            if len(self.parts) > MAX_PARTS:
+                self._compact()
+        return len(chunks)
+
+    def sync(self, store=None, language=DEFAULT_LANGUAGE):
+        """Indexes every video of the transcript store that isn't indexed yet."""
+        self._ensure_loaded()
+        store = store or TranscriptStore()
+        started = time.perf_counter()
+        new_ids = [video_id for video_id in store.video_ids(language) if video_id not in self.indexed_videos]
+        added = self.add_videos(store, new_ids, language)
+        if added:
+            print(f"🔎 Indexed {len(new_ids)} videos ({added} chunks) in {time.perf_counter() - started:.2f}s.")
+        return added
+
+    def compact(self):
+        """Merges all parts into a single one."""
+        self._ensure_loaded()
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        if len(self.parts) <= 1:
+            return
+        chunks = [chunk for part in self.parts for chunk in part.iter_chunks()]
+        # Readers in other processes may still have the old parts open until they reload,
+        # so they are only deleted by a later add or compaction, once the grace period is over
+        now = time.time()
+        self.manifest["retired"].extend([old_name, now] for old_name in self.manifest["parts"])
+        name = self._new_part(chunks)
+        self.manifest["parts"] = [name]
+        self._purge_retired(now)
+        self._save_manifest()
+        self.parts = [_IndexPart(os.path.join(self.root, name))]
+
+    def _purge_retired(self, now=None):
+        """Deletes the parts retired by a compaction more than RETIRED_PART_GRACE_SECONDS ago."""
+        now = now or time.time()
+        kept = []
+        for name, retired_at in self.manifest["retired"]:
+            if now - retired_at < RETIRED_PART_GRACE_SECONDS:
+                kept.append([name, retired_at])
+                continue
+            try:
+                shutil.rmtree(os.path.join(self.root, name))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"⚠️ Could not delete retired index part {name}, retrying later: {e}")
+                kept.append([name, retired_at])
+        self.manifest["retired"] = kept
+
+    def search(self, query, k=10):
+        """
+        Returns the top-k transcript chunks for a free-text query.
+        :return: list of dicts with video_id, start (seconds), url, score and text
+        """
+        self._ensure_loaded()
+        terms = list(dict.fromkeys(tokenize(query)))
+        parts = self.parts
+        total_docs = sum(part.chunk_count for part in parts)
+        if not terms or not total_docs:
+            return []
+
+        average_length = sum(float(np.sum(part.doc_lengths)) for part in parts) / total_docs
+        document_frequency = {
+            term: sum(part.vocab[term][1] for part in parts if term in part.vocab)
+            for term in terms
+        }
+
+        candidates = []
+        for part in parts:
+            scores = np.zeros(part.chunk_count, dtype=np.float32)
+            length_norm = BM25_K1 * (1 - BM25_B + BM25_B * np.asarray(part.doc_lengths) / average_length)
+            for term in terms:
+                docs, tfs = part.postings(term)
+                if docs is None:
+                    continue
+                df = document_frequency[term]
+                idf = np.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+                scores[docs] += idf * tfs * (BM25_K1 + 1) / (tfs + length_norm[docs])
+
+            matched = np.flatnonzero(scores)
+            if matched.size > k:
+                matched = matched[np.argpartition(scores[matched], -k)[-k:]]
+            candidates.extend((float(scores[doc]), part, int(doc)) for doc in matched)
+
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        results = []
+        for score, part, doc in candidates[:k]:
+            chunk = part.chunk(doc)
+            results.append({
+                "video_id": chunk["video_id"],
+                "start": chunk["start"],
+                "url": f"https://www.youtube.com/watch?v={chunk['video_id']}&t={int(chunk['start'])}s",
+                "score": round(score, 4),
+                "text": chunk["text"],
+            })
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the transcript retrieval index.")
+    parser.add_argument("query", nargs="?", help="Free-text query")
+    parser.add_argument("-k", type=int, default=10, help="Number of chunks to return")
+    parser.add_argument("--index-dir", default=RETRIEVAL_INDEX_DIR)
+    parser.add_argument("--transcript-dir", default=None, help="Transcript store to index (default: TRANSCRIPT_STORE_DIR)")
+    parser.add_argument("--sync", action="store_true", help="Index the stored transcripts that aren't indexed yet")
+    parser.add_argument("--compact", action="store_true", help="Merge all index parts into one")
+    args = parser.parse_args()
+
+    index = RetrievalIndex(args.index_dir)
+    if args.sync:
+        index.sync(TranscriptStore(args.transcript_dir) if args.transcript_dir else None)
+    if args.compact:
+        index.compact()
+    if args.query:
+        started = time.perf_counter()
+        results = index.search(args.query, args.k)
+        elapsed = (time.perf_counter() - started) * 1000
+        for result in results:
+            print(f"{result['score']:8.3f}  {result['url']}\n          {result['text'][:160]}")
+        print(f"🔎 {len(results)} of {index.chunk_count} chunks in {elapsed:.1f} ms.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Thread-based staged pipeline used by main.py to process channel videos concurrently.
+
+Each stage runs a function in its own pool of worker threads. Stages are connected by
+bounded queues, so a slow stage (e.g. model inference) applies backpressure to the
+faster I/O stages in front of it instead of letting work pile up in memory.
+
+A stage function receives one item and returns the item for the next stage, or None
+to drop it (e.g. a video that is out of the date range). Batching stages (`batch_size`
+> 1) receive a list of up to `batch_size` items and return a list of results instead,
+which lets model inference run on micro-batches.
+"""
+
+import queue
+import threading
+import time
+
+# Sentinel pushed through the queues to shut the workers down
+_STOP = object()
+
+
+class Stage:
+    """A named pipeline step executed by `workers` threads."""
+
+    def __init__(self, name, func, workers=1, queue_size=8, batch_size=1, batch_timeout=0.5):
+        if workers < 1:
+            raise ValueError(f"Stage '{name}' needs at least one worker")
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout  # Seconds to wait for a batch to fill up
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+        self._running = workers
+
+    def _record(self, outcome, elapsed, count=1):
+        with self._lock:
+            self.busy_seconds += elapsed
+            if outcome == "ok":
+                self.processed += count
+            elif outcome == "drop":
+                self.dropped += count
+            else:
+                self.errors += count
+
+    def _worker_done(self):
+        """Returns True when the calling thread is the last running worker of the stage."""
+        with self._lock:
+            self._running -= 1
+            return self._running == 0
+
+    def stats(self):
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 3),
+        }
+
+
+def _next_batch(stage):
+    """
+    Collects up to `stage.batch_size` items, waiting at most `stage.batch_timeout` after the first.
+    :return: (list of items, bool True if the stop sentinel was received)
+    """
+    item = stage.queue.get()
+    if item is _STOP:
+        return [], True
+
+    batch = [item]
+    deadline = time.monotonic() + stage.batch_timeout
+    while len(batch) < stage.batch_size:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            item = stage.queue.get(timeout=remaining)
+        except queue.Empty:
+            break
+        if item is _STOP:
+            return batch, True
+        batch.append(item)
+    return batch, False
+
+
+def _report(message):
+    try:
+        print(message)
+    except OSError:
+        pass  # e.g. stdout piped into `head`; a lost log line must not stop the worker
+
+
+def _process_batch(stage, next_stage, batch):
+    started = time.perf_counter()
+    try:
+        if stage.batch_size > 1:
+            results = stage.func(batch)
+        else:
+            results = [stage.func(batch[0])]
+        kept = [result for result in results if result is not None]
+    except Exception as e:
+        stage._record("error", time.perf_counter() - started, len(batch))
+        _report(f"❌ Stage '{stage.name}' failed: {e}")
+        return
+
+    elapsed = time.perf_counter() - started
+    stage._record("ok", elapsed, len(kept))
+    stage._record("drop", 0.0, len(batch) - len(kept))
+    if next_stage is not None:
+        for result in kept:
+            next_stage.queue.put(result)  # Blocks while the next stage is saturated
+
+
+def _run_stage(stage, next_stage):
+    stopped = False
+    try:
+        while not stopped:
+            batch, stopped = _next_batch(stage)
+            if batch:
+                _process_batch(stage, next_stage, batch)
+    except BaseException:
+        # Keep consuming until the stop sentinel, so the previous stage can't block on a full queue
+        while not stopped:
+            batch, stopped = _next_batch(stage)
+            stage._record("error", 0.0, len(batch))
+        raise
+    finally:
+        # The last worker of a stage shuts down the next one, however the workers ended
+        if stage._worker_done() and next_stage is not None:
+            for _ in range(next_stage.workers):
+                next_stage.queue.put(_STOP)
+
+
+def run_pipeline(items, stages):
+    """
+    Feeds `items` through `stages` and blocks until every item has been handled.
+    :param items: iterable of inputs for the first stage
+    :param stages: list of Stage objects, in execution order
+    :return: list of per-stage statistics dicts
+    """
+    if not stages:
+        return []
+
+    threads = []
+    for index, stage in enumerate(stages):
+        next_stage = stages[index + 1] if index + 1 < len(stages) else None
+        for worker in range(stage.workers):
+            thread = threading.Thread(
+                target=_run_stage, args=(stage, next_stage),
+                name=f"{stage.name}-{worker}", daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+
+    first = stages[0]
+    for item in items:
+        first.queue.put(item)  # Blocks when the first stage is saturated
+    for _ in range(first.workers):
+        first.queue.put(_STOP)
+
+    for thread in threads:
+        thread.join()
+
+    return [stage.stats() for stage in stages]
@@ -0,0 +1,165 @@
+"""
+Local stub of the LM Studio OpenAI-compatible API, for offline tests and benchmarks.
+
+Answers `POST /v1/chat/completions` with a fixed financial-insights JSON after an
+optional delay, and can fail a share of the requests with 503 (or the next
+`server.fail_next` requests with `server.fail_status`) to exercise retries. The peak
+number of concurrent requests is kept in `server.peak_active`.
+Streaming requests (`"stream": true`) are answered with server-sent events; the JSON is
+followed by some chatter so early termination on the client side can be observed
+through `server.chunks_sent`.
+
+Usage:
+    python stub_lm_server.py --port 1234 --latency 0.2 --failure-rate 0.1
+    LM_STUDIO_API_URL=http://127.0.0.1:1234/v1/chat/completions python main.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_INSIGHTS = {
+    "narrative": "DECISIVE",
+    "direction": "LONG",
+    "Support": [240.0, 225.5],
+    "Resistance": [265.0, 280.0],
+    "Buy_Area": [[245.0, 238.0]],
+    "Sell_Area": [[270.0, 276.0]],
+}
+
+# Trailing text a chatty model adds after the JSON object
+STUB_CHATTER = "\n\nThese levels are based on the transcript above. Let me know if you need anything else!" * 4
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Request handler; behaviour is configured through attributes of the server."""
+
+    def log_message(self, format, *args):
+        pass  # Keep test and benchmark output quiet
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, content, chunk_size=8):
+        """Sends `content` as OpenAI-style SSE deltas, stopping quietly if the client disconnects."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            for start in range(0, len(content), chunk_size):
+                event = {"choices": [{"index": 0, "delta": {"content": content[start:start + chunk_size]}}]}
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                with self.server.lock:
+                    self.server.chunks_sent += 1
+                if self.server.stream_delay:
+                    time.sleep(self.server.stream_delay)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client stopped reading, i.e. stopped the generation
+        self.close_connection = True
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/v1/models":
+            self._send_json(200, {"data": [{"id": "mistral", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+        with server.lock:
+            server.requests_served += 1
+            server.active += 1
+            server.peak_active = max(server.peak_active, server.active)
+            fail = server.fail_next > 0
+            if fail:
+                server.fail_next -= 1
+        try:
+            self._answer(payload, fail)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def _answer(self, payload, fail):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        if fail:
+            self._send_json(server.fail_status, {"error": "stub failure"})
+            return
+        if random.random() < server.failure_rate:
+            self._send_json(503, {"error": "stub failure"})
+            return
+
+        content = json.dumps(server.insights)
+        if payload.get("stream"):
+            self._send_stream(content + STUB_CHATTER)
+            return
+        self._send_json(200, {
+            "id": f"chatcmpl-stub-{server.requests_served}",
+            "object": "chat.completion",
+            "model": payload.get("model", "mistral"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        })
+
+
+def start_stub_server(host="127.0.0.1", port=0, latency=0.0, failure_rate=0.0, insights=None, stream_delay=0.0):
+    """
+    Starts the stub server in a background thread.
+    :param port: int, 0 picks a free port
+    :param stream_delay: float, seconds between streamed chunks
+    :return: (server, chat-completions URL); call `server.shutdown()` to stop it
+    """
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.failure_rate = failure_rate
+    server.insights = insights or STUB_INSIGHTS
+    server.stream_delay = stream_delay
+    server.requests_served = 0
+    server.fail_next = 0  # Requests still to fail with `fail_status`
+    server.fail_status = 503
+    server.active = server.peak_active = 0
+    server.chunks_sent = 0
+    server.lock = threading.Lock()
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://{host}:{server.server_address[1]}/v1/chat/completions"
+    return server, url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a stub LM Studio chat-completions server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1234)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before every response")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.host, args.port, args.latency, args.failure_rate)
+    print(f"🧪 Stub LM Studio server listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
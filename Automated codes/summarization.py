@@ -0,0 +1,218 @@
+"""
+Summarization stage shared by main.py and mistral_api.py.
+
+Supported summarizers:
+- "none": the transcript is passed to the LLM prompt unchanged.
+- "t5": `t5-small`, fast, 512 input tokens.
+- "longt5": `google/long-t5-tglobal-base`, slower, 4096 input tokens.
+
+Transcripts are tokenized once, sorted by token length and grouped into buckets so
+that each `model.generate` call works on a batch of similarly sized inputs. Padding
+is only applied within a bucket, which keeps wasted compute low while letting the
+model use all cores on every call. Results are returned in input order, and can be
+cached by content hash (see summary_cache.py).
+
+Transcripts longer than the model's input limit are truncated by default. In chunked
+mode they are instead split into overlapping token windows that are summarized in
+batches (map), after which the joined chunk summaries are summarized again (reduce)
+until they fit into a single window. Every chunk summary goes through the cache, so a
+long video that was interrupted half-way only summarizes its remaining chunks.
+"""
+
+from model_registry import get_model
+from summary_cache import summary_key
+
+SUMMARIZER_NONE = "none"
+DEFAULT_SUMMARIZER = "longt5"
+
+# Model and generation settings of every summarizer
+SUMMARIZER_CONFIGS = {
+    "t5": {
+        "model_name": "t5-small",  # Can be changed to "t5-base" or "t5-large" for better results
+        "prefix": "",
+        "max_input_length": 512,  # T5 model input limit
+        "batch_size": 8,
+        "max_batch_tokens": 4096,  # Padded input tokens per generate call
+        "generate": {"max_length": 150, "min_length": 50, "length_penalty": 2.0, "num_beams": 4},
+    },
+    "longt5": {
+        "model_name": "google/long-t5-tglobal-base",
+        "prefix": "summarize: ",
+        "max_input_length": 4096,
+        "batch_size": 4,
+        "max_batch_tokens": 16384,
+        "generate": {"max_length": 1024, "min_length": 100, "length_penalty": 2.0},
+    },
+}
+SUMMARIZERS = [SUMMARIZER_NONE] + list(SUMMARIZER_CONFIGS)
+
+# Chunked (map-reduce) summarization settings
+CHUNK_OVERLAP_TOKENS = 64
+CHUNK_GROUP_SIZE = 32  # Chunks summarized per map step, bounds peak memory on very long transcripts
+MAX_REDUCE_LEVELS = 4
+
+
+def load_summarizer_model(summarizer):
+    """Returns the (tokenizer, model) pair of a summarizer, loading it on first use."""
+    return get_model(SUMMARIZER_CONFIGS[summarizer]["model_name"])
+
+
+def make_length_buckets(lengths, batch_size=8, max_batch_tokens=8192):
+    """
+    Groups input indices into batches of similar token length.
+    :param lengths: list of int, token count of every input
+    :param batch_size: int, maximum number of inputs per batch
+    :param max_batch_tokens: int, maximum padded tokens per batch (longest input * batch size)
+    :return: list of lists of input indices
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    buckets = []
+    current = []
+    for index in order:
+        # Inputs are sorted ascending, so the newest input is always the longest in the batch
+        padded_tokens = lengths[index] * (len(current) + 1)
+        if current and (len(current) >= batch_size or padded_tokens > max_batch_tokens):
+            buckets.append(current)
+            current = []
+        current.append(index)
+    if current:
+        buckets.append(current)
+    return buckets
+
+
+def summarize_batch(transcripts, tokenizer, model, prefix="", max_input_length=512,
+                    batch_size=8, max_batch_tokens=8192, **generate_kwargs):
+    """
+    Summarizes many transcripts with batched `model.generate` calls.
+    :param transcripts: list of str, raw transcripts
+    :param tokenizer: Hugging Face tokenizer matching `model`
+    :param model: Hugging Face seq2seq model
+    :param prefix: str, task prefix prepended to every transcript (e.g. "summarize: ")
+    :param max_input_length: int, inputs are truncated to this many tokens
+    :param batch_size: int, maximum number of transcripts per generate call
+    :param max_batch_tokens: int, maximum padded input tokens per generate call
+    :param generate_kwargs: forwarded to `model.generate`
+    :return: list of str summaries, in the same order as `transcripts`
+    """
+    summaries = [""] * len(transcripts)
+    pending = [i for i, text in enumerate(transcripts) if text]
+    if not pending:
+        return summaries
+
+    encoded = [
+        tokenizer.encode(prefix + transcripts[i], truncation=True, max_length=max_input_length)
+        for i in pending
+    ]
+    for bucket in make_length_buckets([len(ids) for ids in encoded], batch_size, max_batch_tokens):
+        inputs = tokenizer.pad({"input_ids": [encoded[i] for i in bucket]}, return_tensors="pt")
+        summary_ids = model.generate(**inputs, **generate_kwargs)
+        for i, summary in zip(bucket, tokenizer.batch_decode(summary_ids, skip_special_tokens=True)):
+            summaries[pending[i]] = summary
+    return summaries
+
+
+def split_token_windows(length, window, overlap=CHUNK_OVERLAP_TOKENS):
+    """
+    Computes overlapping token windows covering `length` tokens.
+    :return: list of (start, end) index pairs
+    """
+    if length <= window:
+        return [(0, length)]
+    step = window - min(overlap, window // 2)  # Keep the overlap from stalling progress on small windows
+    windows = []
+    for start in range(0, length, step):
+        windows.append((start, min(start + window, length)))
+        if start + window >= length:
+            break
+    return windows
+
+
+def split_into_chunks(text, tokenizer, window, overlap=CHUNK_OVERLAP_TOKENS):
+    """Splits `text` into overlapping chunks of at most `window` tokens."""
+    token_ids = tokenizer.encode(text, add_special_tokens=False)
+    return [
+        tokenizer.decode(token_ids[start:end], skip_special_tokens=True)
+        for start, end in split_token_windows(len(token_ids), window, overlap)
+    ]
+
+
+def summarize_texts_chunked(texts, summarizer=DEFAULT_SUMMARIZER, cache=None, batch_size=None,
+                            max_batch_tokens=None, overlap=CHUNK_OVERLAP_TOKENS):
+    """
+    Map-reduce summarization for transcripts longer than the model's input limit.
+
+    Chunks of all transcripts are summarized together in length-bucketed batches, and
+    the joined chunk summaries of every transcript are reduced level by level until
+    they fit into one model window, where a final pass produces the summary.
+    :return: list of str, summaries in input order
+    """
+    config = SUMMARIZER_CONFIGS[summarizer]
+    tokenizer, _ = load_summarizer_model(summarizer)
+    prefix_tokens = len(tokenizer.encode(config["prefix"], add_special_tokens=False))
+    window = config["max_input_length"] - prefix_tokens - 1  # Leave room for the EOS token
+
+    current = [text or "" for text in texts]
+    for _ in range(MAX_REDUCE_LEVELS):
+        chunk_lists = [split_into_chunks(text, tokenizer, window, overlap) if text else [text] for text in current]
+        long_indices = [i for i, chunks in enumerate(chunk_lists) if len(chunks) > 1]
+        if not long_indices:
+            break
+
+        # Map: summarize the chunks of every long transcript, a bounded group at a time
+        flat_chunks = [(i, chunk) for i in long_indices for chunk in chunk_lists[i]]
+        chunk_summaries = {i: [] for i in long_indices}
+        for start in range(0, len(flat_chunks), CHUNK_GROUP_SIZE):
+            group = flat_chunks[start:start + CHUNK_GROUP_SIZE]
+            summaries = summarize_texts([chunk for _, chunk in group], summarizer, cache, batch_size, max_batch_tokens)
+            for (i, _), summary in zip(group, summaries):
+                chunk_summaries[i].append(summary)
+
+        # Reduce: the joined chunk summaries become the input of the next level
+        for i in long_indices:
+            current[i] = " ".join(chunk_summaries[i])
+
+    # Final pass, every input now fits into a single window
+    return summarize_texts(current, summarizer, cache, batch_size, max_batch_tokens)
+
+
+def summarize_texts(texts, summarizer=DEFAULT_SUMMARIZER, cache=None, batch_size=None, max_batch_tokens=None,
+                    chunked=False):
+    """
+    Runs the selected summarizer over `texts`, reusing cached summaries where possible.
+    :param texts: list of str, transcripts to summarize
+    :param summarizer: str, one of SUMMARIZERS
+    :param cache: SummaryCache or None
+    :param batch_size: int, overrides the summarizer's default batch size
+    :param max_batch_tokens: int, overrides the summarizer's default token budget
+    :param chunked: bool, map-reduce long inputs instead of truncating them
+    :return: list of str, summaries in input order
+    """
+    if summarizer == SUMMARIZER_NONE:
+        return list(texts)
+    if summarizer not in SUMMARIZER_CONFIGS:
+        raise ValueError(f"Unknown summarizer '{summarizer}', expected one of {SUMMARIZERS}")
+    if chunked:
+        return summarize_texts_chunked(texts, summarizer, cache, batch_size, max_batch_tokens)
+
+    config = SUMMARIZER_CONFIGS[summarizer]
+    summaries = [None] * len(texts)
+    keys = [summary_key(summarizer, config, text or "") for text in texts]
+    if cache is not None:
+        for i, key in enumerate(keys):
+            summaries[i] = cache.get(key)
+
+    missing = [i for i, summary in enumerate(summaries) if summary is None]
+    if missing:
+        tokenizer, model = load_summarizer_model(summarizer)
+        generated = summarize_batch(
+            [texts[i] for i in missing], tokenizer, model,
+            prefix=config["prefix"], max_input_length=config["max_input_length"],
+            batch_size=batch_size or config["batch_size"],
+            max_batch_tokens=max_batch_tokens or config["max_batch_tokens"],
+            **config["generate"]
+        )
+        for i, summary in zip(missing, generated):
+            summaries[i] = summary
+            if cache is not None and summary:
+                cache.put(keys[i], summarizer, summary)
+    return summaries
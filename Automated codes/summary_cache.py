@@ -0,0 +1,71 @@
+"""
+Content-hash keyed cache for transcript summaries.
+
+Summaries are stored in a small SQLite database keyed by the SHA-256 of the summarizer
+configuration and the input text, so re-running an analysis over the same transcripts
+never regenerates a summary that was already produced.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+SUMMARY_CACHE_FILE = "summary_cache.sqlite3"
+# Summarizer settings that change the summary; batching settings only change throughput
+OUTPUT_CONFIG_FIELDS = ("model_name", "prefix", "max_input_length", "generate")
+
+
+def summary_key(summarizer, config, text):
+    """
+    Builds the cache key of a summary.
+    :param summarizer: str, summarizer name (e.g. "t5")
+    :param config: dict, summarizer settings; a change to one of OUTPUT_CONFIG_FIELDS invalidates old entries
+    :param text: str, input text
+    :return: str, hex digest
+    """
+    fingerprint = json.dumps({field: config[field] for field in OUTPUT_CONFIG_FIELDS if field in config}, sort_keys=True)
+    digest = hashlib.sha256()
+    for part in (summarizer, fingerprint, text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """SQLite-backed summary store, safe to share between pipeline threads."""
+
+    def __init__(self, path=SUMMARY_CACHE_FILE):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            "key TEXT PRIMARY KEY, summarizer TEXT NOT NULL, summary TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        """Returns the cached summary for `key`, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, summarizer, summary):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, summarizer, summary, created_at) VALUES (?, ?, ?, ?)",
+                (key, summarizer, summary, time.time())
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
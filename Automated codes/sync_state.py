@@ -0,0 +1,105 @@
+"""
+Persisted per-channel sync state for main.py.
+
+For every channel we remember the ids of videos that were already stored and a
+high-water mark (upload date and id of the newest processed video). Channel listings
+from yt-dlp are returned newest first, so a daily run can stop reading the listing as
+soon as it reaches the high-water mark and only fetch metadata for new uploads.
+
+Videos that were selected for processing but never stored (no transcript yet, an LLM
+error, a failed write, or a run that stopped while they were in flight) are kept as
+pending ids. The next run keeps reading past the high-water mark until it has found
+them again, so they are retried even though newer videos were stored. Videos the
+filters rejected for good (date range, topic) are kept as skipped ids, so their
+metadata is not fetched again on every run.
+"""
+
+import json
+import os
+import threading
+
+SYNC_STATE_FILE = "sync_state.json"
+
+
+class ChannelSyncState:
+    """Processed video ids and high-water mark of one channel."""
+
+    def __init__(self, channel_url, path=SYNC_STATE_FILE):
+        self.channel_url = channel_url
+        self.path = path
+        self.processed_ids = set()
+        self.pending_ids = set()  # Selected for processing, neither stored nor permanently skipped yet
+        self.skipped_ids = set()  # Rejected by the filters after a metadata fetch or from the flat data
+        self.high_water_date = None  # "YYYYMMDD", as returned by yt-dlp
+        self.high_water_id = None
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Loads this channel's state from disk, if any was saved before."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            state = json.load(f).get(self.channel_url, {})
+        self.processed_ids = set(state.get("processed_ids", []))
+        self.pending_ids = set(state.get("pending_ids", []))
+        self.skipped_ids = set(state.get("skipped_ids", []))
+        self.high_water_date = state.get("high_water_date")
+        self.high_water_id = state.get("high_water_id")
+
+    def save(self):
+        """Writes the state back, keeping the entries of other channels intact."""
+        with self._lock:
+            all_states = {}
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    all_states = json.load(f)
+            all_states[self.channel_url] = {
+                "processed_ids": sorted(self.processed_ids),
+                "pending_ids": sorted(self.pending_ids),
+                "skipped_ids": sorted(self.skipped_ids),
+                "high_water_date": self.high_water_date,
+                "high_water_id": self.high_water_id,
+            }
+            # Write to a temporary file first so a crash can't leave a truncated state file
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(all_states, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def mark_processed(self, video_id, upload_date):
+        """
+        Records a stored video and advances the high-water mark if it is the newest one.
+        :param video_id: str, YouTube video id
+        :param upload_date: str, upload date as "YYYYMMDD"
+        """
+        with self._lock:
+            self.processed_ids.add(video_id)
+            self.pending_ids.discard(video_id)
+            self.skipped_ids.discard(video_id)
+            if upload_date and (self.high_water_date is None or upload_date >= self.high_water_date):
+                self.high_water_date = upload_date
+                self.high_water_id = video_id
+
+    def mark_pending(self, video_id):
+        """Records a video that was selected for processing and must be retried until it is stored."""
+        if video_id is None:
+            return
+        with self._lock:
+            if video_id not in self.processed_ids:
+                self.pending_ids.add(video_id)
+
+    def mark_skipped(self, video_id):
+        """Records a video that the filters rejected for good (date range, topic) and drops it from pending."""
+        if video_id is None:
+            return
+        with self._lock:
+            self.pending_ids.discard(video_id)
+            if video_id not in self.processed_ids:
+                self.skipped_ids.add(video_id)
+
+    def is_below_high_water(self, video_id, upload_date=None):
+        """Returns True if a listing entry is at or older than the newest processed video."""
+        if self.high_water_id is not None and video_id == self.high_water_id:
+            return True
+        return bool(upload_date and self.high_water_date and upload_date < self.high_water_date)
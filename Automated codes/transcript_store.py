@@ -0,0 +1,137 @@
+"""
+Local, compressed store of YouTube transcripts and video metadata.
+
+Every transcript is written once as a gzip-compressed JSON file holding the segment
+columns (text, start, duration) of one video and language, and is read back without
+touching the network. Video metadata (title, upload date, URL) is kept next to it so
+the whole pipeline can run offline from the store.
+
+Downstream code should prefer `iter_segments`/`iter_text` over joining the text, so
+a stage can stream segments instead of holding one giant string.
+
+The store lives in `transcripts/` at the repository root, whatever the working directory
+of the script using it, unless the `TRANSCRIPT_STORE_DIR` environment variable points
+somewhere else.
+"""
+
+import gzip
+import json
+import os
+import threading
+
+TRANSCRIPT_STORE_DIR = os.environ.get(
+    "TRANSCRIPT_STORE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "transcripts"))
+DEFAULT_LANGUAGE = "en"
+
+# Metadata fields kept for offline runs
+METADATA_FIELDS = ["id", "title", "upload_date", "webpage_url", "channel", "duration"]
+
+
+class TranscriptStore:
+    """Directory of `{video_id}.{language}.json.gz` transcripts and `{video_id}.meta.json` metadata."""
+
+    def __init__(self, root=TRANSCRIPT_STORE_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _transcript_path(self, video_id, language):
+        return os.path.join(self.root, f"{video_id}.{language}.json.gz")
+
+    def _metadata_path(self, video_id):
+        return os.path.join(self.root, f"{video_id}.meta.json")
+
+    def _write_atomic(self, path, data, compress):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        opener = gzip.open if compress else open
+        with opener(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def has(self, video_id, language=DEFAULT_LANGUAGE):
+        return os.path.exists(self._transcript_path(video_id, language))
+
+    def save(self, video_id, segments, language=DEFAULT_LANGUAGE):
+        """
+        Stores transcript segments as compressed columns.
+        :param segments: iterable of dicts with "text", "start" and "duration"
+        """
+        columns = {"video_id": video_id, "language": language, "text": [], "start": [], "duration": []}
+        for segment in segments:
+            columns["text"].append(segment["text"])
+            columns["start"].append(segment.get("start", 0.0))
+            columns["duration"].append(segment.get("duration", 0.0))
+        self._write_atomic(self._transcript_path(video_id, language), columns, compress=True)
+
+    def load(self, video_id, language=DEFAULT_LANGUAGE):
+        """Returns the segment columns of a stored transcript, or None if it isn't stored."""
+        path = self._transcript_path(video_id, language)
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def iter_segments(self, video_id, language=DEFAULT_LANGUAGE):
+        """Yields {"text", "start", "duration"} dicts of a stored transcript."""
+        columns = self.load(video_id, language)
+        if columns is None:
+            return
+        for text, start, duration in zip(columns["text"], columns["start"], columns["duration"]):
+            yield {"text": text, "start": start, "duration": duration}
+
+    def iter_text(self, video_id, language=DEFAULT_LANGUAGE):
+        """Yields the text of every segment of a stored transcript."""
+        for segment in self.iter_segments(video_id, language):
+            yield segment["text"]
+
+    def save_metadata(self, metadata):
+        """Keeps the fields of a yt-dlp info dict that the pipeline needs offline."""
+        record = {field: metadata.get(field) for field in METADATA_FIELDS}
+        if record["id"]:
+            self._write_atomic(self._metadata_path(record["id"]), record, compress=False)
+
+    def load_metadata(self, video_id):
+        path = self._metadata_path(video_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def video_ids(self, language=DEFAULT_LANGUAGE):
+        """Returns the ids of the videos with a stored transcript in `language`."""
+        suffix = f".{language}.json.gz"
+        return sorted(name[:-len(suffix)] for name in os.listdir(self.root) if name.endswith(suffix))
+
+    def list_entries(self, language=DEFAULT_LANGUAGE):
+        """
+        Lists stored videos like a flat yt-dlp channel listing (newest first).
+        Only videos with both metadata and a transcript are included.
+        """
+        entries = []
+        for video_id in self.video_ids(language):
+            metadata = self.load_metadata(video_id)
+            if metadata:
+                entries.append(dict(metadata, url=metadata.get("webpage_url") or video_id))
+        entries.sort(key=lambda entry: entry.get("upload_date") or "", reverse=True)
+        return entries
+
+
+def fetch_segments(video_id, store=None, languages=(DEFAULT_LANGUAGE,), offline=False):
+    """
+    Returns the transcript segments of a video, from the store when available.
+    Transcripts fetched from YouTube are written to the store for the next run.
+    :param offline: bool, never call the YouTube transcript API
+    :return: iterator over segment dicts, or None if no transcript is available
+    """
+    language = languages[0]
+    if store is not None and store.has(video_id, language):
+        return store.iter_segments(video_id, language)
+    if offline:
+        return None
+
+    from youtube_transcript_api import YouTubeTranscriptApi
+
+    segments = YouTubeTranscriptApi.get_transcript(video_id, languages=list(languages))
+    if store is not None:
+        store.save(video_id, segments, language)
+    return iter(segments)
@@ -0,0 +1,178 @@
+"""
+MongoDB storage helpers for main.py.
+
+- `ensure_indexes` bootstraps the indexes of the `videos` collection (unique video id,
+  video URL, upload date, stock, and stock/date/direction for the RAG queries).
+- `load_processed_ids` fetches the ids of every stored video in a single query, so the
+  pipeline doesn't need a `find_one` round trip per video.
+- `BulkVideoWriter` buffers processed videos and writes them as one unordered
+  `bulk_write` of upserts keyed by video id, so re-running the pipeline is idempotent.
+- `migrate_upload_dates` converts "Upload Date" strings written by older versions into
+  real datetimes, so MongoDB can range-filter on them.
+"""
+
+import datetime
+import re
+import threading
+import time
+
+from pymongo import ASCENDING, UpdateOne
+
+# Formats older versions stored "Upload Date" in, tried in order
+LEGACY_DATE_FORMATS = ["%d/%m/%Y", "%Y-%m-%d"]
+
+DEFAULT_FLUSH_SIZE = 50
+DEFAULT_FLUSH_INTERVAL = 10.0  # Seconds
+
+
+def extract_video_id(url):
+    """Returns the YouTube video id of a watch/short URL, or None."""
+    match = re.search(r"(?:v=|youtu\.be/)([^&?/]+)", url or "")
+    return match.group(1) if match else None
+
+
+def ensure_indexes(collection):
+    """Creates the indexes used for duplicate checks and date/stock queries (no-op if they exist)."""
+    # Older documents have no "Video ID", so uniqueness only applies where it is set
+    collection.create_index(
+        [("Video ID", ASCENDING)], name="video_id_unique", unique=True,
+        partialFilterExpression={"Video ID": {"$exists": True}}
+    )
+    collection.create_index([("Video URL", ASCENDING)], name="video_url")
+    collection.create_index([("Upload Date", ASCENDING)], name="upload_date")
+    collection.create_index([("Stock Name", ASCENDING)], name="stock_name")
+    collection.create_index(
+        [("Stock Name", ASCENDING), ("Upload Date", ASCENDING), ("Financial Insights.direction", ASCENDING)],
+        name="stock_date_direction"
+    )
+
+
+def parse_legacy_date(value):
+    """Parses an "Upload Date" string of an older document, or returns None."""
+    for date_format in LEGACY_DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    return None
+
+
+def migrate_upload_dates(collection, batch_size=1000):
+    """
+    Rewrites string "Upload Date" values as datetimes.
+    :return: (int migrated documents, int documents whose date could not be parsed)
+    """
+    migrated = failed = 0
+    operations = []
+    for document in collection.find({"Upload Date": {"$type": "string"}}, {"Upload Date": 1}):
+        upload_date = parse_legacy_date(document["Upload Date"])
+        if upload_date is None:
+            failed += 1
+            continue
+        operations.append(UpdateOne({"_id": document["_id"]}, {"$set": {"Upload Date": upload_date}}))
+        if len(operations) >= batch_size:
+            migrated += collection.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        migrated += collection.bulk_write(operations, ordered=False).modified_count
+    return migrated, failed
+
+
+def backfill_stock_name(collection, stock_name):
+    """
+    Sets "Stock Name" on documents written before main.py stored it, so stock-filtered
+    queries match them.
+    :return: int updated documents
+    """
+    return collection.update_many({"Stock Name": None}, {"$set": {"Stock Name": stock_name}}).modified_count
+
+
+def load_processed_ids(collection):
+    """Returns the set of video ids already stored in `collection`, using a single query."""
+    processed_ids = set()
+    for document in collection.find({}, {"_id": 0, "Video ID": 1, "Video URL": 1}):
+        video_id = document.get("Video ID") or extract_video_id(document.get("Video URL"))
+        if video_id:
+            processed_ids.add(video_id)
+    return processed_ids
+
+
+class BulkVideoWriter:
+    """
+    Buffers video documents and upserts them in batches.
+
+    A batch is flushed once `flush_size` documents are buffered, or by a background
+    thread once the oldest buffered document is `flush_interval` seconds old.
+    `on_flush(documents)` is called after every successful write. With `metrics` (a
+    pipeline_metrics.PipelineMetrics), every bulk write is recorded as a "mongo" stage call.
+    """
+
+    def __init__(self, collection, flush_size=DEFAULT_FLUSH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 on_flush=None, metrics=None):
+        self.collection = collection
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        self.metrics = metrics
+        self.written = 0
+        self._buffer = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="mongo-flusher", daemon=True)
+        self._flusher.start()
+
+    def add(self, document):
+        """Buffers a document; it must carry a "Video ID"."""
+        with self._lock:
+            self._buffer.append(document)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = len(self._buffer) >= self.flush_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Writes every buffered document in one bulk upsert."""
+        with self._lock:
+            documents, self._buffer, self._oldest = self._buffer, [], None
+            if not documents:
+                return
+            operations = [
+                UpdateOne({"Video ID": document["Video ID"]}, {"$set": document}, upsert=True)
+                for document in documents
+            ]
+            started = time.perf_counter()
+            try:
+                self.collection.bulk_write(operations, ordered=False)
+            except Exception:
+                self._record(started, "error", len(documents))
+                # Keep the documents so the next flush (or close) retries them
+                self._buffer = documents + self._buffer
+                self._oldest = self._oldest or time.monotonic()
+                raise
+            self._record(started, "ok", len(documents))
+            self.written += len(documents)
+        print(f"💾 Wrote {len(documents)} videos to MongoDB.")
+        if self.on_flush is not None:
+            self.on_flush(documents)
+
+    def _record(self, started, outcome, count):
+        if self.metrics is not None:
+            self.metrics.record("mongo", time.perf_counter() - started, outcome, items=count)
+
+    def _flush_periodically(self):
+        while not self._closed.wait(min(self.flush_interval, 1.0)):
+            with self._lock:
+                due = self._oldest is not None and time.monotonic() - self._oldest >= self.flush_interval
+            if due:
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"❌ Periodic MongoDB flush failed: {e}")
+
+    def close(self):
+        """Stops the background flusher and writes whatever is still buffered."""
+        self._closed.set()
+        self._flusher.join()
+        self.flush()
@@ -0,0 +1,57 @@
+"""
+Downsampling of long price series before they are sent to the browser.
+
+`lttb` implements Largest-Triangle-Three-Buckets: the first and last points are kept and
+every bucket in between contributes the point forming the largest triangle with the
+previously kept point and the average of the next bucket, which preserves the visual
+shape of the series. The global minimum and maximum are always kept as well, so support
+and resistance extremes never disappear from a chart.
+"""
+
+import numpy as np
+import pandas as pd
+
+MAX_CHART_POINTS = 2000
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Returns the sorted indices of the points kept by LTTB plus the global min/max.
+    :param x: 1-D float array, increasing
+    :param y: 1-D float array
+    :param threshold: int, number of points to keep (>= 3)
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)  # Buckets between the first and last point
+    kept = [0]
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_start, next_end = edges[bucket + 1], edges[bucket + 2]
+        else:
+            next_start, next_end = n - 1, n
+        average_x = x[next_start:next_end].mean()
+        average_y = y[next_start:next_end].mean()
+
+        bucket_x, bucket_y = x[start:end], y[start:end]
+        areas = np.abs((x[previous] - average_x) * (bucket_y - y[previous])
+                       - (x[previous] - bucket_x) * (average_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        kept.append(previous)
+    kept.append(n - 1)
+
+    kept.extend([int(np.argmin(y)), int(np.argmax(y))])
+    return np.unique(kept)
+
+
+def downsample_frame(df, x_column, y_column, max_points=MAX_CHART_POINTS):
+    """Returns `df` reduced to about `max_points` rows with LTTB, or unchanged if it is small enough."""
+    if len(df) <= max_points:
+        return df
+    x = pd.to_datetime(df[x_column]).to_numpy(dtype="datetime64[ns]").astype(np.int64).astype(np.float64)
+    y = df[y_column].to_numpy(dtype=np.float64)
+    return df.iloc[lttb_indices(x, y, max_points)].reset_index(drop=True)
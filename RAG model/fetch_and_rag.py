@@ -7,10 +7,24 @@ import re
 from dateutil import parser
 import plotly.express as px
 import logging
-from fastapi import FastAPI
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field
+import hashlib
+import json
 from typing import Optional
 import plotly.graph_objects as go
+import os
+import sys
+import threading
+from frame_cache import FrameCache
+from lru_cache import LRUCache
+from downsample import downsample_frame
+
+# The transcript retrieval index lives next to the pipeline that builds it
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Automated codes"))
+from retrieval_index import RetrievalIndex, RETRIEVAL_INDEX_DIR
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -39,36 +53,76 @@ trade_types = get_trade_types()
 
 # ✅ FastAPI Setup
 app_api = FastAPI()
+MAX_PAGE_SIZE = 1000
 
 class QueryRequest(BaseModel):
     query: str
+    page: int = Field(1, ge=1)
+    page_size: int = Field(100, ge=1, le=MAX_PAGE_SIZE)
 
 # ✅ Load and preprocess data from MongoDB
-def load_data():
-    """Fetch data from MongoDB, convert 'Upload Date' to ISO format, and handle missing fields."""
-    try:
-        data = list(collection.find({}, {"_id": 0, "Upload Date": 1, "Financial Insights": 1, "Stock Name": 1}))
-        if not data:
-            logging.warning("⚠ No data found in MongoDB.")
-            return pd.DataFrame()
+def parse_upload_dates(values):
+    """Convert 'Upload Date' values to datetimes; strings left by un-migrated documents use main.py's '%d/%m/%Y'."""
+    is_string = values.map(lambda value: isinstance(value, str))
+    parsed = pd.to_datetime(values.where(~is_string), errors="coerce")
+    if is_string.any():
+        parsed[is_string] = pd.to_datetime(values[is_string], format="%d/%m/%Y", errors="coerce")
+    return parsed
 
-        df = pd.DataFrame(data)
-        logging.info(f"✅ Successfully fetched {len(df)} records from MongoDB.")
+def prepare_data(df):
+    """Convert 'Upload Date' to datetime and handle missing fields of a batch of fetched documents."""
+    if "Upload Date" in df.columns:
+        df["Upload Date"] = parse_upload_dates(df["Upload Date"])
+        df.dropna(subset=["Upload Date"], inplace=True)
+        df.sort_values("Upload Date", inplace=True)
 
-        if "Upload Date" in df.columns:
-            df["Upload Date"] = pd.to_datetime(df["Upload Date"], format="%m/%d/%Y", errors="coerce")
-            df.dropna(subset=["Upload Date"], inplace=True)
-            df.sort_values("Upload Date", inplace=True)
+    if "Stock Name" not in df.columns:
+        df["Stock Name"] = None
 
-        if "Stock Name" not in df.columns:
-            df["Stock Name"] = None
+    return df
 
+# ✅ Process-wide cached frame, refreshed incrementally (see frame_cache.py). Only used while
+# documents with un-migrated string dates remain, see query_data.
+data_cache = FrameCache(
+    collection,
+    {"Upload Date": 1, "Financial Insights": 1, "Stock Name": 1},
+    prepare_data,
+)
+_cache_watcher = None
+_cache_watcher_lock = threading.Lock()
+
+def load_data():
+    """Return the cached DataFrame of the collection, refreshing it with new documents when its TTL expired."""
+    global _cache_watcher
+    with _cache_watcher_lock:
+        if _cache_watcher is None:
+            _cache_watcher = data_cache.watch()  # Follow the collection from the first use of the frame on
+    try:
+        df = data_cache.get()
+        if df.empty:
+            logging.warning("⚠ No data found in MongoDB.")
         return df
 
     except Exception as e:
         logging.error(f"❌ Error fetching data: {e}")
         return pd.DataFrame()
 
+# ✅ BM25 index over transcript chunks (built by main.py or `retrieval_index.py --sync`)
+retrieval_index = RetrievalIndex(RETRIEVAL_INDEX_DIR)
+
+def search_transcripts(query, k=10):
+    """Return the top-k transcript chunks (video, timestamp, text) for a free-text query."""
+    try:
+        retrieval_index.reload()  # Pick up videos indexed since the app started
+        return retrieval_index.search(query, k)
+    except Exception as e:
+        logging.error(f"❌ Error searching transcripts: {e}")
+        return []
+
+@app_api.get("/search")
+def search_endpoint(q: str, k: int = 10):
+    return {"query": q, "results": search_transcripts(q, k)}
+
 # ✅ Extract relevant information from user query
 def parse_query(query):
     """Extract date range, trade type, and stock name from user query using MongoDB data."""
@@ -92,8 +146,77 @@ def parse_query(query):
         return None, None, None, None
 
 # ✅ Query function based on extracted details
+def build_match(start_date, end_date, trade_type, stock_name):
+    """Build the MongoDB filter of a parsed query; the trade type and stock are optional."""
+    match = {"Upload Date": {"$gte": pd.Timestamp(start_date).to_pydatetime(), "$lte": pd.Timestamp(end_date).to_pydatetime()}}
+    if trade_type:
+        match["Financial Insights.direction"] = {"$in": [trade_type, trade_type.lower(), trade_type.capitalize()]}
+    if stock_name:
+        match["Stock Name"] = stock_name
+    return match
+
+def build_query_pipeline(start_date, end_date, trade_type, stock_name):
+    """
+    Build the aggregation pipeline returning the (Date, Price) series of a query.
+    LONG queries take the highest Buy_Area entry of each video, SHORT queries the lowest Sell_Area entry.
+    """
+    match = build_match(start_date, end_date, trade_type, stock_name)
+
+    area, pick = ("Buy_Area", "$max") if trade_type == "LONG" else ("Sell_Area", "$min")
+    first_prices = {"$map": {"input": f"$Financial Insights.{area}", "as": "range", "in": {"$arrayElemAt": ["$$range", 0]}}}
+    return [
+        {"$match": match},  # Served by the (Stock Name, Upload Date, direction) index
+        {"$project": {"_id": 0, "Date": "$Upload Date", "Price": {pick: first_prices}}},
+        {"$match": {"Price": {"$ne": None}}},
+        {"$sort": {"Date": 1}},
+    ]
+
+# ✅ Documents written before migrate_upload_dates.py ran keep string dates, which MongoDB can't range-filter
+LEGACY_DATE_CHECK_SECONDS = 300
+legacy_date_cache = LRUCache(max_entries=1, ttl=LEGACY_DATE_CHECK_SECONDS)
+
+def has_string_dates():
+    """Return True while documents with un-migrated string 'Upload Date' values remain (re-checked every 5 minutes)."""
+    found = legacy_date_cache.get("string_dates")
+    if found is None:
+        try:
+            found = collection.find_one({"Upload Date": {"$type": "string"}}, {"_id": 1}) is not None
+        except Exception as e:
+            logging.error(f"❌ Error checking for string upload dates: {e}")
+            return False
+        legacy_date_cache.put("string_dates", found)
+        if found:
+            logging.warning("⚠ Documents with string upload dates found, querying the cached frame. "
+                            "Run migrate_upload_dates.py to query MongoDB directly.")
+    return found
+
 def query_data(start_date, end_date, trade_type, stock_name):
-    """Filter data based on user query."""
+    """
+    Filter data based on user query. MongoDB does the filtering and per-video aggregation, unless
+    documents with un-migrated string dates remain: those are only matched by the pandas fallback.
+    """
+    if has_string_dates():
+        return query_data_from_frame(start_date, end_date, trade_type, stock_name)
+    return aggregate_query_data(start_date, end_date, trade_type, stock_name)
+
+def aggregate_query_data(start_date, end_date, trade_type, stock_name):
+    """Filter data based on user query, letting MongoDB do the filtering and per-video aggregation."""
+    if not trade_type:
+        logging.warning("⚠ No data available after filtering.")
+        return pd.DataFrame()
+
+    try:
+        rows = list(collection.aggregate(build_query_pipeline(start_date, end_date, trade_type, stock_name)))
+    except Exception as e:
+        logging.error(f"❌ Error querying MongoDB: {e}")
+        return pd.DataFrame()
+
+    df_result = pd.DataFrame(rows, columns=["Date", "Price"]).rename(columns={"Price": f"{trade_type} Price"})
+    logging.info(f"✅ Query Result: {len(df_result)} records found.")
+    return df_result
+
+def query_data_from_frame(start_date, end_date, trade_type, stock_name):
+    """Filter the cached DataFrame in pandas (fallback for documents with un-migrated string dates)."""
     df = load_data()
     if df.empty or not trade_type:
         logging.warning("⚠ No data available after filtering.")
@@ -125,6 +248,96 @@ def query_data(start_date, end_date, trade_type, stock_name):
     logging.info(f"✅ Query Result: {len(df_result)} records found.")
     return df_result
 
+def query_insights(start_date, end_date, trade_type, stock_name, skip=0, limit=100):
+    """Return (total count, one page of insight documents) matching a parsed query, oldest first."""
+    match = build_match(start_date, end_date, trade_type, stock_name)
+    projection = {"_id": 0, "Video ID": 1, "Video Title": 1, "Video URL": 1, "Upload Date": 1, "Stock Name": 1, "Financial Insights": 1}
+    total = collection.count_documents(match)
+    documents = list(collection.find(match, projection).sort("Upload Date", 1).skip(skip).limit(limit))
+    return total, documents
+
+# ✅ Async API endpoints: responses are cached per normalized query and MongoDB calls run in the thread pool
+API_CACHE_TTL_SECONDS = 30
+response_cache = LRUCache(max_entries=512, ttl=API_CACHE_TTL_SECONDS)
+
+def normalize_query(query):
+    """Parse a query into a (start, end, trade type, stock) key, so differently worded queries share cache entries."""
+    start_date, end_date, trade_type, stock_name = parse_query(query)
+    if start_date is None:
+        raise HTTPException(status_code=400, detail="Could not parse query.")
+    return pd.Timestamp(start_date).date().isoformat(), pd.Timestamp(end_date).date().isoformat(), trade_type, stock_name
+
+def parsed_fields(key):
+    start_date, end_date, trade_type, stock_name = key
+    return {"start_date": start_date, "end_date": end_date, "trade_type": trade_type, "stock_name": stock_name}
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header (comma-separated ETags, weak or strong, or `*`) names `etag`."""
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+def etag_response(request, body):
+    """Serialize `body` with an ETag, answering 304 when the client already has this version."""
+    content = json.dumps(jsonable_encoder(body), separators=(",", ":")).encode("utf-8")
+    etag = f'"{hashlib.sha1(content).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={API_CACHE_TTL_SECONDS}"}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content, media_type="application/json", headers=headers)
+
+def paginate(items, total, page, page_size):
+    return {"page": page, "page_size": page_size, "total": total, "pages": -(-total // page_size), "items": items}
+
+async def get_series(key):
+    """Return the cached (date, price) series of a normalized query, querying MongoDB on a miss."""
+    cache_key = ("series", key)
+    series = response_cache.get(cache_key)
+    if series is None:
+        start_date, end_date, trade_type, stock_name = key
+        if not trade_type:
+            raise HTTPException(status_code=400, detail="No trade type found in query.")
+        df = await run_in_threadpool(query_data, pd.Timestamp(start_date), pd.Timestamp(end_date), trade_type, stock_name)
+        series = [{"date": date.isoformat(), "price": float(price)} for date, price in df.itertuples(index=False)] if not df.empty else []
+        response_cache.put(cache_key, series)
+    return series
+
+async def series_page(key, page, page_size):
+    series = await get_series(key)
+    start = (page - 1) * page_size
+    return paginate(series[start:start + page_size], len(series), page, page_size)
+
+@app_api.post("/query/parse")
+async def parse_endpoint(request: QueryRequest):
+    return parsed_fields(normalize_query(request.query))
+
+@app_api.post("/query")
+async def query_endpoint(body: QueryRequest, request: Request):
+    key = normalize_query(body.query)
+    return etag_response(request, {"query": parsed_fields(key), "series": await series_page(key, body.page, body.page_size)})
+
+@app_api.get("/query/series")
+async def series_endpoint(request: Request, q: str, page: int = Query(1, ge=1), page_size: int = Query(100, ge=1, le=MAX_PAGE_SIZE)):
+    key = normalize_query(q)
+    return etag_response(request, {"query": parsed_fields(key), "series": await series_page(key, page, page_size)})
+
+@app_api.get("/query/insights")
+async def insights_endpoint(request: Request, q: str, page: int = Query(1, ge=1), page_size: int = Query(100, ge=1, le=MAX_PAGE_SIZE)):
+    key = normalize_query(q)
+    cache_key = ("insights", key, page, page_size)
+    result = response_cache.get(cache_key)
+    if result is None:
+        start_date, end_date, trade_type, stock_name = key
+        total, documents = await run_in_threadpool(
+            query_insights, pd.Timestamp(start_date), pd.Timestamp(end_date), trade_type, stock_name,
+            (page - 1) * page_size, page_size
+        )
+        result = paginate(documents, total, page, page_size)
+        response_cache.put(cache_key, result)
+    return etag_response(request, {"query": parsed_fields(key), "insights": result})
+
 # ✅ Dash App UI (Professional Look)
 dash_app = dash.Dash(__name__, external_stylesheets=[dbc.themes.CYBORG])
 dash_app.layout = dbc.Container([
@@ -138,10 +351,21 @@ dash_app.layout = dbc.Container([
     ]),
     dbc.Row([
         dbc.Col(dcc.Graph(id="query-graph"), width=12)
+    ]),
+    html.H3("Search Transcripts", className="mt-4"),
+    dbc.Row([
+        dbc.Col(dcc.Input(id="search-input", type="text", placeholder="e.g. support level 240", value="", className="form-control"), width=8),
+        dbc.Col(dbc.Button("Search", id="search-button", n_clicks=0, color="secondary"), width=4)
+    ], className="my-3"),
+    dbc.Row([
+        dbc.Col(html.Div(id="search-output"), width=12)
     ])
 ], fluid=True)
 
 # ✅ Dash Callback
+# Figures of recent parsed queries, expiring with the API response cache
+figure_cache = LRUCache(max_entries=64, ttl=API_CACHE_TTL_SECONDS)
+
 @dash_app.callback(
     [Output("query-output", "children"), Output("query-graph", "figure")],
     [Input("query-button", "n_clicks")],
@@ -155,12 +379,46 @@ def update_output(n_clicks, query):
     if not all([start_date, end_date, trade_type]):
         return "Invalid query format.", go.Figure()
 
+    key = (pd.Timestamp(start_date), pd.Timestamp(end_date), trade_type, stock_name)
+    cached = figure_cache.get(key)
+    if cached is not None:
+        return cached
+
     results = query_data(start_date, end_date, trade_type, stock_name)
     if results.empty:
         return "No data found.", go.Figure()
 
-    fig = px.line(results, x="Date", y=f"{trade_type} Price", title=f"{trade_type} Trade Prices")
-    return f"{len(results)} records found.", fig
+    plotted = downsample_frame(results, "Date", f"{trade_type} Price")
+    fig = px.line(plotted, x="Date", y=f"{trade_type} Price", title=f"{trade_type} Trade Prices")
+    message = f"{len(results)} records found."
+    if len(plotted) < len(results):
+        message += f" Showing {len(plotted)} representative points."
+    figure_cache.put(key, (message, fig))
+    return message, fig
+
+@dash_app.callback(
+    Output("search-output", "children"),
+    [Input("search-button", "n_clicks")],
+    [dash.dependencies.State("search-input", "value")]
+)
+def update_search(n_clicks, query):
+    if not query:
+        return ""
+
+    results = search_transcripts(query)
+    if not results:
+        return html.Div("No matching transcript chunks.", className="text-warning")
+
+    rows = [
+        html.Tr([
+            html.Td(html.A(f"{r['video_id']} @ {int(r['start']) // 60}:{int(r['start']) % 60:02d}", href=r["url"], target="_blank")),
+            html.Td(f"{r['score']:.2f}"),
+            html.Td(r["text"]),
+        ])
+        for r in results
+    ]
+    header = html.Thead(html.Tr([html.Th("Video"), html.Th("Score"), html.Th("Transcript")]))
+    return dbc.Table([header, html.Tbody(rows)], bordered=True, hover=True, size="sm")
 
 if __name__ == "__main__":
     dash_app.run_server(debug=True)
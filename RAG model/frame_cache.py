@@ -0,0 +1,112 @@
+"""
+Process-wide cache of the `videos` collection as a pandas DataFrame.
+
+The first `get()` loads the whole collection. Afterwards the cached frame is reused
+until its TTL expires, and is then refreshed incrementally: only documents with an
+`_id` newer than the last one seen are fetched, prepared and appended. Updates to
+existing documents (or an explicit `invalidate()`) trigger a full reload. When the
+MongoDB deployment supports change streams, `watch()` marks the frame stale as soon
+as the collection changes instead of waiting for the TTL.
+"""
+
+import logging
+import threading
+import time
+
+import pandas as pd
+
+DEFAULT_TTL_SECONDS = 30.0
+
+
+class FrameCache:
+    """Cached, incrementally refreshed DataFrame of a MongoDB collection."""
+
+    def __init__(self, collection, projection, prepare, ttl=DEFAULT_TTL_SECONDS):
+        """
+        :param collection: pymongo collection
+        :param projection: dict, fields to fetch (`_id` is always included)
+        :param prepare: function(DataFrame) -> DataFrame, cleans a batch of fetched documents
+        :param ttl: float, seconds before the next `get()` polls for new documents
+        """
+        self.collection = collection
+        self.projection = dict(projection, _id=1)
+        self.prepare = prepare
+        self.ttl = ttl
+        self.version = 0  # Bumped whenever the cached frame changes
+        self.timings = {"last_full_load": None, "last_refresh": None, "full_loads": 0, "refreshes": 0}
+        self._frame = None
+        self._last_id = None
+        self._checked_at = 0.0
+        self._needs_reload = False
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Returns the cached frame, loading or refreshing it first if needed."""
+        with self._lock:
+            if self._frame is None or self._needs_reload:
+                self._full_load()
+            elif time.monotonic() - self._checked_at >= self.ttl:
+                self._refresh()
+            return self._frame
+
+    def invalidate(self, full=True):
+        """
+        Marks the cached frame stale.
+        :param full: bool, reload everything (True) or only poll for new documents (False)
+        """
+        with self._lock:
+            if full:
+                self._needs_reload = True
+            self._checked_at = 0.0
+
+    def _fetch(self, query):
+        documents = list(self.collection.find(query, self.projection).sort("_id", 1))
+        if not documents:
+            return pd.DataFrame(), None
+        return self.prepare(pd.DataFrame(documents)), documents[-1]["_id"]
+
+    def _full_load(self):
+        started = time.perf_counter()
+        frame, last_id = self._fetch({})
+        self._frame, self._last_id = frame, last_id
+        self._needs_reload = False
+        self._checked_at = time.monotonic()
+        self.version += 1
+        elapsed = time.perf_counter() - started
+        self.timings["last_full_load"] = round(elapsed, 4)
+        self.timings["full_loads"] += 1
+        logging.info(f"⏱️ Loaded {len(frame)} records from MongoDB in {elapsed:.3f}s.")
+
+    def _refresh(self):
+        started = time.perf_counter()
+        query = {"_id": {"$gt": self._last_id}} if self._last_id is not None else {}
+        new_rows, last_id = self._fetch(query)
+        if not new_rows.empty:
+            frame = pd.concat([self._frame, new_rows], ignore_index=True) if not self._frame.empty else new_rows
+            if "Upload Date" in frame.columns:
+                frame = frame.sort_values("Upload Date", kind="mergesort", ignore_index=True)
+            self._frame, self._last_id = frame, last_id
+            self.version += 1
+        self._checked_at = time.monotonic()
+        elapsed = time.perf_counter() - started
+        self.timings["last_refresh"] = round(elapsed, 4)
+        self.timings["refreshes"] += 1
+        logging.info(f"⏱️ Refreshed cache with {len(new_rows)} new records in {elapsed:.3f}s.")
+
+    def watch(self):
+        """
+        Starts a daemon thread that follows the collection's change stream. Inserts make the
+        next `get()` poll for new documents, other changes trigger a full reload. Falls back
+        to TTL polling if change streams are unavailable (e.g. standalone mongod).
+        """
+        def follow():
+            try:
+                with self.collection.watch() as stream:
+                    for change in stream:
+                        self.invalidate(full=change.get("operationType") != "insert")
+            except Exception as e:
+                logging.warning(f"⚠ Change stream unavailable, using TTL polling instead: {e}")
+
+        thread = threading.Thread(target=follow, name="frame-cache-watch", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,84 @@
+"""
+Benchmark of the shared single-pass ticker matcher against the previous per-keyword loop.
+
+Runs over synthetic video titles, checks that all paths agree, and prints titles/s.
+
+Usage:
+    python benchmarks/bench_ticker_matcher.py --rows 200000
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from ticker_matcher import TickerMatcher, DEFAULT_STOCK_KEYWORDS
+
+FILLER_WORDS = [
+    "stock", "price", "prediction", "huge", "news", "today", "breakout", "earnings", "crash",
+    "buy", "sell", "now", "market", "update", "why", "is", "the", "this", "week", "analysis",
+]
+
+
+def legacy_get_matched_stocks(title, stock_keywords=DEFAULT_STOCK_KEYWORDS):
+    """The per-keyword loop classify_videos.py used before ticker_matcher.py."""
+    title = title.lower()
+    matched = []
+    for stock, keywords in stock_keywords.items():
+        for keyword in keywords:
+            if re.search(r'\b' + re.escape(keyword) + r'\b', title):
+                matched.append(stock)
+                break
+    return matched
+
+
+def make_titles(rows, seed=0):
+    rng = random.Random(seed)
+    keywords = [keyword for keywords in DEFAULT_STOCK_KEYWORDS.values() for keyword in keywords]
+    titles = []
+    for _ in range(rows):
+        words = rng.choices(FILLER_WORDS, k=rng.randint(5, 12))
+        for _ in range(rng.choice([0, 0, 1, 1, 1, 2])):
+            keyword = rng.choice(keywords)
+            words.insert(rng.randrange(len(words) + 1), keyword.upper() if rng.random() < 0.5 else keyword.capitalize())
+        titles.append(" ".join(words))
+    return titles
+
+
+def timed(label, func, rows):
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed:8.3f}s  {rows / elapsed:12,.0f} titles/s")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ticker matching.")
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    titles = make_titles(args.rows)
+    matcher = TickerMatcher(DEFAULT_STOCK_KEYWORDS)
+
+    legacy, legacy_time = timed("per-keyword loop", lambda: [legacy_get_matched_stocks(t) for t in titles], args.rows)
+    single, single_time = timed("single-pass match()", lambda: [matcher.match(t) for t in titles], args.rows)
+    assert single == legacy, "single-pass matcher disagrees with the per-keyword loop"
+
+    try:
+        import pandas as pd
+    except ImportError:
+        print("pandas not installed, skipping match_series()")
+    else:
+        series = pd.Series(titles)
+        vectorized, _ = timed("vectorized match_series()", lambda: matcher.match_series(series), args.rows)
+        assert vectorized.tolist() == legacy, "match_series disagrees with the per-keyword loop"
+
+    print(f"speed-up of match() over the loop: {legacy_time / single_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+"""
+Offline benchmark suite for the pipeline stages.
+
+Every stage runs in its own subprocess and scratch directory. Network layers are stubbed:
+yt-dlp and the transcript API by `stubs.py`, LM Studio by `stub_lm_server.py` and MongoDB
+by mongomock, unless `--mongo-uri` points to a scratch server. The report is written as
+JSON and lists, for every benchmark, the item count, throughput, p50/p95 latency and the
+peak RSS of its stage's process (shared by the benchmarks of one stage). `--compare`
+prints the changes from an earlier report.
+
+Every stage checks its results (non-empty output, both query paths returning the same
+rows), so a stub that silently does less work can't produce flattering numbers. A failed
+check is reported as an error. mongomock can't evaluate the `$max`/`$min` over arrays of
+the query aggregation, so `query.aggregate` is skipped unless `--mongo-uri` is given.
+
+Stages:
+- transcripts: fetch_segments through the transcript store, first from the stubbed API, then from disk
+- summarize: summarize_texts in batches of 8 (`--summarizer`; models must already be cached locally)
+- llm: process_transcript_with_mistral against the stub server, plain and structured (streamed)
+- query: aggregate_query_data (MongoDB aggregation) and query_data_from_frame (pandas) on stored insights
+- classify: cluster_channel_videos and its streaming mode on a synthetic channel CSV
+- scrape: extract_channel_videos, sequential and with 8 workers
+- pipeline: process_channel_videos end to end (summarizer "none")
+
+Usage:
+    python benchmarks/run_benchmarks.py --size small
+    python benchmarks/run_benchmarks.py --size medium --stages query,classify --compare old.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path[:0] = [BENCH_DIR, REPO_DIR, os.path.join(REPO_DIR, "Automated codes"), os.path.join(REPO_DIR, "RAG model")]
+
+from synthetic import (SIZES, make_insight_documents, make_transcript, make_video_metadata, video_id,
+                       write_channel_csv)
+from stubs import bench_collection, install_transcript_stub, install_yt_dlp_stub
+from pipeline_metrics import percentile
+
+STAGES = ["transcripts", "summarize", "llm", "query", "classify", "scrape", "pipeline"]
+
+
+def timed_calls(func, items):
+    """Calls func(item) for every item and returns the per-call latencies in seconds."""
+    latencies = []
+    for item in items:
+        started = time.perf_counter()
+        func(item)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def result(items, seconds, latencies=None, **extra):
+    return dict(extra, items=items, seconds=seconds, latencies=latencies or [])
+
+
+class CheckFailed(Exception):
+    """A benchmark produced no or inconsistent results."""
+
+
+def check(condition, message):
+    if not condition:
+        raise CheckFailed(message)
+
+
+# --- Stages (run in the child process, inside a scratch directory) ---
+def bench_transcripts(config, args):
+    install_transcript_stub(config["segments"], args.network_latency)
+    from transcript_store import TranscriptStore, fetch_segments
+
+    store = TranscriptStore("transcripts")
+    ids = [video_id(index) for index in range(config["videos"])]
+    counts = []
+    started = time.perf_counter()
+    fetched = timed_calls(lambda vid: counts.append(len(list(fetch_segments(vid, store) or []))), ids)
+    fetch_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    loaded = timed_calls(lambda vid: counts.append(len(list(fetch_segments(vid, store, offline=True) or []))), ids)
+    load_seconds = time.perf_counter() - started
+    check(counts == [config["segments"]] * (2 * len(ids)), "transcripts were not fetched or stored completely")
+    return {
+        "transcripts.fetch_and_store": result(len(ids), fetch_seconds, fetched),
+        "transcripts.load": result(len(ids), load_seconds, loaded),
+    }
+
+
+def bench_summarize(config, args):
+    from summarization import summarize_texts
+
+    texts = [make_transcript(config["segments"], seed=index) for index in range(config["videos"])]
+    batches = [texts[start:start + 8] for start in range(0, len(texts), 8)]
+    summaries = []
+    started = time.perf_counter()
+    latencies = timed_calls(lambda batch: summaries.extend(summarize_texts(batch, args.summarizer, batch_size=8)),
+                            batches)
+    elapsed = time.perf_counter() - started
+    check(len(summaries) == len(texts) and all(summaries), "summarize_texts returned missing or empty summaries")
+    return {f"summarize.{args.summarizer}": result(len(texts), elapsed, latencies,
+                                                   latency_unit="batch of 8")}
+
+
+def bench_llm(config, args):
+    from stub_lm_server import start_stub_server
+    from lm_client import LMStudioClient
+    from mistral_api import process_transcript_with_mistral
+
+    server, url = start_stub_server(latency=args.llm_latency)
+    client = LMStudioClient(url, max_in_flight=4)
+    texts = [make_transcript(40, seed=index) for index in range(config["videos"])]
+    results = {}
+    try:
+        for name, structured in [("llm.chat", False), ("llm.structured_stream", True)]:
+            answers = []
+            started = time.perf_counter()
+            latencies = timed_calls(
+                lambda text: answers.append(process_transcript_with_mistral(text, client=client, structured=structured)),
+                texts
+            )
+            elapsed = time.perf_counter() - started
+            check(all(answers), f"{name}: some transcripts got no insights")
+            results[name] = result(len(texts), elapsed, latencies)
+    finally:
+        client.close()
+        server.shutdown()
+    return results
+
+
+def bench_query(config, args):
+    import pymongo
+    import mongomock
+    from video_store import ensure_indexes
+
+    collection = bench_collection(args.mongo_uri)
+    collection.insert_many(make_insight_documents(config["documents"]))
+    ensure_indexes(collection)
+
+    # fetch_and_rag connects at import time: give it mongomock, then point it at the benchmark data
+    pymongo.MongoClient = mongomock.MongoClient
+    import fetch_and_rag
+
+    fetch_and_rag.collection = collection
+    fetch_and_rag.data_cache.collection = collection
+    fetch_and_rag.data_cache.invalidate()
+
+    rng = random.Random(0)
+    queries = []
+    for _ in range(config["queries"]):
+        start = datetime.datetime(2024, 1, 1) + datetime.timedelta(days=rng.randint(0, 300))
+        end = start + datetime.timedelta(days=rng.randint(7, 120))
+        queries.append((start, end, rng.choice(["LONG", "SHORT"]), rng.choice(["TSLA", "NVDA", "AAPL", None])))
+
+    paths = [("query.frame", fetch_and_rag.query_data_from_frame)]
+    if args.mongo_uri:
+        paths.append(("query.aggregate", fetch_and_rag.aggregate_query_data))
+    results = {} if args.mongo_uri else {
+        "query.aggregate": {"skipped": "mongomock can't evaluate the aggregation, use --mongo-uri"}
+    }
+    rows = {}
+    for name, func in paths:
+        frames = []
+        started = time.perf_counter()
+        latencies = timed_calls(lambda query: frames.append(func(*query)), queries)
+        results[name] = result(len(queries), time.perf_counter() - started, latencies,
+                               rows=sum(len(frame) for frame in frames))
+        rows[name] = [sorted(map(tuple, frame.astype(str).values.tolist())) for frame in frames]
+
+    # The pandas path is the reference: it doesn't depend on what the MongoDB backend can evaluate
+    if not results["query.frame"]["rows"]:
+        raise CheckFailed("query_data_from_frame returned no rows")
+    if args.mongo_uri and rows["query.aggregate"] != rows["query.frame"]:
+        results["query.aggregate"] = {"error": "aggregate_query_data rows differ from query_data_from_frame"}
+    return results
+
+
+def bench_classify(config, args):
+    import classify_videos
+
+    path = "Bench_-_Videos.csv"
+    write_channel_csv(path, config["csv_rows"], channel_name="Bench")
+    results = {}
+    for name, func in [("classify.in_memory", lambda: classify_videos.cluster_channel_videos(path)),
+                       ("classify.streaming", lambda: classify_videos.cluster_channel_videos_streaming(path))]:
+        for cluster_file in [name for name in os.listdir(".") if name.endswith((".json", ".jsonl"))]:
+            os.remove(cluster_file)
+        latencies = timed_calls(lambda _: func(), range(args.repeats))
+        clustered = sum(len(json.load(open(name, encoding="utf-8"))) if name.endswith(".json") else
+                        sum(1 for _ in open(name, encoding="utf-8"))
+                        for name in os.listdir(".") if name.endswith((".json", ".jsonl")) and "manifest" not in name)
+        check(clustered == config["csv_rows"], f"{name}: {clustered} of {config['csv_rows']} videos clustered")
+        results[name] = result(config["csv_rows"] * args.repeats, sum(latencies), latencies, latency_unit="whole CSV")
+    return results
+
+
+def bench_scrape(config, args):
+    timer = install_yt_dlp_stub(make_video_metadata(config["videos"]), args.network_latency)
+    import yt_search
+
+    results = {}
+    for name, workers in [("scrape.sequential", 1), ("scrape.concurrent_8", 8)]:
+        shutil.rmtree("results", ignore_errors=True)
+        for progress_file in [name for name in os.listdir(".") if name.endswith("_progress.csv")]:
+            os.remove(progress_file)
+        timer.reset()
+        started = time.perf_counter()
+        yt_search.extract_channel_videos("BENCH", workers=workers, rate=1000000, burst=1000)
+        written = sum(1 for output in os.listdir("results") for line in open(os.path.join("results", output),
+                                                                               encoding="utf-8")
+                      if not line.startswith("#")) - len(os.listdir("results"))  # Minus the header rows
+        check(written == config["videos"], f"{name}: {written} of {config['videos']} videos written")
+        results[name] = result(config["videos"], time.perf_counter() - started, list(timer.latencies),
+                               latency_unit="yt-dlp call")
+    return results
+
+
+def bench_pipeline(config, args):
+    from stub_lm_server import start_stub_server
+
+    server, url = start_stub_server(latency=args.llm_latency)
+    os.environ["LM_STUDIO_API_URL"] = url  # Read when lm_client is imported
+    videos = make_video_metadata(config["videos"])
+    install_yt_dlp_stub(videos, args.network_latency)
+    install_transcript_stub(config["segments"], args.network_latency)
+    import main
+    from video_store import ensure_indexes
+
+    collection = bench_collection(args.mongo_uri)
+    ensure_indexes(collection)
+    main._collection = collection
+
+    latencies = []
+    process_video = main.process_video
+
+    def timed_process_video(video_url, context):
+        started = time.perf_counter()
+        process_video(video_url, context)
+        latencies.append(time.perf_counter() - started)
+
+    main.process_video = timed_process_video
+    started = time.perf_counter()
+    try:
+        main.process_channel_videos(
+            "https://www.youtube.com/@bench/videos", summarizer="none", llm_cache_file=None,
+            state_file="sync_state.json", summary_cache_file="summary_cache.sqlite3",
+            transcript_dir="transcripts", index_dir="retrieval_index",
+        )
+    finally:
+        server.shutdown()
+    elapsed = time.perf_counter() - started
+    stored = collection.count_documents({})
+    expected = sum(1 for video in videos if main.check_title(video["title"]) is None)  # Other stocks are skipped
+    check(stored == expected, f"pipeline: {stored} of {expected} videos stored")
+    return {"pipeline.sequential": result(stored, elapsed, latencies, latency_unit="video")}
+
+
+STAGE_FUNCTIONS = {
+    "transcripts": bench_transcripts, "summarize": bench_summarize, "llm": bench_llm, "query": bench_query,
+    "classify": bench_classify, "scrape": bench_scrape, "pipeline": bench_pipeline,
+}
+
+
+# --- Reporting ---
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize_result(raw, rss_mb):
+    if "error" in raw or "skipped" in raw:
+        return raw
+    latencies = sorted(raw.pop("latencies"))
+    p50, p95 = percentile(latencies, 0.5), percentile(latencies, 0.95)
+    return dict(
+        raw,
+        seconds=round(raw["seconds"], 4),
+        throughput_per_s=round(raw["items"] / raw["seconds"], 2) if raw["seconds"] else None,
+        p50_ms=round(p50 * 1000, 3) if p50 is not None else None,
+        p95_ms=round(p95 * 1000, 3) if p95 is not None else None,
+        stage_peak_rss_mb=rss_mb,
+    )
+
+
+def run_child(args):
+    """Runs one stage in this process and writes its results to `args.result_file`."""
+    results = STAGE_FUNCTIONS[args.child](SIZES[args.size], args)
+    rss_mb = peak_rss_mb()
+    with open(args.result_file, "w", encoding="utf-8") as f:
+        json.dump({name: summarize_result(raw, rss_mb) for name, raw in results.items()}, f)
+
+
+def run_stage(stage, args):
+    """Runs a stage in a subprocess and scratch directory; returns its results (or an error entry)."""
+    workdir = tempfile.mkdtemp(prefix=f"bench-{stage}-")
+    result_file = os.path.join(workdir, "result.json")
+    command = [
+        sys.executable, os.path.abspath(__file__), "--child", stage, "--size", args.size, "--result-file", result_file,
+        "--summarizer", args.summarizer, "--network-latency", str(args.network_latency),
+        "--llm-latency", str(args.llm_latency), "--repeats", str(args.repeats),
+    ] + (["--mongo-uri", args.mongo_uri] if args.mongo_uri else [])
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([BENCH_DIR, REPO_DIR]), HF_HUB_OFFLINE="1",
+               TICKERS_FILE=os.path.join(workdir, "tickers.json"))
+    try:
+        completed = subprocess.run(command, cwd=workdir, env=env, stdout=None if args.verbose else subprocess.DEVNULL,
+                                   stderr=subprocess.PIPE, text=True)
+        if completed.returncode != 0:
+            return {stage: {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed"}}
+        with open(result_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_report(report, baseline=None):
+    previous = (baseline or {}).get("stages", {})
+    print(f"{'benchmark':<30} {'items':>8} {'items/s':>12} {'p50 ms':>10} {'p95 ms':>10} {'stage RSS MB':>13}  change")
+    for name, stats in report["stages"].items():
+        if "error" in stats:
+            print(f"{name:<30} ERROR: {stats['error']}")
+            continue
+        if "skipped" in stats:
+            print(f"{name:<30} SKIPPED: {stats['skipped']}")
+            continue
+        change = ""
+        before = previous.get(name, {})
+        if before.get("throughput_per_s") and stats["throughput_per_s"]:
+            change = f"{(stats['throughput_per_s'] / before['throughput_per_s'] - 1) * 100:+.1f}% throughput"
+        print(f"{name:<30} {stats['items']:>8} {stats['throughput_per_s'] or 0:>12,.1f} "
+              f"{stats['p50_ms'] if stats['p50_ms'] is not None else '-':>10} "
+              f"{stats['p95_ms'] if stats['p95_ms'] is not None else '-':>10} "
+              f"{stats['stage_peak_rss_mb'] if stats['stage_peak_rss_mb'] is not None else '-':>13}  {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline pipeline benchmarks.")
+    parser.add_argument("--size", choices=list(SIZES), default="small")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Comma-separated subset of {', '.join(STAGES)}")
+    parser.add_argument("--summarizer", default="none", help="Summarizer of the summarize stage (none, t5, longt5)")
+    parser.add_argument("--network-latency", type=float, default=0.0, help="Simulated yt-dlp/transcript latency (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Stub LM Studio response delay (s)")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs of the whole-file stages (classify)")
+    parser.add_argument("--mongo-uri", help="Use a scratch database on this MongoDB server instead of mongomock")
+    parser.add_argument("--output", help="Report file (default: benchmark-<size>-<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier report to compare throughput with")
+    parser.add_argument("--verbose", action="store_true", help="Show the output of the benchmarked code")
+    parser.add_argument("--child", choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "size": args.size,
+        "config": SIZES[args.size],
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "stages": {},
+    }
+    for stage in stages:
+        print(f"⏱️ Running {stage}...", file=sys.stderr)
+        report["stages"].update(run_stage(stage, args))
+
+    output = args.output or f"benchmark-{args.size}-{datetime.datetime.now():%Y%m%d-%H%M%S}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    print(f"📄 Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Offline stand-ins for the network layers, installed into `sys.modules` by the benchmarks
+before the code under test is imported:
+- `yt_dlp`: a `YoutubeDL` answering channel listings and per-video metadata from
+  synthetic data, after an optional simulated network delay.
+- `youtube_transcript_api`: a `YouTubeTranscriptApi.get_transcript` returning
+  synthetic segments.
+MongoDB is replaced by mongomock unless the benchmarks are given a real server.
+"""
+
+import re
+import sys
+import threading
+import time
+import types
+
+from synthetic import make_segments
+
+
+class CallTimer:
+    """Thread-safe list of per-call latencies recorded by a stub."""
+
+    def __init__(self):
+        self.latencies = []
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.latencies = []
+
+
+def install_yt_dlp_stub(videos, latency=0.0, channel_title="Bench Channel"):
+    """Installs a fake `yt_dlp` serving `videos` (yt-dlp metadata dicts). Returns its CallTimer."""
+    by_id = {video["id"]: video for video in videos}
+    timer = CallTimer()
+
+    class YoutubeDL:
+        def __init__(self, params=None):
+            self.params = params or {}
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def extract_info(self, url, download=False):
+            started = time.perf_counter()
+            if latency:
+                time.sleep(latency)
+            if "/channel/" in url or "/@" in url:
+                info = {
+                    "title": channel_title,
+                    "entries": [
+                        {"id": video["id"], "url": video["webpage_url"], "title": video["title"],
+                         "upload_date": video["upload_date"]}
+                        for video in videos
+                    ],
+                }
+            else:
+                match = re.search(r"(?:v=|youtu\.be/)([^&?/]+)", url)
+                info = dict(by_id[match.group(1) if match else url])
+            timer.record(time.perf_counter() - started)
+            return info
+
+    module = types.ModuleType("yt_dlp")
+    module.YoutubeDL = YoutubeDL
+    sys.modules["yt_dlp"] = module
+    return timer
+
+
+def install_transcript_stub(segments_per_video, latency=0.0):
+    """Installs a fake `youtube_transcript_api` returning synthetic segments. Returns its CallTimer."""
+    timer = CallTimer()
+
+    class TranscriptsDisabled(Exception):
+        pass
+
+    class YouTubeTranscriptApi:
+        @staticmethod
+        def get_transcript(video_id, languages=("en",)):
+            started = time.perf_counter()
+            if latency:
+                time.sleep(latency)
+            segments = make_segments(segments_per_video, seed=sum(map(ord, video_id)))
+            timer.record(time.perf_counter() - started)
+            return segments
+
+    module = types.ModuleType("youtube_transcript_api")
+    module.YouTubeTranscriptApi = YouTubeTranscriptApi
+    module.TranscriptsDisabled = TranscriptsDisabled
+    sys.modules["youtube_transcript_api"] = module
+    return timer
+
+
+def bench_collection(mongo_uri=None, name="videos"):
+    """An empty `videos` collection: mongomock by default, or a scratch database on `mongo_uri`."""
+    if mongo_uri:
+        import pymongo
+
+        collection = pymongo.MongoClient(mongo_uri)["youtube_data_benchmark"][name]
+    else:
+        import mongomock
+
+        collection = mongomock.MongoClient()["youtube_data_benchmark"][name]
+        collection.bulk_write = _one_by_one_bulk_write(collection)
+    collection.drop()
+    return collection
+
+
+def _one_by_one_bulk_write(collection):
+    """
+    mongomock's bulk_write fails on the UpdateOne operations of recent pymongo versions
+    (unexpected `sort` argument), so the upserts of BulkVideoWriter are applied one by one.
+    """
+    def bulk_write(operations, ordered=True):
+        for operation in operations:
+            collection.update_one(operation._filter, operation._doc, upsert=operation._upsert)
+
+    return bulk_write
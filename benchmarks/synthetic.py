@@ -0,0 +1,118 @@
+"""
+Deterministic synthetic data for the offline benchmarks: transcripts, channel listings,
+yt-dlp metadata, scraped-channel CSVs and stored insight documents.
+"""
+
+import csv
+import datetime
+import random
+
+# Items per stage for every benchmark size
+SIZES = {
+    "small": {"videos": 20, "segments": 200, "csv_rows": 5000, "documents": 1000, "queries": 50},
+    "medium": {"videos": 100, "segments": 600, "csv_rows": 100000, "documents": 20000, "queries": 200},
+    "large": {"videos": 500, "segments": 1500, "csv_rows": 1000000, "documents": 200000, "queries": 500},
+}
+
+WORDS = [
+    "tesla", "tsla", "support", "resistance", "level", "buy", "sell", "area", "price", "target",
+    "breakout", "volume", "chart", "earnings", "market", "today", "going", "we", "the", "is",
+    "looking", "at", "this", "week", "bullish", "bearish", "options", "calls", "puts", "gap",
+]
+TITLE_STOCKS = ["Tesla", "TSLA", "NVDA", "Apple", "AMD", "SPY", "QQQ", "Palantir", "Microsoft", "Meta"]
+TITLE_WORDS = ["stock", "price", "prediction", "huge", "news", "today", "breakout", "earnings", "crash", "update"]
+
+
+def video_id(index):
+    return f"vid{index:08d}"
+
+
+def make_segments(count, seed=0):
+    """Transcript segments ({text, start, duration}) of roughly 4 seconds each."""
+    rng = random.Random(seed)
+    segments = []
+    for position in range(count):
+        text = " ".join(rng.choices(WORDS, k=rng.randint(6, 14)))
+        if rng.random() < 0.05:
+            text += f" {rng.randint(150, 400)}.{rng.randint(0, 99):02d}"
+        segments.append({"text": text, "start": position * 4.0, "duration": 4.0})
+    return segments
+
+
+def make_transcript(count, seed=0):
+    return " ".join(segment["text"] for segment in make_segments(count, seed))
+
+
+def make_title(rng):
+    words = rng.choices(TITLE_WORDS, k=rng.randint(4, 8))
+    for _ in range(rng.choice([0, 1, 1, 1, 2])):
+        words.insert(rng.randrange(len(words) + 1), rng.choice(TITLE_STOCKS))
+    return " ".join(words)
+
+
+def make_video_metadata(count, seed=0, start=datetime.date(2024, 6, 2)):
+    """yt-dlp style metadata dicts, newest first, all inside main.py's date range and about Tesla."""
+    rng = random.Random(seed)
+    videos = []
+    for index in range(count):
+        upload_date = start + datetime.timedelta(days=(count - index) % 280)
+        videos.append({
+            "id": video_id(index),
+            "title": f"Tesla {make_title(rng)}",
+            "upload_date": upload_date.strftime("%Y%m%d"),
+            "webpage_url": f"https://www.youtube.com/watch?v={video_id(index)}",
+            "channel": "Bench Channel",
+            "channel_url": "https://www.youtube.com/channel/BENCH",
+            "duration": rng.randint(300, 3600),
+            "uploader": "Bench Channel",
+            "view_count": rng.randint(100, 100000),
+            "like_count": rng.randint(0, 5000),
+            "description": " ".join(rng.choices(WORDS, k=30)),
+            "thumbnail": f"https://i.ytimg.com/vi/{video_id(index)}/hq.jpg",
+        })
+    return videos
+
+
+def write_channel_csv(path, rows, seed=0, channel_name="Bench Channel"):
+    """A channel CSV in the format written by yt_search.py."""
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([
+            "Video ID", "Title", "URL", "Duration", "Uploader", "Channel Name", "Upload Date",
+            "View Count", "Like Count", "Description", "Channel URL", "Thumbnail"
+        ])
+        for index in range(rows):
+            writer.writerow([
+                video_id(index), make_title(rng), f"https://www.youtube.com/watch?v={video_id(index)}",
+                rng.randint(300, 3600), channel_name, channel_name, "2024-06-01",
+                rng.randint(100, 100000), rng.randint(0, 5000), " ".join(rng.choices(WORDS, k=20)),
+                "https://www.youtube.com/channel/BENCH", "",
+            ])
+
+
+def make_insight_documents(count, seed=0, stocks=("TSLA", "NVDA", "AAPL")):
+    """Documents shaped like main.py's `build_video_record` output."""
+    rng = random.Random(seed)
+    start = datetime.datetime(2024, 1, 1)
+    documents = []
+    for index in range(count):
+        price = rng.uniform(150, 400)
+        direction = rng.choice(["LONG", "SHORT"])
+        documents.append({
+            "Video ID": video_id(index),
+            "Video Title": f"Video {index}",
+            "Upload Date": start + datetime.timedelta(hours=rng.randint(0, 24 * 365)),
+            "Video URL": f"https://www.youtube.com/watch?v={video_id(index)}",
+            "Stock Name": rng.choice(stocks),
+            "Summarizer": "none",
+            "Financial Insights": {
+                "narrative": rng.choice(["DECISIVE", "NON-DECISIVE"]),
+                "direction": direction,
+                "Support": [round(price - 10, 2), round(price - 20, 2)],
+                "Resistance": [round(price + 10, 2), round(price + 20, 2)],
+                "Buy_Area": [[round(price - 5, 2), round(price - 8, 2)], [round(price - 12, 2), round(price - 15, 2)]],
+                "Sell_Area": [[round(price + 5, 2), round(price + 8, 2)]],
+            },
+        })
+    return documents
@@ -1,53 +1,40 @@
+import argparse
+import hashlib
 import pandas as pd
 import os
-import re
 import json
+import time
 from collections import defaultdict
 
-# --- Stock keywords for detection ---
-stock_keywords = {
-    "tesla": ["tsla", "tesla"],
-    "nvidia": ["nvda", "nvidia"],
-    "apple": ["aapl", "apple"],
-    "meta": ["meta", "facebook", "fb"],
-    "amazon": ["amzn", "amazon"],
-    "google": ["googl", "google", "alphabet"],
-    "microsoft": ["msft", "microsoft"],
-    "netflix": ["nflx", "netflix"],
-    "amd": ["amd"],
-    "pltr": ["pltr", "palantir"],
-    "smci": ["smci"],
-    "mu": ["mu", "micron"],
-    "qqq": ["qqq"],
-    "spy": ["spy"]
+from ticker_matcher import default_matcher
+
+COLUMN_NAMES = {
+    'Title': 'title',
+    'Video ID': 'video_id',
+    'Upload Date': 'upload_date',
+    'View Count': 'view_count',
+    'Description': 'description'
 }
+DEFAULT_CHUNKSIZE = 50000
+MANIFEST_FORMAT = 2  # Bumped whenever the cluster files change name or layout
+TAIL_CHECKSUM_BYTES = 4096  # Bytes before the manifest offset that must be unchanged to resume
 
 # --- Helper functions ---
 def get_matched_stocks(title):
-    title = title.lower()
-    matched = []
-    for stock, keywords in stock_keywords.items():
-        for keyword in keywords:
-            if re.search(r'\b' + re.escape(keyword) + r'\b', title):
-                matched.append(stock)
-                break
-    return matched
+    return default_matcher().match(title)
 
 def extract_channel_name_from_path(file_path):
     raw_name = os.path.basename(file_path).split("_-_")[0]
     return raw_name.lower().replace("_", "").replace(" ", "")
 
-def cluster_channel_videos(csv_file_path):
+def normalize_channel_name(names):
+    return names.str.lower().str.replace(" ", "").str.replace("_", "")
+
+def cluster_channel_videos(csv_file_path, verbose=False):
     df = pd.read_csv(csv_file_path)
     print(f"[INFO] Loaded {len(df)} rows from CSV.")
 
-    df.rename(columns={
-        'Title': 'title',
-        'Video ID': 'video_id',
-        'Upload Date': 'upload_date',
-        'View Count': 'view_count',
-        'Description': 'description'
-    }, inplace=True)
+    df.rename(columns=COLUMN_NAMES, inplace=True)
 
     if 'title' not in df.columns or 'video_id' not in df.columns:
         raise ValueError("CSV must contain 'title' and 'video_id' columns")
@@ -56,7 +43,7 @@ def cluster_channel_videos(csv_file_path):
     print(f"[INFO] Channel name extracted: {channel_name}")
 
     if 'Channel Name' in df.columns:
-        df = df[df['Channel Name'].str.lower().str.replace(" ", "").str.replace("_", "") == channel_name]
+        df = df[normalize_channel_name(df['Channel Name']) == channel_name]
         print(f"[INFO] Filtered by channel name, remaining videos: {len(df)}")
 
     if df.empty:
@@ -80,7 +67,8 @@ def cluster_channel_videos(csv_file_path):
             "view_count": int(row.get("view_count", 0))
         }
 
-        print(f"[DEBUG] Title: '{title}' | Matched Stocks: {matched_stocks}")
+        if verbose:
+            print(f"[DEBUG] Title: '{title}' | Matched Stocks: {matched_stocks}")
 
         if not matched_stocks:
             others_videos.append(video_info)
@@ -110,6 +98,202 @@ def cluster_channel_videos(csv_file_path):
 
     print(f"[SUCCESS] Clustering complete for channel: {channel_name}")
 
-# --- Example usage ---
-csv_file_path = "C:/Users/shubh/OneDrive/Desktop/Youtube_Analysis/results/StockWhale_-_Videos.csv"
-cluster_channel_videos(csv_file_path)
+# --- Streaming mode ---
+class ClusterWriters:
+    """Lazily opened JSON Lines files, one per cluster, kept open for the whole run."""
+
+    def __init__(self, output_dir=".", mode="w"):
+        self.output_dir = output_dir
+        self.mode = mode
+        self.counts = defaultdict(int)
+        self._files = {}
+
+    def write(self, filename, records):
+        f = self._files.get(filename)
+        if f is None:
+            f = self._files[filename] = open(os.path.join(self.output_dir, filename), self.mode, encoding="utf-8")
+        f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+        self.counts[filename] += len(records)
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+def chunk_records(chunk):
+    """Convert a classified chunk to the video_info dicts of the cluster files (NaN -> None)."""
+    records = pd.DataFrame({
+        "video_id": chunk["video_id"],
+        "title": chunk["title"].astype(str),
+        "description": chunk["description"] if "description" in chunk else "",
+        "upload_date": chunk["upload_date"] if "upload_date" in chunk else "",
+        "view_count": pd.to_numeric(chunk["view_count"], errors="coerce").fillna(0).astype(int) if "view_count" in chunk else 0,
+    })
+    return records.astype(object).where(records.notna(), None).to_dict("records")
+
+def classify_chunk(chunk, channel_name, writers, matcher):
+    """Classify one chunk with the vectorized matcher and append it to the cluster files."""
+    matched = matcher.match_series(chunk["title"])
+    match_counts = matched.str.len()
+
+    others = chunk[match_counts == 0]
+    if not others.empty:
+        writers.write(f"others_{channel_name}.jsonl", chunk_records(others))
+
+    multi = chunk[match_counts > 1]
+    if not multi.empty:
+        writers.write(f"multi_asset_{channel_name}.jsonl", chunk_records(multi))
+
+    single = match_counts == 1
+    for stock_name, group in chunk[single].groupby(matched[single].str[0], sort=False):
+        writers.write(f"{stock_name}_{channel_name}.jsonl", chunk_records(group))
+
+def remove_cluster_files(output_dir, channel_name):
+    """Delete the JSON Lines cluster files of a channel, including stocks that no longer match."""
+    for filename in os.listdir(output_dir):
+        if filename.endswith(f"_{channel_name}.jsonl"):
+            os.remove(os.path.join(output_dir, filename))
+
+def manifest_path_for(output_dir, channel_name):
+    return os.path.join(output_dir, f"classify_manifest_{channel_name}.json")
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(path, manifest):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+def tail_checksum(path, offset):
+    """SHA-1 of the TAIL_CHECKSUM_BYTES bytes of a file that end at `offset`."""
+    start = max(0, offset - TAIL_CHECKSUM_BYTES)
+    with open(path, "rb") as f:
+        f.seek(start)
+        return hashlib.sha1(f.read(offset - start)).hexdigest()
+
+def full_rebuild_reason(manifest, source, columns, size, ticker_version):
+    """
+    Return why an incremental run must reclassify everything, or None if it can resume.
+    Besides a shrunken file, the bytes just before the stored offset must be unchanged: a
+    scraper that crashed is rolled back to its last checkpoint and appends new rows, so the
+    CSV can outgrow the offset again while different rows sit around it.
+    """
+    if manifest is None:
+        return "no manifest"
+    if manifest.get("format") != MANIFEST_FORMAT:
+        return "cluster file layout changed"
+    if manifest["ticker_version"] != ticker_version:
+        return "ticker list changed"
+    if manifest["source"] != source or manifest["columns"] != columns or size < manifest["offset"]:
+        return "source CSV was replaced or truncated"
+    if manifest.get("tail_checksum") != tail_checksum(source, manifest["offset"]):
+        return "source CSV was rewritten before the last classified row"
+    return None
+
+def cluster_channel_videos_streaming(csv_file_path, output_dir=".", chunksize=DEFAULT_CHUNKSIZE, incremental=False):
+    """
+    Same clustering as `cluster_channel_videos`, with flat memory use: the CSV is read in
+    chunks, every chunk is classified vectorized and appended to JSON Lines cluster files
+    (`{stock}_{channel}.jsonl`, `multi_asset_{channel}.jsonl`, `others_{channel}.jsonl`).
+    Duplicate video ids are dropped across chunks; only the set of seen ids grows with the CSV.
+
+    With `incremental=True`, the run records a manifest (processed video ids, ticker-list
+    version, CSV byte offset), and the next incremental run only reads the rows appended to
+    the CSV since then, skipping videos classified before, and appends them to the existing
+    cluster files. Everything is rebuilt if the ticker list changed. A full run or rebuild
+    first deletes the channel's cluster files, and a full run also removes the manifest.
+    Run it while yt_search.py isn't writing to the same CSV.
+    """
+    channel_name = extract_channel_name_from_path(csv_file_path)
+    print(f"[INFO] Channel name extracted: {channel_name}")
+    matcher = default_matcher()
+
+    source = os.path.abspath(csv_file_path)
+    size = os.path.getsize(csv_file_path)
+    columns = pd.read_csv(csv_file_path, nrows=0).columns.tolist()
+    dtype = {"Video ID": str}
+    manifest_path = manifest_path_for(output_dir, channel_name)
+    reason = full_rebuild_reason(load_manifest(manifest_path), source, columns, size, matcher.version) if incremental else "full run"
+
+    if reason is None:
+        manifest = load_manifest(manifest_path)
+        processed_ids = set(manifest["video_ids"])
+        offset = manifest["offset"]
+        print(f"[INFO] Incremental run from byte {offset} of {size}, {len(processed_ids)} videos already classified.")
+        writers = ClusterWriters(output_dir, mode="a")
+        source_file = open(csv_file_path, "rb")
+        source_file.seek(offset)
+        chunks = pd.read_csv(source_file, header=None, names=columns, dtype=dtype, chunksize=chunksize) if offset < size else []
+    else:
+        print(f"[INFO] Classifying the whole CSV ({reason}).")
+        processed_ids = set()
+        remove_cluster_files(output_dir, channel_name)
+        writers = ClusterWriters(output_dir)
+        source_file = None
+        chunks = pd.read_csv(csv_file_path, dtype=dtype, chunksize=chunksize)
+
+    rows = kept = 0
+    started = time.perf_counter()
+    try:
+        for chunk in chunks:
+            chunk = chunk.rename(columns=COLUMN_NAMES)
+            if 'title' not in chunk.columns or 'video_id' not in chunk.columns:
+                raise ValueError("CSV must contain 'title' and 'video_id' columns")
+            rows += len(chunk)
+            if 'Channel Name' in chunk.columns:
+                chunk = chunk[normalize_channel_name(chunk['Channel Name'].astype(str)) == channel_name]
+            # Skip videos classified before (re-scraped or duplicated rows)
+            chunk = chunk[~chunk["video_id"].isin(processed_ids)].drop_duplicates("video_id")
+            processed_ids.update(chunk["video_id"])
+            kept += len(chunk)
+            if not chunk.empty:
+                classify_chunk(chunk, channel_name, writers, matcher)
+            print(f"[INFO] {rows} rows read, {kept} classified ({rows / (time.perf_counter() - started):,.0f} rows/s)")
+    finally:
+        writers.close()
+        if source_file is not None:
+            source_file.close()
+
+    if incremental:
+        save_manifest(manifest_path, {
+            "format": MANIFEST_FORMAT,
+            "source": source,
+            "columns": columns,
+            "ticker_version": matcher.version,
+            "offset": size,
+            "tail_checksum": tail_checksum(source, size),
+            "video_ids": sorted(processed_ids),
+        })
+    elif os.path.exists(manifest_path):
+        # The rewritten cluster files no longer match the offset and ids it recorded
+        os.remove(manifest_path)
+    for filename, count in sorted(writers.counts.items()):
+        print(f"[INFO] Saved {count} videos to {filename}")
+    print(f"[SUCCESS] Clustering complete for channel: {channel_name}")
+    return writers.counts
+
+# --- CLI entry point ---
+def main():
+    parser = argparse.ArgumentParser(description="Cluster a channel's scraped videos by the stocks named in their titles.")
+    parser.add_argument("csv_file_path", help="Channel CSV written by yt_search.py")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read the CSV in chunks and write JSON Lines cluster files (flat memory use)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Rows per chunk in --stream mode")
+    parser.add_argument("--output-dir", default=".", help="Directory of the cluster files in --stream mode")
+    parser.add_argument("--incremental", action="store_true",
+                        help="With --stream, only classify rows added since the last run (see the manifest)")
+    parser.add_argument("--verbose", action="store_true", help="Print the matched stocks of every title")
+    args = parser.parse_args()
+
+    if args.stream:
+        cluster_channel_videos_streaming(args.csv_file_path, args.output_dir, args.chunksize, args.incremental)
+    else:
+        cluster_channel_videos(args.csv_file_path, verbose=args.verbose)
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,26 @@
-import yt_dlp
-from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled
+import argparse
+import json
+import os
 import re
+import sys
+import time
+from collections import defaultdict
 
-# Define stock keywords
-stock_keywords = {
-    "tesla": ["tsla", "tesla"],
-    "nvidia": ["nvda", "nvidia"],
-    "apple": ["aapl", "apple"],
-    "meta": ["meta", "facebook", "fb"],
-    "amazon": ["amzn", "amazon"],
-    "google": ["googl", "google", "alphabet"],
-    "microsoft": ["msft", "microsoft"],
-    "netflix": ["nflx", "netflix"],
-    "amd": ["amd"],
-    "pltr": ["pltr", "palantir"],
-    "smci": ["smci"],
-    "mu": ["mu", "micron"],
-    "qqq": ["qqq"],
-    "spy": ["spy"]
-}
+# The transcript store lives next to the automated pipeline
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "Automated codes"))
+from transcript_store import TranscriptStore, fetch_segments
+
+from ticker_matcher import default_matcher
+
+# Stock keywords, shared with classify_videos.py (see ticker_matcher.py)
+stock_keywords = default_matcher().stock_keywords
 
 def extract_video_id(url):
     match = re.search(r"(?:v=|youtu\.be/)([^&?/]+)", url)
     return match.group(1) if match else None
 
 def get_stock_mentions(title):
-    title = title.lower()
-    matched_stocks = []
-    for stock, keywords in stock_keywords.items():
-        for keyword in keywords:
-            if re.search(r'\b' + re.escape(keyword) + r'\b', title):
-                matched_stocks.append(stock)
-                break
-    return matched_stocks
+    return default_matcher().match(title)
 
 def filter_transcript(transcript, stock_name, query):
     results = []
@@ -43,7 +31,149 @@ def filter_transcript(transcript, stock_name, query):
             results.append(entry['text'])
     return results
 
+class TranscriptIndex:
+    """
+    Inverted index of one transcript, built once and shared by every query: each
+    whitespace-separated token of the lowercased segments maps to the positions of the
+    segments containing it. Phrases match as substrings of a segment, like
+    `filter_transcript` ("teslas" and "tesla's" match "tesla"): every word of a phrase is
+    resolved to the postings of the vocabulary terms containing it, the postings are
+    intersected, and only the remaining segments are checked for the whole phrase. Words
+    and phrases are resolved once per transcript.
+    """
+
+    def __init__(self, segments):
+        self.segments = list(segments)
+        self.texts = [segment["text"].lower() for segment in self.segments]
+        self.postings = defaultdict(set)  # token -> positions of the segments containing it
+        for position, text in enumerate(self.texts):
+            for token in text.split():
+                self.postings[token].add(position)
+        self._word_positions = {}
+        self._positions = {}
+
+    def word_positions(self, word):
+        """Positions of the segments with a token containing `word`."""
+        if word not in self._word_positions:
+            positions = self.postings[word].copy() if word in self.postings else set()
+            for term, term_positions in self.postings.items():
+                if word in term:
+                    positions |= term_positions
+            self._word_positions[word] = positions
+        return self._word_positions[word]
+
+    def lookup(self, phrase):
+        """Positions of the segments containing `phrase`."""
+        phrase = phrase.lower()
+        if phrase not in self._positions:
+            words = phrase.split()
+            if not words:
+                candidates = range(len(self.texts))  # Blank phrase: no token to look up
+            else:
+                candidates = set.intersection(*(self.word_positions(word) for word in words))
+            if words == [phrase]:
+                positions = set(candidates)  # A single word inside a token is already a substring match
+            else:
+                # Words can match inside different tokens, or be separated by other whitespace
+                positions = {position for position in candidates if phrase in self.texts[position]}
+            self._positions[phrase] = positions
+        return set(self._positions[phrase])
+
+    def stock_positions(self, stock_name):
+        """Positions of the segments mentioning any keyword of a stock."""
+        positions = set()
+        for keyword in stock_keywords[stock_name]:
+            positions |= self.lookup(keyword)
+        return positions
+
+    def search(self, stock_name, topic):
+        """Segments mentioning the stock and the topic, as {start, duration, text} in time order."""
+        positions = self.stock_positions(stock_name)
+        if topic:
+            positions &= self.lookup(topic)
+        return [
+            {"start": self.segments[p].get("start"), "duration": self.segments[p].get("duration"), "text": self.segments[p]["text"]}
+            for p in sorted(positions)
+        ]
+
+def parse_batch_query(query):
+    """'tesla:earnings' -> ('tesla', 'earnings'); a bare topic applies to every stock (None)."""
+    stock, separator, topic = query.partition(":")
+    if separator and stock.strip().lower() in stock_keywords:
+        return stock.strip().lower(), topic.strip()
+    return None, query.strip()
+
+def run_batch(video_ids, queries, output, store, offline=False):
+    """
+    Answer every query against every video's transcript and write one JSON line per
+    (video, stock, topic) with hits.
+    :return: (videos searched, lines written)
+    """
+    parsed_queries = [parse_batch_query(query) for query in queries]
+    searched = written = 0
+    started = time.perf_counter()
+    for video_id in video_ids:
+        try:
+            segments = fetch_segments(video_id, store, offline=offline)
+        except Exception as e:
+            print(f"❌ Failed to fetch transcript of {video_id}: {e}", file=sys.stderr)
+            continue
+        if segments is None:
+            continue
+        index = TranscriptIndex(segments)
+        searched += 1
+
+        for stock, topic in parsed_queries:
+            stocks = [stock] if stock else [name for name in stock_keywords if index.stock_positions(name)]
+            for stock_name in stocks:
+                hits = index.search(stock_name, topic)
+                if hits:
+                    output.write(json.dumps({"video_id": video_id, "stock": stock_name, "topic": topic, "hits": hits}, ensure_ascii=False) + "\n")
+                    written += 1
+
+    elapsed = time.perf_counter() - started
+    print(f"🔎 Searched {searched} transcripts with {len(queries)} queries in {elapsed:.2f}s, {written} result lines.", file=sys.stderr)
+    return searched, written
+
+def batch_main(args):
+    store = TranscriptStore(args.transcript_dir) if args.transcript_dir else TranscriptStore()
+    video_ids = [extract_video_id(source) or source for source in args.sources]
+    if args.sources_file:
+        with open(args.sources_file, "r", encoding="utf-8") as f:
+            video_ids.extend(extract_video_id(line.strip()) or line.strip() for line in f if line.strip())
+    if args.all_stored:
+        video_ids.extend(store.video_ids())
+    video_ids = list(dict.fromkeys(video_ids))
+
+    if args.output == "-":
+        run_batch(video_ids, args.query, sys.stdout, store, args.offline)
+    else:
+        with open(args.output, "w", encoding="utf-8") as output:
+            run_batch(video_ids, args.query, output, store, args.offline)
+
 def main():
+    parser = argparse.ArgumentParser(description="Extract stock mentions from YouTube transcripts (interactive without arguments).")
+    parser.add_argument("sources", nargs="*", help="Video URLs or ids to search in batch mode")
+    parser.add_argument("--sources-file", help="File with one video URL or id per line")
+    parser.add_argument("--all-stored", action="store_true", help="Search every transcript in the local store")
+    parser.add_argument("--query", action="append", default=[],
+                        help="'stock:topic' (e.g. 'tesla:earnings') or a bare topic for every stock; repeatable")
+    parser.add_argument("--output", default="-", help="JSON Lines output file ('-' for stdout)")
+    parser.add_argument("--transcript-dir", default=None, help="Transcript store directory (default: TRANSCRIPT_STORE_DIR)")
+    parser.add_argument("--offline", action="store_true", help="Only use stored transcripts")
+    args = parser.parse_args()
+
+    if args.sources or args.sources_file or args.all_stored:
+        if not args.query:
+            parser.error("batch mode needs at least one --query")
+        batch_main(args)
+    else:
+        interactive_main()
+
+def interactive_main():
+    import yt_dlp
+    from youtube_transcript_api import TranscriptsDisabled
+
     url = input("Enter YouTube URL: ").strip()
     video_id = extract_video_id(url)
     if not video_id:
@@ -81,7 +211,8 @@ def main():
         return
 
     try:
-        transcript = YouTubeTranscriptApi.get_transcript(video_id)
+        # Read from the local transcript store, fetching (and storing) it only the first time
+        transcript = fetch_segments(video_id, TranscriptStore())
     except TranscriptsDisabled:
         print("❌ Transcript is disabled for this video.")
         return
@@ -0,0 +1,47 @@
+"""
+Thread-safe token-bucket rate limiter shared by concurrent scraper workers.
+
+The bucket refills at `rate` tokens per second up to `burst` tokens; every request takes
+one token. Unlike a fixed sleep per request, idle time is banked (up to `burst`), and
+the limit holds globally no matter how many workers share the bucket.
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, with bursts of up to `burst` requests."""
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """
+        Takes `tokens` if available.
+        :return: float, 0.0 on success, otherwise the seconds until enough tokens are available
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        """Blocks until `tokens` are available and takes them."""
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return
+            time.sleep(wait)
@@ -0,0 +1,265 @@
+"""
+Buffered, crash-consistent output for yt_search.py.
+
+`CheckpointWriter` keeps the output and progress files open for the whole run, buffers
+scraped rows, and flushes them once `flush_rows` rows are buffered, or, from a background
+thread, once the oldest buffered row is `flush_interval` seconds old (so rows don't wait
+for the next scraped video during long retry pauses):
+1. the rows are appended to the output and fsync'd,
+2. their URLs plus a `#checkpoint,<output position>` row are appended to the progress
+   file and fsync'd.
+On start, everything after the last checkpoint is discarded. URLs after it are dropped
+from the progress file, and the output is cut back to the checkpointed position. So
+after a crash, output and progress always describe the same set of videos. If the output
+is shorter than the checkpoint (deleted or replaced since), the output and progress are
+discarded and the channel is scraped again. A failed flush keeps its rows buffered for the next one.
+
+Output is CSV by default. With `output_format="parquet"` (requires pyarrow) every flush
+is written as one part file of a `<channel>.parquet/` dataset directory, which
+`pandas.read_parquet` reads directly; the checkpoint position is then the part count.
+"""
+
+import csv
+import io
+import logging
+import os
+import threading
+import time
+
+CSV_HEADER = [
+    "Video ID", "Title", "URL", "Duration", "Uploader",
+    "Channel Name", "Upload Date", "View Count", "Like Count",
+    "Description", "Channel URL", "Thumbnail"
+]
+VIDEO_FIELDS = [
+    "video_id", "title", "url", "duration", "uploader", "channel_name", "upload_date",
+    "view_count", "like_count", "description", "channel_url", "thumbnail"
+]
+INTEGER_FIELDS = {"duration", "view_count", "like_count"}
+OUTPUT_FORMATS = ["csv", "parquet"]
+CHECKPOINT_MARKER = "#checkpoint"
+
+DEFAULT_FLUSH_ROWS = 50
+DEFAULT_FLUSH_INTERVAL = 10.0  # Seconds
+
+
+def _fsync(f):
+    f.flush()
+    os.fsync(f.fileno())
+
+
+class _CsvSink:
+    """Append-only CSV file; its position is the byte size."""
+
+    extension = ".csv"
+
+    def __init__(self, path):
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.reset()
+
+    @staticmethod
+    def _encode(rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode("utf-8")
+
+    def position(self):
+        return self.file.tell()
+
+    def truncate(self, position):
+        self.file.truncate(position)
+        self.file.seek(position)
+
+    def reset(self):
+        """Empties the file down to a fresh header."""
+        self.truncate(0)
+        self.file.write(self._encode([CSV_HEADER]))
+        _fsync(self.file)
+
+    def write(self, videos):
+        self.file.write(self._encode([[video[field] for field in VIDEO_FIELDS] for video in videos]))
+        _fsync(self.file)
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetSink:
+    """Directory of `part-NNNNN.parquet` files; its position is the part count."""
+
+    extension = ".parquet"
+
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow)") from e
+        self.pa, self.pq = pa, pq
+        self.schema = pa.schema([
+            (header, pa.int64() if field in INTEGER_FIELDS else pa.string())
+            for header, field in zip(CSV_HEADER, VIDEO_FIELDS)
+        ])
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _parts(self):
+        return sorted(name for name in os.listdir(self.path) if name.startswith("part-") and name.endswith(".parquet"))
+
+    def position(self):
+        return len(self._parts())
+
+    def truncate(self, position):
+        for name in self._parts()[position:]:
+            os.remove(os.path.join(self.path, name))
+
+    def reset(self):
+        """Removes every part."""
+        self.truncate(0)
+
+    def write(self, videos):
+        columns = {header: [video[field] for video in videos] for header, field in zip(CSV_HEADER, VIDEO_FIELDS)}
+        table = self.pa.table(columns, schema=self.schema)
+        part_path = os.path.join(self.path, f"part-{self.position():05d}.parquet")
+        tmp_path = part_path + ".tmp"
+        self.pq.write_table(table, tmp_path)
+        with open(tmp_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, part_path)
+
+    def close(self):
+        pass
+
+
+class CheckpointWriter:
+    """Long-lived, buffered writer of scraped videos and their progress checkpoints."""
+
+    def __init__(self, output_base, progress_file, output_format="csv",
+                 flush_rows=DEFAULT_FLUSH_ROWS, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        """
+        :param output_base: str, output path without extension (".csv" or ".parquet" is appended)
+        :param progress_file: str, CSV of processed URLs and checkpoints
+        """
+        sink_class = _ParquetSink if output_format == "parquet" else _CsvSink
+        self.output_path = output_base + sink_class.extension
+        self.sink = sink_class(self.output_path)
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.written = 0
+        self._buffer = []  # (video data, video url)
+        self._oldest = None  # When the oldest buffered row was added
+        self._lock = threading.Lock()
+        self.processed_urls = self._recover(progress_file)
+        self.progress = open(progress_file, "ab")
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="scrape-flusher", daemon=True)
+        self._flusher.start()
+
+    def _recover(self, progress_file):
+        """Loads the checkpointed URLs and rolls the output and progress back to the last checkpoint."""
+        committed, pending = set(), []
+        checkpoint, checkpoint_end = None, 0
+        if os.path.exists(progress_file):
+            with open(progress_file, "rb") as f:
+                data = f.read()
+            offset = 0
+            for line in data.splitlines(keepends=True):
+                offset += len(line)
+                if not line.endswith(b"\n"):
+                    break  # Torn last line of a crashed write
+                row = next(csv.reader([line.decode("utf-8")]), [])
+                if not row or row[0] == "Processed URL":
+                    continue
+                if row[0] == CHECKPOINT_MARKER:
+                    committed.update(pending)
+                    pending = []
+                    checkpoint, checkpoint_end = int(row[1]), offset
+                else:
+                    pending.append(row[0])
+        else:
+            with open(progress_file, "wb") as f:
+                f.write(b"Processed URL\r\n")
+
+        if checkpoint is None:
+            # New or pre-checkpoint progress file: trust it as is and checkpoint the current output
+            committed.update(pending)
+            with open(progress_file, "ab") as f:
+                f.write(_CsvSink._encode([[CHECKPOINT_MARKER, self.sink.position()]]))
+                _fsync(f)
+        elif self.sink.position() < checkpoint:
+            # The output was deleted, replaced or cut short: truncating would pad it with NUL bytes,
+            # and appending to what is left could continue a torn row, so it is started over
+            logging.warning(f"⚠ {self.output_path} is shorter than its last checkpoint, starting a fresh scrape.")
+            committed = set()
+            self.sink.reset()
+            with open(progress_file, "wb") as f:
+                f.write(b"Processed URL\r\n")
+                f.write(_CsvSink._encode([[CHECKPOINT_MARKER, self.sink.position()]]))
+                _fsync(f)
+        else:
+            with open(progress_file, "r+b") as f:
+                f.truncate(checkpoint_end)
+            if self.sink.position() != checkpoint:
+                logging.warning(f"⚠ Rolling {self.output_path} back to its last checkpoint.")
+                self.sink.truncate(checkpoint)
+        return committed
+
+    def add(self, video_data, video_url):
+        """Buffers a scraped video; flushes when the size or time threshold is reached."""
+        with self._lock:
+            self._buffer.append((video_data, video_url))
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            due = len(self._buffer) >= self.flush_rows or time.monotonic() - self._oldest >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered rows, then checkpoints their URLs. On failure the rows stay buffered."""
+        with self._lock:
+            batch = self._buffer
+            if not batch:
+                return
+            output_start, progress_start = self.sink.position(), self.progress.tell()
+            try:
+                self.sink.write([video for video, _ in batch])
+                rows = [[url] for _, url in batch] + [[CHECKPOINT_MARKER, self.sink.position()]]
+                self.progress.write(_CsvSink._encode(rows))
+                _fsync(self.progress)
+            except Exception:
+                # Undo the partial write so the retried batch isn't written twice
+                try:
+                    self.sink.truncate(output_start)
+                    self.progress.truncate(progress_start)
+                except OSError as e:
+                    logging.error(f"❌ Could not roll back {self.output_path}, the next start will: {e}")
+                raise
+            self._buffer, self._oldest = [], None
+            self.processed_urls.update(url for _, url in batch)
+            self.written += len(batch)
+
+    def _flush_periodically(self):
+        while not self._closed.wait(min(self.flush_interval, 1.0)):
+            with self._lock:
+                due = self._oldest is not None and time.monotonic() - self._oldest >= self.flush_interval
+            if due:
+                try:
+                    self.flush()
+                except Exception as e:
+                    logging.error(f"❌ Periodic flush of {self.output_path} failed: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._closed.set()
+        self._flusher.join()
+        try:
+            self.flush()
+        finally:
+            self.progress.close()
+            self.sink.close()
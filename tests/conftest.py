@@ -0,0 +1,23 @@
+"""
+Shared fixtures. The modules live in script directories rather than packages, so they
+are put on sys.path the way the benchmarks do it. MongoDB tests run on mongomock, or on
+a scratch database of a real server if `TEST_MONGO_URI` is set.
+"""
+
+import os
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [REPO_DIR, os.path.join(REPO_DIR, "Automated codes"), os.path.join(REPO_DIR, "RAG model"),
+                os.path.join(REPO_DIR, "benchmarks")]
+
+
+@pytest.fixture
+def collection():
+    from stubs import bench_collection
+
+    collection = bench_collection(os.environ.get("TEST_MONGO_URI"))
+    yield collection
+    collection.drop()
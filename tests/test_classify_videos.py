@@ -0,0 +1,63 @@
+import json
+import os
+
+import pytest
+
+import classify_videos
+
+
+def write_csv(path, titles, mode="w"):
+    with open(path, mode, encoding="utf-8") as f:
+        if mode == "w":
+            f.write("Title,Video ID,Upload Date\n")
+        for video_id, title in titles:
+            f.write(f"{title},{video_id},2024-08-01\n")
+
+
+def classified_ids(output_dir):
+    ids = set()
+    for filename in os.listdir(output_dir):
+        if filename.endswith(".jsonl"):
+            with open(os.path.join(output_dir, filename), encoding="utf-8") as f:
+                ids.update(json.loads(line)["video_id"] for line in f)
+    return ids
+
+
+@pytest.fixture
+def paths(tmp_path):
+    output_dir = tmp_path / "clusters"
+    output_dir.mkdir()
+    return str(tmp_path / "channel_-_videos.csv"), str(output_dir)
+
+
+def run(csv_path, output_dir):
+    return classify_videos.cluster_channel_videos_streaming(csv_path, output_dir, incremental=True)
+
+
+def test_incremental_run_only_reads_appended_rows(paths):
+    csv_path, output_dir = paths
+    write_csv(csv_path, [("a", "Tesla earnings"), ("b", "Gold outlook")])
+    run(csv_path, output_dir)
+    write_csv(csv_path, [("c", "Tesla delivery numbers")], mode="a")
+    manifest = classify_videos.load_manifest(classify_videos.manifest_path_for(output_dir, "channel"))
+    assert classify_videos.full_rebuild_reason(manifest, os.path.abspath(csv_path), manifest["columns"],
+                                               os.path.getsize(csv_path), manifest["ticker_version"]) is None
+    run(csv_path, output_dir)
+    assert classified_ids(output_dir) == {"a", "b", "c"}
+
+
+def test_rows_rewritten_before_the_offset_force_a_rebuild(paths):
+    csv_path, output_dir = paths
+    write_csv(csv_path, [("a", "Tesla earnings"), ("b", "Gold outlook"), ("c", "Tesla delivery numbers")])
+    run(csv_path, output_dir)
+    # The scraper rolled back to a checkpoint after "a" and then appended more rows than it dropped
+    write_csv(csv_path, [("a", "Tesla earnings")])
+    write_csv(csv_path, [("d", "Apple keynote recap"), ("e", "Bitcoin halving explained"),
+                         ("f", "Nvidia guidance and more")], mode="a")
+    manifest = classify_videos.load_manifest(classify_videos.manifest_path_for(output_dir, "channel"))
+    assert os.path.getsize(csv_path) > manifest["offset"]
+    assert classify_videos.full_rebuild_reason(manifest, os.path.abspath(csv_path), manifest["columns"],
+                                               os.path.getsize(csv_path), manifest["ticker_version"]) \
+        == "source CSV was rewritten before the last classified row"
+    run(csv_path, output_dir)
+    assert classified_ids(output_dir) == {"a", "d", "e", "f"}
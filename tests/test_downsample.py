@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from downsample import downsample_frame, lttb_indices
+
+
+def noisy_series(n, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.arange(n, dtype=np.float64)
+    y = np.cumsum(rng.normal(size=n))
+    return x, y
+
+
+def test_lttb_keeps_the_endpoints_and_extremes():
+    x, y = noisy_series(10_000)
+    kept = lttb_indices(x, y, 500)
+    assert kept[0] == 0 and kept[-1] == len(y) - 1
+    assert int(np.argmin(y)) in kept and int(np.argmax(y)) in kept
+    assert np.all(np.diff(kept) > 0)
+    assert 500 <= len(kept) <= 502  # The extremes may come on top of the LTTB points
+
+
+def test_lttb_keeps_a_spike_inside_a_bucket():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.zeros(1000)
+    y[123] = 5.0
+    y[700] = -3.0
+    kept = lttb_indices(x, y, 20)
+    assert 123 in kept and 700 in kept
+
+
+def test_short_series_and_small_thresholds_are_left_alone():
+    x, y = noisy_series(50)
+    assert np.array_equal(lttb_indices(x, y, 50), np.arange(50))
+    assert np.array_equal(lttb_indices(x, y, 2), np.arange(50))
+
+
+def test_downsample_frame_reduces_long_date_series_in_order():
+    x, y = noisy_series(5000)
+    df = pd.DataFrame({"date": pd.date_range("2020-01-01", periods=5000, freq="h"), "price": y})
+    small = downsample_frame(df, "date", "price", max_points=300)
+    assert len(small) <= 302
+    assert small["date"].is_monotonic_increasing
+    assert small["date"].iloc[0] == df["date"].iloc[0] and small["date"].iloc[-1] == df["date"].iloc[-1]
+    assert small["price"].max() == df["price"].max() and small["price"].min() == df["price"].min()
+    assert len(downsample_frame(df.head(100), "date", "price", max_points=300)) == 100
@@ -0,0 +1,33 @@
+import pytest
+
+from extract_stock_data import TranscriptIndex, filter_transcript
+
+SEGMENTS = [
+    {"text": "Tesla's earnings beat estimates", "start": 0.0, "duration": 3.0},
+    {"text": "TSLA  support level near 200", "start": 3.0, "duration": 2.5},
+    {"text": "Teslas everywhere, support levels holding", "start": 5.5, "duration": 4.0},
+    {"text": "Nothing about cars here", "start": 9.5, "duration": 1.0},
+    {"text": "gold and tesla support\nlevel", "start": 10.5, "duration": 2.0},
+]
+
+
+@pytest.mark.parametrize("topic", ["earnings", "support level", "pport lev", "levels", "'s ear", "cars", "200"])
+def test_search_matches_filter_transcript(topic):
+    index = TranscriptIndex(SEGMENTS)
+    expected = filter_transcript(SEGMENTS, "tesla", topic)
+    assert [hit["text"] for hit in index.search("tesla", topic)] == expected
+
+
+def test_phrases_match_inside_tokens_and_hits_keep_their_timing():
+    index = TranscriptIndex(SEGMENTS)
+    assert index.lookup("tesla") == {0, 2, 4}
+    assert index.lookup("Support Level") == {1, 2}  # Not segment 4: a newline is not the phrase's space
+    assert index.search("tesla", "earnings") == [{"start": 0.0, "duration": 3.0, "text": SEGMENTS[0]["text"]}]
+
+
+def test_postings_map_tokens_to_segments():
+    index = TranscriptIndex(SEGMENTS)
+    assert index.postings["support"] == {1, 2, 4}
+    assert index.postings["level"] == {1, 4}
+    assert index.postings["tesla's"] == {0}
+    assert index.word_positions("level") == {1, 2, 4}  # "levels" contains it
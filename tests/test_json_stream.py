@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from json_stream import JsonObjectScanner, parse_streamed_object, validate_insights
+
+INSIGHTS = {
+    "narrative": "DECISIVE", "direction": "LONG", "Support": [180.5], "Resistance": [210],
+    "Buy_Area": [[185, 180]], "Sell_Area": [[205, 210]],
+}
+
+
+def chunked(text, size):
+    return [text[start:start + size] for start in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 1000])
+def test_scanner_returns_the_object_whatever_the_chunking(size):
+    text = "Sure! Here it is:\n" + json.dumps(INSIGHTS) + "\nLet me know if you need more."
+    scanner = JsonObjectScanner()
+    found = [result for chunk in chunked(text, size) if (result := scanner.feed(chunk)) is not None]
+    assert [json.loads(result) for result in found] == [INSIGHTS]
+    assert scanner.complete
+
+
+def test_braces_and_escaped_quotes_inside_strings_are_ignored():
+    text = '{"note": "a } and a \\" and a {", "nested": {"x": 1}}'
+    assert JsonObjectScanner().feed(text) == text
+
+
+def test_parse_stops_reading_once_the_object_is_complete():
+    consumed = []
+
+    def stream():
+        for chunk in ['{"a": ', '1}', ' trailing', ' tokens']:
+            consumed.append(chunk)
+            yield chunk
+
+    assert parse_streamed_object(stream()) == {"a": 1}
+    assert consumed == ['{"a": ', '1}']
+
+
+def test_parse_rejects_an_incomplete_stream():
+    with pytest.raises(ValueError):
+        parse_streamed_object(['{"narrative": "DECISIVE"'])
+
+
+def test_validate_accepts_the_schema():
+    assert validate_insights(dict(INSIGHTS)) == INSIGHTS
+
+
+@pytest.mark.parametrize("change", [
+    {"direction": "UP"},
+    {"Support": ["180"]},
+    {"Buy_Area": [[185]]},
+    {"Support": [True]},
+    {"extra": 1},
+])
+def test_validate_rejects_schema_violations(change):
+    with pytest.raises(ValueError):
+        validate_insights(dict(INSIGHTS, **change))
+
+
+def test_validate_rejects_missing_fields():
+    insights = dict(INSIGHTS)
+    del insights["Sell_Area"]
+    with pytest.raises(ValueError):
+        validate_insights(insights)
+
+
+def test_streamed_sse_answer_of_the_stub_server_parses():
+    from lm_client import LMStudioClient
+    from stub_lm_server import start_stub_server
+
+    server, url = start_stub_server()
+    client = LMStudioClient(url)
+    try:
+        stream = client.stream_chat({"model": "mistral", "messages": [{"role": "user", "content": "hi"}]})
+        try:
+            insights = parse_streamed_object(stream)
+        finally:
+            stream.close()
+    finally:
+        client.close()
+        server.shutdown()
+    assert validate_insights(insights) == insights
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+import requests
+
+from lm_client import LMStudioClient
+from stub_lm_server import start_stub_server
+
+PAYLOAD = {"model": "mistral", "messages": [{"role": "user", "content": "Analyze"}]}
+
+
+@pytest.fixture
+def stub():
+    server, url = start_stub_server()
+    yield server, url
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(url, **kwargs):
+    kwargs.setdefault("backoff_base", 0.0)  # Full-jitter backoff of 0 seconds
+    return LMStudioClient(api_url=url, timeout=5.0, **kwargs)
+
+
+def free_slots(client):
+    """Number of in-flight slots that can be taken right now (all of them are given back)."""
+    taken = 0
+    while taken < client.max_in_flight + 1 and client._in_flight.acquire(blocking=False):
+        taken += 1
+    for _ in range(taken):
+        client._in_flight.release()
+    return taken
+
+
+def record_responses(client):
+    responses = []
+    post = client.session.post
+
+    def recording_post(*args, **kwargs):
+        response = post(*args, **kwargs)
+        responses.append(response)
+        return response
+
+    client.session.post = recording_post
+    return responses
+
+
+def test_transient_failures_are_retried(stub):
+    server, url = stub
+    server.fail_next = 2
+    client = make_client(url, max_retries=3)
+    answer = client.chat(PAYLOAD)
+    assert answer["choices"][0]["message"]["content"]
+    assert client.retries == 2
+    assert server.requests_served == 3
+    assert free_slots(client) == client.max_in_flight
+
+
+def test_exhausted_retries_raise_and_release_the_slots(stub):
+    server, url = stub
+    server.fail_next = 10
+    client = make_client(url, max_retries=2, max_in_flight=2)
+    with pytest.raises(requests.exceptions.HTTPError, match="503"):
+        client.chat(PAYLOAD)
+    assert server.requests_served == 3
+    assert free_slots(client) == 2
+
+
+def test_client_errors_are_not_retried_and_close_the_response(stub):
+    server, url = stub
+    server.fail_next, server.fail_status = 1, 400
+    client = make_client(url, max_retries=3, max_in_flight=1)
+    responses = record_responses(client)
+    with pytest.raises(requests.exceptions.HTTPError, match="400"):
+        list(client.stream_chat(PAYLOAD))
+    assert server.requests_served == 1
+    assert client.retries == 0
+    assert responses[0].raw.closed
+    assert free_slots(client) == 1
+    assert "".join(client.stream_chat(PAYLOAD)).startswith('{"narrative"')
+
+
+def test_connection_errors_are_retried():
+    server, url = start_stub_server()
+    server.shutdown()
+    server.server_close()  # Nothing listens on the port any more
+    client = make_client(url, max_retries=2)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.chat(PAYLOAD)
+    assert client.retries == 2
+    assert free_slots(client) == client.max_in_flight
+
+
+def test_achat_many_keeps_order_bounds_concurrency_and_returns_errors(stub):
+    server, url = stub
+    server.latency = 0.05
+    server.fail_next, server.fail_status = 1, 400
+    client = make_client(url, max_in_flight=2)
+    results = asyncio.run(client.achat_many([PAYLOAD] * 6))
+    assert len(results) == 6
+    errors = [result for result in results if isinstance(result, Exception)]
+    assert len(errors) == 1 and isinstance(errors[0], requests.exceptions.HTTPError)
+    assert all(result["choices"] for result in results if not isinstance(result, Exception))
+    assert server.peak_active <= 2
+    assert free_slots(client) == 2
+
+
+def test_each_event_loop_gets_its_own_semaphore(stub):
+    _, url = stub
+    client = make_client(url, max_in_flight=1)
+    for _ in range(2):  # A semaphore bound to the first loop would fail on the second one
+        assert asyncio.run(client.achat(PAYLOAD))["choices"]
@@ -0,0 +1,100 @@
+import json
+import re
+import urllib.request
+
+import pytest
+
+from pipeline_metrics import PipelineMetrics, percentile, start_metrics_server
+
+SAMPLE_LINE = re.compile(r'^([a-z_]+)(\{[a-z_]+="[^"]*"(,[a-z_]+="[^"]*")*\})? (-?[0-9.e+-]+|NaN)$')
+
+
+@pytest.mark.parametrize("fraction, expected", [(0.0, 1), (0.5, 50), (0.95, 95), (0.99, 99), (1.0, 100)])
+def test_nearest_rank_percentile(fraction, expected):
+    assert percentile(list(range(1, 101)), fraction) == expected
+
+
+def test_percentile_of_few_or_no_values():
+    assert percentile([], 0.5) is None
+    assert percentile([7], 0.99) == 7
+    assert percentile([1, 2], 0.5) == 1
+
+
+def test_stage_records_outcomes_sizes_and_errors():
+    metrics = PipelineMetrics()
+    with metrics.stage("llm") as sample:
+        sample.add_input("three word prompt")
+        sample.add_output("é")
+    with metrics.stage("llm") as sample:
+        sample.skip()
+    with pytest.raises(RuntimeError):
+        with metrics.stage("llm", items=2):
+            raise RuntimeError("LM Studio down")
+
+    stats = metrics.snapshot()["stages"]["llm"]
+    assert stats["items"] == {"ok": 1, "skip": 1, "error": 2}
+    assert stats["calls"] == 3
+    assert (stats["bytes_in"], stats["tokens_in"], stats["bytes_out"], stats["tokens_out"]) == (17, 3, 2, 1)
+
+
+def test_reservoir_stays_bounded_and_keeps_exact_percentiles_below_it():
+    metrics = PipelineMetrics(max_samples=100)
+    for i in range(1, 101):
+        metrics.record("summarize", i / 100)
+    latency = metrics.snapshot()["stages"]["summarize"]["latency_seconds"]
+    assert latency == {"p50": 0.5, "p95": 0.95, "p99": 0.99}
+
+    for _ in range(10_000):
+        metrics.record("summarize", 5.0)
+    assert len(metrics._stages["summarize"].samples) == 100
+    stats = metrics.snapshot()["stages"]["summarize"]
+    assert stats["calls"] == 10_100
+    assert stats["latency_seconds"]["p50"] == 5.0  # Old samples are replaced at random, in proportion
+
+
+def test_prometheus_exposition_format():
+    metrics = PipelineMetrics()
+    for i in range(1, 11):
+        metrics.record("transcript", i / 10, bytes_out=100)
+    metrics.record("mongo", 0.2, outcome="error", items=3)
+    text = metrics.prometheus()
+    assert text.endswith("\n")
+
+    declared = {}
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            declared[name] = kind
+        elif not line.startswith("# HELP "):
+            match = SAMPLE_LINE.match(line)
+            assert match, line
+            base = re.sub(r"_(sum|count)$", "", match.group(1))
+            assert match.group(1) in declared or base in declared, line
+    assert declared == {
+        "pipeline_stage_items_total": "counter", "pipeline_stage_seconds": "summary",
+        "pipeline_stage_bytes_total": "counter", "pipeline_stage_tokens_total": "counter",
+        "pipeline_run_start_time_seconds": "gauge",
+    }
+
+    assert 'pipeline_stage_items_total{stage="transcript",outcome="ok"} 10' in text
+    assert 'pipeline_stage_items_total{stage="mongo",outcome="error"} 3' in text
+    assert 'pipeline_stage_seconds{stage="transcript",quantile="0.5"} 0.5' in text
+    assert 'pipeline_stage_seconds{stage="transcript",quantile="0.99"} 1.0' in text
+    assert 'pipeline_stage_seconds_count{stage="transcript"} 10' in text
+    assert 'pipeline_stage_bytes_total{stage="transcript",direction="out"} 1000' in text
+
+
+def test_metrics_server_serves_both_formats():
+    metrics = PipelineMetrics()
+    metrics.record("metadata", 0.1)
+    server = start_metrics_server(metrics, 0)
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(base + "/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert 'stage="metadata"' in response.read().decode("utf-8")
+        with urllib.request.urlopen(base + "/metrics.json") as response:
+            assert json.load(response)["stages"]["metadata"]["calls"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,47 @@
+import threading
+import time
+
+import pytest
+
+from rate_limit import TokenBucket
+
+
+def test_burst_is_available_at_once_then_the_bucket_waits():
+    bucket = TokenBucket(rate=10, burst=3)
+    assert [bucket.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    wait = bucket.try_acquire()
+    assert 0.05 < wait <= 0.1
+
+
+def test_shared_bucket_sustains_its_rate_across_threads():
+    rate, requests = 50, 40
+    bucket = TokenBucket(rate=rate, burst=1)
+    bucket.acquire()  # Empty the bucket, so every request below has to wait for a refill
+    started = time.monotonic()
+
+    def worker():
+        for _ in range(requests // 4):
+            bucket.acquire()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    assert requests / rate * 0.9 <= elapsed < requests / rate * 2
+
+
+def test_idle_time_is_banked_up_to_the_burst(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    bucket = TokenBucket(rate=2, burst=4)
+    for _ in range(4):
+        bucket.try_acquire()
+    now[0] += 60  # Far longer than needed to refill
+    assert [bucket.try_acquire() for _ in range(5)] == [0.0] * 4 + [pytest.approx(0.5)]
+
+
+def test_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
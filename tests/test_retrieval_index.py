@@ -0,0 +1,82 @@
+import json
+import os
+
+import pytest
+
+import retrieval_index
+from retrieval_index import RetrievalIndex
+from transcript_store import TranscriptStore
+
+TRANSCRIPTS = {
+    "vid_tesla": ["Tesla support level is near 245.50", "deliveries beat estimates this quarter"],
+    "vid_gold": ["gold keeps rising", "central banks buy more gold"],
+    "vid_nvda": ["Nvidia earnings — résumé of the guidance", "data center demand is strong"],
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TranscriptStore(str(tmp_path / "transcripts"))
+    for video_id, texts in TRANSCRIPTS.items():
+        store.save(video_id, [{"text": text, "start": 40.0 * i, "duration": 40.0} for i, text in enumerate(texts)])
+    return store
+
+
+@pytest.fixture
+def index_dir(tmp_path):
+    return str(tmp_path / "index")
+
+
+def test_index_is_not_touched_before_first_use(index_dir):
+    index = RetrievalIndex(index_dir)
+    assert index.manifest is None
+    assert index.add_videos(None, []) == 0
+    assert not os.path.exists(index_dir)
+
+
+def test_search_reads_chunks_from_mapped_files(store, index_dir):
+    index = RetrievalIndex(index_dir)
+    assert index.sync(store) == 6
+    hits = RetrievalIndex(index_dir).search("tesla support level", k=2)
+    assert hits[0]["video_id"] == "vid_tesla"
+    assert hits[0]["start"] == 0.0
+    assert hits[0]["text"] == "Tesla support level is near 245.50"
+    assert hits[0]["url"] == "https://www.youtube.com/watch?v=vid_tesla&t=0s"
+    assert RetrievalIndex(index_dir).search("résumé guidance")[0]["text"].startswith("Nvidia earnings — résumé")
+    part = os.path.join(index_dir, index.manifest["parts"][0])
+    assert not os.path.exists(os.path.join(part, "chunks.json"))
+
+
+def test_compaction_keeps_retired_parts_for_open_readers(store, index_dir, monkeypatch):
+    writer = RetrievalIndex(index_dir)
+    for video_id in TRANSCRIPTS:
+        writer.add_videos(store, [video_id])
+    reader = RetrievalIndex(index_dir)
+    assert reader.chunk_count == 6
+    old_parts = list(writer.manifest["parts"])
+
+    writer.compact()
+    assert len(writer.manifest["parts"]) == 1
+    assert all(os.path.isdir(os.path.join(index_dir, name)) for name in old_parts)
+    assert reader.search("gold")[0]["video_id"] == "vid_gold"  # Still on the old parts
+
+    monkeypatch.setattr(retrieval_index, "RETIRED_PART_GRACE_SECONDS", 0.0)
+    store.save("vid_new", [{"text": "bitcoin halving", "start": 0.0, "duration": 5.0}])
+    writer.add_videos(store, ["vid_new"])
+    assert not any(os.path.exists(os.path.join(index_dir, name)) for name in old_parts)
+    assert writer.manifest["retired"] == []
+
+    reader.reload()
+    assert reader.chunk_count == 7
+    assert reader.search("bitcoin")[0]["video_id"] == "vid_new"
+
+
+def test_index_with_an_old_layout_starts_over(store, index_dir):
+    os.makedirs(os.path.join(index_dir, "part-00001"))
+    with open(os.path.join(index_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"parts": ["part-00001"], "indexed_videos": ["vid_gold"], "next_part": 2}, f)
+    index = RetrievalIndex(index_dir)
+    assert index.search("gold") == []
+    assert index.sync(store) == 6
+    assert index.manifest["parts"] == ["part-00002"]
+    assert index.search("gold")[0]["video_id"] == "vid_gold"
@@ -0,0 +1,99 @@
+import csv
+
+import pytest
+
+from scrape_writer import CHECKPOINT_MARKER, CSV_HEADER, VIDEO_FIELDS, CheckpointWriter
+
+
+def video(index):
+    return {field: index if field in ("duration", "view_count", "like_count") else f"{field}{index}"
+            for field in VIDEO_FIELDS}
+
+
+def output_ids(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [row[0] for row in list(csv.reader(f))[1:]]
+
+
+def recovered_urls(output_base, progress_file):
+    with CheckpointWriter(output_base, progress_file) as writer:
+        return writer.processed_urls
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "channel"), str(tmp_path / "channel_progress.csv")
+
+
+def test_rows_are_checkpointed_per_flush(paths):
+    output_base, progress_file = paths
+    with CheckpointWriter(output_base, progress_file, flush_rows=2, flush_interval=60) as writer:
+        for index in range(3):
+            writer.add(video(index), f"url{index}")
+    assert output_ids(output_base + ".csv") == ["video_id0", "video_id1", "video_id2"]
+    assert recovered_urls(output_base, progress_file) == {"url0", "url1", "url2"}
+
+
+def test_crash_after_the_last_checkpoint_is_rolled_back(paths):
+    output_base, progress_file = paths
+    with CheckpointWriter(output_base, progress_file, flush_rows=2, flush_interval=60) as writer:
+        writer.add(video(0), "url0")
+        writer.add(video(1), "url1")
+    # A crash while flushing: rows and URLs written, checkpoint row torn
+    with open(output_base + ".csv", "a", encoding="utf-8") as f:
+        f.write("video_id2,half a row")
+    with open(progress_file, "a", encoding="utf-8") as f:
+        f.write(f"url2\r\n{CHECKPOINT_MARKER},99")
+
+    assert recovered_urls(output_base, progress_file) == {"url0", "url1"}
+    assert output_ids(output_base + ".csv") == ["video_id0", "video_id1"]
+
+
+def test_shortened_output_starts_a_fresh_scrape_without_padding(paths):
+    output_base, progress_file = paths
+    with CheckpointWriter(output_base, progress_file, flush_rows=1, flush_interval=60) as writer:
+        writer.add(video(0), "url0")
+    with open(output_base + ".csv", "r+b") as f:
+        f.truncate(20)
+
+    assert recovered_urls(output_base, progress_file) == set()
+    with open(output_base + ".csv", "rb") as f:
+        assert b"\0" not in f.read()
+    with CheckpointWriter(output_base, progress_file, flush_rows=1, flush_interval=60) as writer:
+        writer.add(video(1), "url1")
+    with open(output_base + ".csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == CSV_HEADER
+    assert [row[0] for row in rows[1:]] == ["video_id1"]
+    assert all(len(row) == len(CSV_HEADER) for row in rows)
+    assert recovered_urls(output_base, progress_file) == {"url1"}
+
+
+def test_failed_flush_keeps_the_rows_for_the_next_one(paths):
+    output_base, progress_file = paths
+    writer = CheckpointWriter(output_base, progress_file, flush_rows=10, flush_interval=60)
+    write = writer.sink.write
+
+    def failing_write(videos):
+        writer.sink.file.write(b"partial")
+        raise OSError("No space left on device")
+
+    writer.sink.write = failing_write
+    writer.add(video(0), "url0")
+    with pytest.raises(OSError):
+        writer.flush()
+
+    writer.sink.write = write
+    writer.close()
+    assert output_ids(output_base + ".csv") == ["video_id0"]
+    assert recovered_urls(output_base, progress_file) == {"url0"}
+
+
+def test_parquet_parts_are_checkpointed(paths):
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    output_base, progress_file = paths
+    with CheckpointWriter(output_base, progress_file, output_format="parquet", flush_rows=1, flush_interval=60) as writer:
+        writer.add(video(0), "url0")
+        writer.add(video(1), "url1")
+    assert pd.read_parquet(output_base + ".parquet")["Video ID"].tolist() == ["video_id0", "video_id1"]
@@ -0,0 +1,97 @@
+import builtins
+import threading
+
+import pytest
+
+import staged_pipeline
+from staged_pipeline import Stage, run_pipeline
+
+
+def run(items, stages, timeout=10):
+    """run_pipeline in a thread, so a pipeline that never shuts down fails instead of hanging."""
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(stats=run_pipeline(items, stages)), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "pipeline did not shut down"
+    return result["stats"]
+
+
+def collector():
+    collected, lock = [], threading.Lock()
+
+    def collect(item):
+        with lock:
+            collected.append(item)
+        return item
+    return collected, collect
+
+
+def test_every_item_reaches_the_last_stage_before_it_stops():
+    collected, collect = collector()
+    stages = [Stage("double", lambda x: x * 2, workers=4, queue_size=2),
+              Stage("batch", lambda xs: [x + 1 for x in xs], workers=2, queue_size=2, batch_size=5, batch_timeout=0.01),
+              Stage("collect", collect, workers=3, queue_size=2)]
+    stats = run(range(200), stages)
+    assert sorted(collected) == [x * 2 + 1 for x in range(200)]
+    assert [stage["processed"] for stage in stats] == [200, 200, 200]
+
+
+def test_dropped_and_failed_items_are_counted():
+    collected, collect = collector()
+
+    def check(x):
+        if x % 5 == 0:
+            raise ValueError("bad item")
+        return x if x % 2 else None
+
+    stats = run(range(20), [Stage("check", check, workers=2), Stage("collect", collect)])
+    assert sorted(collected) == [1, 3, 7, 9, 11, 13, 17, 19]
+    assert stats[0]["errors"] == 4
+    assert stats[0]["dropped"] == 8
+    assert stats[0]["processed"] == 8
+
+
+def test_batch_stage_returning_a_non_list_fails_the_batch_only():
+    collected, collect = collector()
+    stages = [Stage("broken", lambda xs: 42 if 0 in xs else xs, batch_size=4, batch_timeout=0.01),
+              Stage("collect", collect)]
+    stats = run(range(8), stages)
+    assert stats[0]["errors"] + stats[0]["processed"] == 8
+    assert sorted(collected) == [x for x in range(8) if x >= stats[0]["errors"]]
+
+
+def test_unreportable_failure_still_shuts_the_pipeline_down(monkeypatch):
+    def broken_print(*args, **kwargs):
+        raise BrokenPipeError("stdout closed")
+
+    monkeypatch.setattr(builtins, "print", broken_print)
+    collected, collect = collector()
+
+    def fail(x):
+        raise RuntimeError("boom")
+
+    stats = run(range(10), [Stage("fail", fail), Stage("collect", collect)])
+    assert stats[0]["errors"] == 10
+    assert collected == []
+
+
+def test_crashed_worker_drains_its_queue_and_stops_the_next_stage(monkeypatch):
+    process_batch = staged_pipeline._process_batch
+
+    def crash_on_first(stage, next_stage, batch):
+        if stage.name == "crash" and batch == [0]:
+            raise KeyboardInterrupt  # Escapes the per-batch error handling
+        process_batch(stage, next_stage, batch)
+
+    monkeypatch.setattr(staged_pipeline, "_process_batch", crash_on_first)
+    monkeypatch.setattr(threading, "excepthook", lambda args: None)
+    collected, collect = collector()
+    stats = run(range(50), [Stage("crash", lambda x: x, queue_size=2), Stage("collect", collect)])
+    assert collected == []
+    assert stats[0]["errors"] == 49
+
+
+def test_stage_needs_a_worker():
+    with pytest.raises(ValueError):
+        Stage("empty", lambda x: x, workers=0)
@@ -0,0 +1,22 @@
+from summarization import SUMMARIZER_CONFIGS
+from summary_cache import SummaryCache, summary_key
+
+CONFIG = SUMMARIZER_CONFIGS["t5"]
+
+
+def test_batching_settings_keep_cached_summaries(tmp_path):
+    cache = SummaryCache(str(tmp_path / "summaries.sqlite3"))
+    cache.put(summary_key("t5", CONFIG, "transcript"), "t5", "summary")
+    tuned = dict(CONFIG, batch_size=CONFIG["batch_size"] * 2, max_batch_tokens=CONFIG["max_batch_tokens"] * 2)
+    assert cache.get(summary_key("t5", tuned, "transcript")) == "summary"
+    cache.close()
+
+
+def test_output_settings_change_the_key():
+    key = summary_key("t5", CONFIG, "transcript")
+    assert summary_key("t5", dict(CONFIG, model_name="t5-base"), "transcript") != key
+    assert summary_key("t5", dict(CONFIG, prefix="summarize: "), "transcript") != key
+    assert summary_key("t5", dict(CONFIG, max_input_length=1024), "transcript") != key
+    assert summary_key("t5", dict(CONFIG, generate=dict(CONFIG["generate"], num_beams=2)), "transcript") != key
+    assert summary_key("longt5", CONFIG, "transcript") != key
+    assert summary_key("t5", CONFIG, "other transcript") != key
@@ -0,0 +1,105 @@
+import main
+from sync_state import ChannelSyncState
+
+CHANNEL = "https://www.youtube.com/@channel/videos"
+
+
+def entry(video_id, upload_date="20240801", title="Tesla update"):
+    return {"id": video_id, "upload_date": upload_date, "title": title,
+            "url": f"https://www.youtube.com/watch?v={video_id}"}
+
+
+def test_state_round_trips_and_keeps_other_channels(tmp_path):
+    path = str(tmp_path / "sync_state.json")
+    other = ChannelSyncState("https://www.youtube.com/@other/videos", path)
+    other.mark_processed("x", "20240101")
+    other.save()
+
+    state = ChannelSyncState(CHANNEL, path)
+    state.mark_pending("b")
+    state.mark_processed("a", "20240801")
+    state.save()
+
+    reloaded = ChannelSyncState(CHANNEL, path)
+    assert reloaded.processed_ids == {"a"}
+    assert reloaded.pending_ids == {"b"}
+    assert (reloaded.high_water_date, reloaded.high_water_id) == ("20240801", "a")
+    assert ChannelSyncState("https://www.youtube.com/@other/videos", path).processed_ids == {"x"}
+
+
+def test_high_water_mark_only_advances(tmp_path):
+    state = ChannelSyncState(CHANNEL, str(tmp_path / "sync_state.json"))
+    state.mark_processed("new", "20240901")
+    state.mark_processed("old", "20240701")
+    assert (state.high_water_date, state.high_water_id) == ("20240901", "new")
+    assert state.is_below_high_water("new")
+    assert state.is_below_high_water("older", "20240801")
+    assert not state.is_below_high_water("newer", "20241001")
+
+
+def test_processed_and_skipped_videos_leave_pending(tmp_path):
+    state = ChannelSyncState(CHANNEL, str(tmp_path / "sync_state.json"))
+    for video_id in "abc":
+        state.mark_pending(video_id)
+    state.mark_processed("a", "20240801")
+    state.mark_skipped("b")
+    state.mark_pending("a")  # Already stored, never pending again
+    assert state.pending_ids == {"c"}
+
+
+def test_prefilter_stops_at_the_high_water_mark(tmp_path):
+    state = ChannelSyncState(CHANNEL, str(tmp_path / "sync_state.json"))
+    state.mark_processed("b", "20240801")
+    entries = [entry("c", "20240901"), entry("b", "20240801"), entry("a", "20240701")]
+    urls = main.prefilter_entries(entries, state, {"b"})
+    assert urls == [entries[0]["url"]]
+    assert state.pending_ids == {"c"}
+
+
+def test_prefilter_retries_pending_videos_past_the_high_water_mark(tmp_path):
+    state = ChannelSyncState(CHANNEL, str(tmp_path / "sync_state.json"))
+    state.mark_pending("a")  # Failed on an earlier run
+    state.mark_processed("b", "20240801")
+    entries = [entry("b", "20240801"), entry("a", "20240701"), entry("z", "20240601")]
+    assert main.prefilter_entries(entries, state, {"b"}) == [entries[1]["url"]]
+    assert state.pending_ids == {"a"}
+
+
+def test_prefilter_drops_rejected_videos_from_pending(tmp_path):
+    state = ChannelSyncState(CHANNEL, str(tmp_path / "sync_state.json"))
+    state.mark_pending("off_topic")
+    state.mark_pending("too_old")
+    entries = [entry("off_topic", title="NVDA earnings"), entry("too_old", "20200101")]
+    assert main.prefilter_entries(entries, state, set(), full_sync=True) == []
+    assert state.pending_ids == set()
+
+
+def test_videos_rejected_after_the_metadata_fetch_are_not_fetched_again(tmp_path):
+    path = str(tmp_path / "sync_state.json")
+    state = ChannelSyncState(CHANNEL, path)
+    state.mark_processed("a", "20240801")
+    entries = [entry("late", upload_date=None), entry("a", "20240801")]  # Flat entries carry no date
+    assert main.prefilter_entries(entries, state, {"a"}) == [entries[0]["url"]]
+    assert main.check_video({"id": "late", "upload_date": "20250601", "title": "Tesla update"}, {"a"}) is None
+    state.mark_skipped("late")
+    state.save()
+
+    reloaded = ChannelSyncState(CHANNEL, path)
+    assert reloaded.skipped_ids == {"late"}
+    assert main.prefilter_entries(entries, reloaded, {"a"}) == []
+    assert reloaded.pending_ids == set()
+    # A full sync checks rejected videos again, e.g. after the date range changed
+    assert main.prefilter_entries(entries, reloaded, {"a"}, full_sync=True) == [entries[0]["url"]]
+
+
+def test_prefilter_skips_entries_without_a_video_id(tmp_path):
+    state = ChannelSyncState(CHANNEL, str(tmp_path / "sync_state.json"))
+    entries = [
+        {"id": None, "url": "https://www.youtube.com/watch?v=from_url", "title": "Tesla update"},
+        {"url": "https://www.youtube.com/@channel/shorts", "title": "Tesla update"},
+        entry("a"),
+    ]
+    assert main.prefilter_entries(entries, state, set()) == [entries[0]["url"], entries[2]["url"]]
+    assert state.pending_ids == {"from_url", "a"}
+    state.save()
+    assert ChannelSyncState(CHANNEL, state.path).pending_ids == {"from_url", "a"}
@@ -0,0 +1,37 @@
+import json
+
+import pandas as pd
+
+from ticker_matcher import TickerMatcher, load_stock_keywords
+
+
+def test_matches_whole_words_in_keyword_list_order():
+    matcher = TickerMatcher(load_stock_keywords(None))  # Built-in list only
+    assert matcher.match("NVDA and TSLA earnings") == ["tesla", "nvidia"]
+    assert matcher.match("Too much hype") == []  # "mu" only as a word
+    assert matcher.match(None) == []
+
+
+def test_shared_keyword_tags_every_stock():
+    matcher = TickerMatcher({"alpha": ["alpha", "shared"], "beta": ["beta", "shared"]})
+    assert matcher.match("the SHARED alias") == ["alpha", "beta"]
+
+
+def test_longer_keyword_is_not_shadowed_by_its_prefix():
+    matcher = TickerMatcher({"meta": ["meta"], "metaverse": ["metaverse"]})
+    assert matcher.match("metaverse news") == ["metaverse"]
+
+
+def test_match_series_agrees_with_match():
+    matcher = TickerMatcher(load_stock_keywords(None))  # Built-in list only
+    titles = pd.Series(["Tesla vs Apple", None, "SPY outlook", "nothing here"])
+    assert matcher.match_series(titles).tolist() == [matcher.match(title or "") for title in titles]
+
+
+def test_tickers_file_extends_the_built_in_list(tmp_path):
+    path = tmp_path / "tickers.json"
+    path.write_text(json.dumps({"Coinbase": ["COIN", "coinbase"], "tesla": ["elon"]}), encoding="utf-8")
+    keywords = load_stock_keywords(str(path))
+    assert keywords["coinbase"] == ["coin", "coinbase"]
+    assert keywords["tesla"] == ["tsla", "tesla", "elon"]
+    assert TickerMatcher(keywords).version != TickerMatcher(load_stock_keywords(None)).version
@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+from video_store import BulkVideoWriter, ensure_indexes, load_processed_ids
+
+
+def video(video_id, **fields):
+    return dict({"Video ID": video_id, "Video URL": f"https://www.youtube.com/watch?v={video_id}"}, **fields)
+
+
+def test_ensure_indexes_is_idempotent(collection):
+    ensure_indexes(collection)
+    ensure_indexes(collection)
+    indexes = collection.index_information()
+    assert {"video_id_unique", "video_url", "upload_date", "stock_name", "stock_date_direction"} <= set(indexes)
+    assert indexes["video_id_unique"]["unique"]
+
+
+def test_rewriting_a_video_updates_it_in_place(collection):
+    ensure_indexes(collection)
+    writer = BulkVideoWriter(collection, flush_size=10, flush_interval=60)
+    writer.add(video("a", **{"Video Title": "old"}))
+    writer.add(video("b"))
+    writer.flush()
+    writer.add(video("a", **{"Video Title": "new"}))
+    writer.close()
+
+    assert collection.count_documents({}) == 2
+    assert collection.find_one({"Video ID": "a"})["Video Title"] == "new"
+    assert writer.written == 3
+
+
+def test_flushes_at_flush_size_and_reports_written_documents(collection):
+    flushed = []
+    writer = BulkVideoWriter(collection, flush_size=2, flush_interval=60, on_flush=flushed.append)
+    for video_id in "abc":
+        writer.add(video(video_id))
+    assert collection.count_documents({}) == 2
+    writer.close()
+    assert collection.count_documents({}) == 3
+    assert [[document["Video ID"] for document in batch] for batch in flushed] == [["a", "b"], ["c"]]
+
+
+def test_flushes_old_documents_from_the_background(collection):
+    writer = BulkVideoWriter(collection, flush_size=100, flush_interval=0.05)
+    writer.add(video("a"))
+    deadline = time.monotonic() + 5
+    while collection.count_documents({}) == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    writer.close()
+    assert collection.count_documents({}) == 1
+
+
+def test_failed_write_keeps_documents_buffered(collection):
+    writer = BulkVideoWriter(collection, flush_size=10, flush_interval=60)
+    bulk_write = collection.bulk_write
+
+    def failing_bulk_write(operations, ordered=True):
+        raise RuntimeError("connection lost")
+
+    collection.bulk_write = failing_bulk_write
+    writer.add(video("a"))
+    with pytest.raises(RuntimeError):
+        writer.flush()
+
+    collection.bulk_write = bulk_write
+    writer.close()
+    assert [document["Video ID"] for document in collection.find()] == ["a"]
+
+
+def test_load_processed_ids_falls_back_to_the_url_of_old_documents(collection):
+    collection.insert_many([video("a"), {"Video URL": "https://youtu.be/b"}, {"Video URL": "N/A"}])
+    assert load_processed_ids(collection) == {"a", "b"}
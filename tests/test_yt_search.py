@@ -0,0 +1,79 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("yt_dlp")
+import yt_search  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(yt_search, "retry_delay", lambda attempt: 0.01)
+
+
+def collect(tasks, fetch, workers=3, retries=3):
+    results = []
+    yt_search.fetch_concurrently(tasks, fetch, lambda context, url, info: results.append((context, url, info)),
+                                 workers, retries)
+    return results
+
+
+def test_every_task_is_reported_once_with_its_context():
+    tasks = [(f"url{i}", i % 2) for i in range(20)]
+    results = collect(tasks, lambda url: {"id": url})
+    assert sorted(results, key=lambda result: result[1]) == sorted(
+        [(context, url, {"id": url}) for url, context in tasks], key=lambda result: result[1])
+
+
+def test_failures_are_retried_then_reported_as_none():
+    attempts = {}
+    lock = threading.Lock()
+
+    def fetch(url):
+        with lock:
+            attempts[url] = attempts.get(url, 0) + 1
+            attempt = attempts[url]
+        if url == "flaky" and attempt < 3:
+            raise OSError("HTTP Error 429")
+        if url == "broken":
+            raise OSError("HTTP Error 410")
+        if url == "empty":
+            return None  # yt-dlp with ignoreerrors
+        return {"id": url}
+
+    results = {url: info for _, url, info in collect([("ok", None), ("flaky", None), ("broken", None), ("empty", None)],
+                                                     fetch, retries=3)}
+    assert results == {"ok": {"id": "ok"}, "flaky": {"id": "flaky"}, "broken": None, "empty": None}
+    assert attempts == {"ok": 1, "flaky": 3, "broken": 3, "empty": 3}
+
+
+def test_no_more_than_the_workers_fetch_at_once():
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def fetch(url):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.01)
+        with lock:
+            active[0] -= 1
+        return {"id": url}
+
+    assert len(collect([(f"url{i}", None) for i in range(30)], fetch, workers=3)) == 30
+    assert peak[0] <= 3
+
+
+def test_retry_backoff_does_not_hold_up_other_downloads(monkeypatch):
+    monkeypatch.setattr(yt_search, "retry_delay", lambda attempt: 0.3)
+    finished = []
+
+    def fetch(url):
+        if url == "slow" and not finished:
+            finished.append("failed")
+            raise OSError("timeout")
+        return {"id": url}
+
+    results = collect([("slow", None)] + [(f"url{i}", None) for i in range(5)], fetch, workers=1)
+    assert [url for _, url, _ in results] == [f"url{i}" for i in range(5)] + ["slow"]
@@ -0,0 +1,92 @@
+"""
+Ticker/company keyword matching shared by classify_videos.py and extract_stock_data.py.
+
+All keywords are compiled once into a single word-bounded alternation, so a title is
+matched in one regex pass instead of one `re.search` per keyword. `match_series` runs
+the same pattern over a whole pandas column.
+
+The built-in list can be extended without code changes: a JSON file mapping stock names
+to keyword lists (`{"coinbase": ["coin", "coinbase"]}`) is merged into it. The file is
+`tickers.json` in the working directory, or whatever `TICKERS_FILE` points to.
+"""
+
+import hashlib
+import json
+import os
+import re
+
+TICKERS_FILE = os.environ.get("TICKERS_FILE", "tickers.json")
+
+# --- Stock keywords for detection ---
+DEFAULT_STOCK_KEYWORDS = {
+    "tesla": ["tsla", "tesla"],
+    "nvidia": ["nvda", "nvidia"],
+    "apple": ["aapl", "apple"],
+    "meta": ["meta", "facebook", "fb"],
+    "amazon": ["amzn", "amazon"],
+    "google": ["googl", "google", "alphabet"],
+    "microsoft": ["msft", "microsoft"],
+    "netflix": ["nflx", "netflix"],
+    "amd": ["amd"],
+    "pltr": ["pltr", "palantir"],
+    "smci": ["smci"],
+    "mu": ["mu", "micron"],
+    "qqq": ["qqq"],
+    "spy": ["spy"]
+}
+
+
+def load_stock_keywords(path=TICKERS_FILE):
+    """Returns the built-in keywords, extended with the stocks/keywords of `path` if it exists."""
+    stock_keywords = {stock: list(keywords) for stock, keywords in DEFAULT_STOCK_KEYWORDS.items()}
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            extra = json.load(f)
+        for stock, keywords in extra.items():
+            known = stock_keywords.setdefault(stock.lower(), [])
+            known.extend(keyword.lower() for keyword in keywords if keyword.lower() not in known)
+    return stock_keywords
+
+
+class TickerMatcher:
+    """Matches titles against every stock's keywords in a single pass."""
+
+    def __init__(self, stock_keywords=None):
+        self.stock_keywords = stock_keywords if stock_keywords is not None else load_stock_keywords()
+        self.stock_order = {stock: index for index, stock in enumerate(self.stock_keywords)}
+        # Changes whenever a stock or keyword is added, so stored classifications can be invalidated
+        self.version = hashlib.sha1(json.dumps(self.stock_keywords, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+        # A keyword shared by several stocks (a common alias) tags all of them
+        self.keyword_stocks = {}
+        for stock, keywords in self.stock_keywords.items():
+            for keyword in keywords:
+                stocks = self.keyword_stocks.setdefault(keyword.lower(), [])
+                if stock not in stocks:
+                    stocks.append(stock)
+        # Longest first, so a keyword never shadows a longer one sharing its prefix
+        alternation = "|".join(re.escape(keyword) for keyword in sorted(self.keyword_stocks, key=len, reverse=True))
+        self.pattern = re.compile(r"\b(?:" + alternation + r")\b")
+
+    def _stocks_for(self, keywords):
+        stocks = {stock for keyword in keywords for stock in self.keyword_stocks[keyword]}
+        return sorted(stocks, key=self.stock_order.__getitem__)
+
+    def match(self, title):
+        """Returns the stocks mentioned in `title`, in the order of the keyword list."""
+        return self._stocks_for(self.pattern.findall(str(title).lower()))
+
+    def match_series(self, titles):
+        """Returns a Series with the list of matched stocks for every title of a pandas Series."""
+        found = titles.fillna("").astype(str).str.lower().str.findall(self.pattern)
+        return found.map(self._stocks_for)
+
+
+_default_matcher = None
+
+
+def default_matcher():
+    """Returns the process-wide matcher over the built-in and file-provided keywords."""
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = TickerMatcher()
+    return _default_matcher
@@ -1,5 +1,4 @@
 import argparse
-import csv
 import logging
 import yt_dlp
 import os
@@ -7,8 +6,22 @@ import sys
 import re
 import time
 import random
+import heapq
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
 import io
+from rate_limit import TokenBucket
+from scrape_writer import CheckpointWriter, OUTPUT_FORMATS, DEFAULT_FLUSH_ROWS, DEFAULT_FLUSH_INTERVAL
+
+DEFAULT_RATE = 0.5  # Detail requests per second, same pace as the old `sleep_requests: 2`
+DEFAULT_BURST = 3
+DEFAULT_MULTI_CHANNEL_WORKERS = 4  # Shared pool size when several channels are scraped
+RETRY_BACKOFF_BASE = 2.0  # Seconds
+RETRY_BACKOFF_MAX = 60.0
+PROGRESS_INTERVAL = 10.0  # Seconds between progress reports in concurrent mode
 
 # ✅ Logging setup
 def setup_logging():
@@ -25,50 +38,6 @@ def setup_logging():
 def sanitize_filename(name):
     return re.sub(r'[\\/*?:"<>|]', '_', name.replace(' ', '_'))
 
-# ✅ Load already processed URLs to resume
-def load_processed_urls(progress_file):
-    if os.path.exists(progress_file):
-        with open(progress_file, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            next(reader, None)
-            return set(row[0] for row in reader if row)
-    return set()
-
-# ✅ Save processed URL to resume file
-def save_processed_url(progress_file, url):
-    with open(progress_file, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow([url])
-
-# ✅ Create header for resume file
-def save_progress_header(progress_file):
-    if not os.path.exists(progress_file):
-        with open(progress_file, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(["Processed URL"])
-
-# ✅ Create CSV header for output data
-def save_header_to_csv(filename):
-    if not os.path.exists(filename):
-        with open(filename, mode='w', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-            writer.writerow([
-                "Video ID", "Title", "URL", "Duration", "Uploader",
-                "Channel Name", "Upload Date", "View Count", "Like Count",
-                "Description", "Channel URL", "Thumbnail"
-            ])
-
-# ✅ Append video row to CSV
-def append_video_to_csv(filename, video):
-    with open(filename, mode='a', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow([
-            video["video_id"], video["title"], video["url"], video["duration"],
-            video["uploader"], video["channel_name"], video["upload_date"],
-            video["view_count"], video["like_count"], video["description"],
-            video["channel_url"], video["thumbnail"]
-        ])
-
 # ✅ Retry wrapper
 def retry_extract_info(ydl, url, retries=3):
     for attempt in range(retries):
@@ -79,13 +48,119 @@ def retry_extract_info(ydl, url, retries=3):
             time.sleep(2 * (attempt + 1) + random.uniform(0, 2))
     return None
 
-# ✅ Extract all videos and save to CSV
-def extract_channel_videos(channel_id):
-    channel_url = f"https://www.youtube.com/channel/{channel_id}/videos"
-    progress_file = f"{sanitize_filename(channel_id)}_progress.csv"
-    save_progress_header(progress_file)
-    processed_urls = load_processed_urls(progress_file)
+# ✅ Convert yt-dlp info to an output row
+def build_video_data(video_info):
+    return {
+        "video_id": video_info.get("id"),
+        "title": video_info.get("title"),
+        "url": video_info.get("webpage_url"),
+        "duration": video_info.get("duration"),
+        "uploader": video_info.get("uploader"),
+        "channel_name": video_info.get("channel"),
+        "upload_date": datetime.strptime(video_info.get("upload_date", "19700101"), "%Y%m%d").strftime("%Y-%m-%d") if video_info.get("upload_date") else None,
+        "view_count": video_info.get("view_count"),
+        "like_count": video_info.get("like_count"),
+        "description": video_info.get("description"),
+        "channel_url": video_info.get("channel_url"),
+        "thumbnail": video_info.get("thumbnail")
+    }
+
+# ✅ Progress and throughput reporting
+class ScrapeProgress:
+    """Counts finished videos and logs throughput and ETA every PROGRESS_INTERVAL seconds."""
+
+    def __init__(self, total, interval=PROGRESS_INTERVAL):
+        self.total = total
+        self.interval = interval
+        self.saved = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self._reported = self.started
+
+    def record(self, ok):
+        if ok:
+            self.saved += 1
+        else:
+            self.failed += 1
+        now = time.monotonic()
+        if now - self._reported >= self.interval:
+            self._reported = now
+            self.report()
+
+    def rate(self):
+        return (self.saved + self.failed) / max(time.monotonic() - self.started, 1e-9)
+
+    def report(self):
+        done = self.saved + self.failed
+        rate = self.rate()
+        eta = (self.total - done) / rate if rate else float("inf")
+        logging.info(f"📈 {done}/{self.total} videos ({self.failed} failed), {rate:.2f} videos/s, ETA {eta / 60:.1f} min")
+
+# ✅ Thread-local yt-dlp instances (YoutubeDL objects are not thread-safe)
+_thread_local = threading.local()
 
+def make_detail_fetcher(ydl_opts, limiter):
+    """Return fetch(url) -> info dict or None, rate-limited by the shared token bucket."""
+    def fetch(url):
+        ydl = getattr(_thread_local, "ydl", None)
+        if ydl is None:
+            ydl = _thread_local.ydl = yt_dlp.YoutubeDL(ydl_opts)
+        limiter.acquire()
+        return ydl.extract_info(url, download=False)
+    return fetch
+
+def retry_delay(attempt):
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** attempt))
+
+def fetch_concurrently(tasks, fetch, on_result, workers, retries=3):
+    """
+    Run fetch(url) for every (url, context) task on a thread pool.
+    Failed fetches are rescheduled after a backoff delay instead of sleeping in a worker,
+    so retries never hold up other downloads. on_result(context, url, info) runs in the
+    calling thread, in completion order; info is None once all retries failed.
+    """
+    pending = deque((url, context, 0) for url, context in tasks)
+    delayed = []  # Heap of (due time, sequence, url, context, attempt)
+    sequence = itertools.count()
+    in_flight = {}
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="yt-detail") as pool:
+        while pending or delayed or in_flight:
+            now = time.monotonic()
+            while delayed and delayed[0][0] <= now:
+                _, _, url, context, attempt = heapq.heappop(delayed)
+                pending.appendleft((url, context, attempt))
+            while pending and len(in_flight) < workers * 2:
+                url, context, attempt = pending.popleft()
+                in_flight[pool.submit(fetch, url)] = (url, context, attempt)
+
+            timeout = max(0.0, delayed[0][0] - time.monotonic()) if delayed else None
+            if not in_flight:
+                time.sleep(timeout)
+                continue
+            done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                url, context, attempt = in_flight.pop(future)
+                try:
+                    info = future.result()
+                except Exception as e:
+                    logging.warning(f"Retry {attempt+1}/{retries} failed for {url}: {e}")
+                    info = None
+                if info is None and attempt + 1 < retries:
+                    heapq.heappush(delayed, (time.monotonic() + retry_delay(attempt), next(sequence), url, context, attempt + 1))
+                    continue
+                on_result(context, url, info)
+
+# ✅ Per-channel file names and listing
+def progress_file_for(channel_id, output_format="csv"):
+    suffix = "" if output_format == "csv" else f"_{output_format}"
+    return f"{sanitize_filename(channel_id)}{suffix}_progress.csv"
+
+def list_channel_entries(channel_id):
+    """Return (sanitized channel title, flat entries) of a channel's uploads, or None if listing failed."""
+    channel_url = f"https://www.youtube.com/channel/{channel_id}/videos"
     ydl_opts_flat = {
         'quiet': True,
         'extract_flat': True,
@@ -94,6 +169,31 @@ def extract_channel_videos(channel_id):
         'sleep_requests': 2
     }
 
+    with yt_dlp.YoutubeDL(ydl_opts_flat) as ydl:
+        logging.info(f"🔍 Fetching video list of {channel_id}...")
+        info = ydl.extract_info(channel_url, download=False)
+        if not info or 'entries' not in info:
+            logging.warning(f"⚠ No videos found or failed to fetch channel {channel_id}.")
+            return None
+
+        channel_title = sanitize_filename(info.get('title', 'channel'))
+        entries = info['entries']
+        logging.info(f"📦 Found {len(entries)} videos.")
+    return channel_title, entries
+
+def new_video_urls(entries, processed_urls):
+    urls = (f"https://www.youtube.com/watch?v={entry['id']}" for entry in entries if entry and 'id' in entry)
+    return [url for url in urls if url not in processed_urls]
+
+# ✅ Extract all videos and save to CSV
+def extract_channel_videos(channel_id, workers=1, rate=DEFAULT_RATE, burst=DEFAULT_BURST, retries=3,
+                           output_format="csv", flush_rows=DEFAULT_FLUSH_ROWS, flush_interval=DEFAULT_FLUSH_INTERVAL):
+    """
+    Scrape the details of every video of a channel into results/<channel>.csv (or .parquet).
+    With workers > 1, details are fetched concurrently under a shared token-bucket rate limit.
+    """
+    progress_file = progress_file_for(channel_id, output_format)
+
     ydl_opts_detailed = {
         'quiet': True,
         'ignoreerrors': True,
@@ -101,27 +201,24 @@ def extract_channel_videos(channel_id):
         'sleep_requests': 2
     }
 
-    videos = []
-    channel_title = "channel"
-
     try:
-        with yt_dlp.YoutubeDL(ydl_opts_flat) as ydl:
-            logging.info("🔍 Fetching video list...")
-            info = ydl.extract_info(channel_url, download=False)
-            if not info or 'entries' not in info:
-                logging.warning("⚠ No videos found or failed to fetch channel.")
-                return
-
-            channel_title = sanitize_filename(info.get('title', 'channel'))
-            entries = info['entries']
-            logging.info(f"📦 Found {len(entries)} videos.")
+        listing = list_channel_entries(channel_id)
+        if listing is None:
+            return
+        channel_title, entries = listing
 
         output_dir = "results"
         os.makedirs(output_dir, exist_ok=True)
-        output_csv = os.path.join(output_dir, f"{channel_title}.csv")
-        save_header_to_csv(output_csv)
+        writer = CheckpointWriter(os.path.join(output_dir, channel_title), progress_file, output_format, flush_rows, flush_interval)
+        processed_urls = writer.processed_urls
+
+        if workers > 1:
+            with writer:
+                scrape_concurrently(entries, processed_urls, writer, workers, rate, burst, retries)
+            logging.info(f"🎉 Completed extraction. Output saved at: {writer.output_path}")
+            return
 
-        with yt_dlp.YoutubeDL(ydl_opts_detailed) as ydl:
+        with writer, yt_dlp.YoutubeDL(ydl_opts_detailed) as ydl:
             for index, entry in enumerate(entries, start=1):
                 if not entry or 'id' not in entry:
                     continue
@@ -134,40 +231,139 @@ def extract_channel_videos(channel_id):
                     logging.warning(f"⚠ Skipping failed video: {video_url}")
                     continue
 
-                video_data = {
-                    "video_id": video_info.get("id"),
-                    "title": video_info.get("title"),
-                    "url": video_info.get("webpage_url"),
-                    "duration": video_info.get("duration"),
-                    "uploader": video_info.get("uploader"),
-                    "channel_name": video_info.get("channel"),
-                    "upload_date": datetime.strptime(video_info.get("upload_date", "19700101"), "%Y%m%d").strftime("%Y-%m-%d") if video_info.get("upload_date") else None,
-                    "view_count": video_info.get("view_count"),
-                    "like_count": video_info.get("like_count"),
-                    "description": video_info.get("description"),
-                    "channel_url": video_info.get("channel_url"),
-                    "thumbnail": video_info.get("thumbnail")
-                }
-
-                append_video_to_csv(output_csv, video_data)
-                save_processed_url(progress_file, video_url)
+                video_data = build_video_data(video_info)
+
+                writer.add(video_data, video_url)
                 logging.info(f"[{index}/{len(entries)}] [OK] Saved: {video_data['title']}")
 
 
-        logging.info(f"🎉 Completed extraction. CSV saved at: {output_csv}")
+        logging.info(f"🎉 Completed extraction. Output saved at: {writer.output_path}")
 
     except Exception as e:
         logging.error(f"❌ Failed to extract videos from channel {channel_id}: {e}")
 
+# ✅ Concurrent detail fetching
+def scrape_concurrently(entries, processed_urls, writer, workers, rate, burst, retries):
+    """Fetch the details of the unprocessed entries with `workers` threads; rows are written as they complete."""
+    ydl_opts = {'quiet': True, 'ignoreerrors': True, 'skip_download': True}  # Pacing comes from the token bucket
+    video_urls = new_video_urls(entries, processed_urls)
+    logging.info(f"⚡ Fetching {len(video_urls)} videos with {workers} workers at {rate} requests/s (burst {burst}).")
+    progress = ScrapeProgress(len(video_urls))
+
+    def on_result(_, video_url, video_info):
+        if video_info is None:
+            logging.warning(f"⚠ Skipping failed video: {video_url}")
+            progress.record(False)
+            return
+        writer.add(build_video_data(video_info), video_url)
+        progress.record(True)
+
+    fetch = make_detail_fetcher(ydl_opts, TokenBucket(rate, burst))
+    fetch_concurrently(((url, None) for url in video_urls), fetch, on_result, workers, retries)
+    progress.report()
+    return progress
+
+# ✅ Several channels on one shared worker pool
+def extract_many_channels(channel_ids, workers=DEFAULT_MULTI_CHANNEL_WORKERS, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+                          retries=3, output_format="csv", flush_rows=DEFAULT_FLUSH_ROWS, flush_interval=DEFAULT_FLUSH_INTERVAL):
+    """
+    Scrape several channels with one worker pool and one global rate limit.
+    Every channel keeps its own progress file and output; channels with the most new uploads go first.
+    """
+    output_dir = "results"
+    os.makedirs(output_dir, exist_ok=True)
+    channels = []  # (channel id, writer, new video urls, progress)
+    try:
+        for channel_id in channel_ids:
+            try:
+                listing = list_channel_entries(channel_id)
+            except Exception as e:
+                logging.error(f"❌ Failed to list channel {channel_id}: {e}")
+                continue
+            if listing is None:
+                continue
+            channel_title, entries = listing
+            try:
+                writer = CheckpointWriter(os.path.join(output_dir, channel_title),
+                                          progress_file_for(channel_id, output_format),
+                                          output_format, flush_rows, flush_interval)
+            except Exception as e:
+                logging.error(f"❌ Failed to open the output of channel {channel_id}: {e}")
+                continue
+            video_urls = new_video_urls(entries, writer.processed_urls)
+            channels.append((channel_id, writer, video_urls, ScrapeProgress(len(video_urls), interval=float("inf"))))
+
+        channels.sort(key=lambda channel: len(channel[2]), reverse=True)
+        for channel_id, _, video_urls, _ in channels:
+            logging.info(f"📋 {channel_id}: {len(video_urls)} new videos")
+
+        total = ScrapeProgress(sum(len(channel[2]) for channel in channels))
+        logging.info(f"⚡ Fetching {total.total} videos from {len(channels)} channels with {workers} workers "
+                     f"at {rate} requests/s (burst {burst}).")
+
+        def on_result(channel, video_url, video_info):
+            _, writer, _, progress = channel
+            if video_info is None:
+                logging.warning(f"⚠ Skipping failed video: {video_url}")
+            else:
+                writer.add(build_video_data(video_info), video_url)
+            progress.record(video_info is not None)
+            total.record(video_info is not None)
+
+        tasks = [(url, channel) for channel in channels for url in channel[2]]
+        ydl_opts = {'quiet': True, 'ignoreerrors': True, 'skip_download': True}
+        fetch_concurrently(tasks, make_detail_fetcher(ydl_opts, TokenBucket(rate, burst)), on_result, workers, retries)
+    finally:
+        for _, writer, _, _ in channels:
+            writer.close()
+
+    elapsed = time.monotonic() - total.started
+    logging.info("📊 Summary:")
+    for channel_id, writer, video_urls, progress in channels:
+        logging.info(f"   {channel_id}: {progress.saved} saved, {progress.failed} failed -> {writer.output_path}")
+    logging.info(f"🎉 {total.saved} videos saved, {total.failed} failed in {elapsed:.1f}s ({total.rate():.2f} videos/s).")
+    return total
+
+def read_channel_ids(channel_ids, channels_file=None):
+    """Combine channel ids from the command line and a file (one per line, '#' comments allowed), keeping order."""
+    ids = list(channel_ids)
+    if channels_file:
+        with open(channels_file, 'r', encoding='utf-8') as f:
+            ids.extend(line.split('#', 1)[0].strip() for line in f)
+    return list(dict.fromkeys(channel_id for channel_id in ids if channel_id))
+
 # ✅ CLI entry point
 def main():
     setup_logging()
-    parser = argparse.ArgumentParser(description="Download all videos from a YouTube channel as CSV.")
-    parser.add_argument("channel_id", type=str, help="YouTube Channel ID")
+    parser = argparse.ArgumentParser(description="Download all videos from YouTube channels as CSV.")
+    parser.add_argument("channel_ids", nargs="*", help="YouTube Channel ID(s)")
+    parser.add_argument("--channels-file", help="File with one channel id per line")
+    parser.add_argument("--workers", type=int, default=None,
+                        help=f"Concurrent detail fetches (1 = sequential; default: 1 for one channel, "
+                             f"{DEFAULT_MULTI_CHANNEL_WORKERS} for several)")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Detail requests per second across all workers")
+    parser.add_argument("--burst", type=int, default=DEFAULT_BURST, help="Requests allowed in a burst")
+    parser.add_argument("--retries", type=int, default=3, help="Attempts per video")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="csv", help="Output format (parquet requires pyarrow)")
+    parser.add_argument("--flush-rows", type=int, default=DEFAULT_FLUSH_ROWS, help="Rows buffered before a checkpointed write")
+    parser.add_argument("--flush-interval", type=float, default=DEFAULT_FLUSH_INTERVAL, help="Seconds between checkpointed writes")
     args = parser.parse_args()
 
-    logging.info(f"📡 Starting scrape for Channel ID: {args.channel_id}")
-    extract_channel_videos(args.channel_id)
+    channel_ids = read_channel_ids(args.channel_ids, args.channels_file)
+    if not channel_ids:
+        parser.error("give at least one channel id or --channels-file")
+    workers = args.workers
+    if workers is None:
+        workers = 1 if len(channel_ids) == 1 else DEFAULT_MULTI_CHANNEL_WORKERS
+
+    if len(channel_ids) == 1:
+        logging.info(f"📡 Starting scrape for Channel ID: {channel_ids[0]}")
+        extract_channel_videos(channel_ids[0], workers, args.rate, args.burst, args.retries,
+                               args.format, args.flush_rows, args.flush_interval)
+    else:
+        logging.info(f"📡 Starting scrape for {len(channel_ids)} channels")
+        extract_many_channels(channel_ids, workers, args.rate, args.burst, args.retries,
+                              args.format, args.flush_rows, args.flush_interval)
 
 # ✅ Run the script
 if __name__ == "__main__":